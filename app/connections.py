@@ -0,0 +1,165 @@
+import contextlib
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Read-only connections memory-map this much of the database file, so pages
+# are shared through the OS page cache instead of copied per connection
+MMAP_BYTES = 256 * 1024 * 1024
+POOL_SIZE = 4
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+def connect_read_only(db_path, mmap_bytes=MMAP_BYTES):
+    """A connection that cannot write to `db_path` and may be used from any thread (one at a time)."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_bytes)}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Up to `size` read-only connections to `db_path`, shared by every thread
+    (every Streamlit session) of the process and borrowed one query batch at
+    a time. version() tells when the database has changed: its file was
+    modified or replaced, or another connection (the loader) committed, as
+    seen through PRAGMA data_version on a dedicated connection.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE, mmap_bytes=MMAP_BYTES):
+        self.db_path = db_path
+        self.size = size
+        self.mmap_bytes = mmap_bytes
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._inode = None
+        self._generation = 0
+        self._watcher = None
+
+    def _stat(self):
+        stat = os.stat(self.db_path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def version(self):
+        """Token that changes whenever the data behind the pool may have changed."""
+        inode, mtime_ns = self._stat()
+        with self._lock:
+            if inode != self._inode:
+                # A new file (e.g. a rebuilt database): connections to the old one are retired
+                self._inode = inode
+                self._generation += 1
+                if self._watcher is not None:
+                    self._watcher.close()
+                self._watcher = connect_read_only(self.db_path, 0)
+            data_version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            return self._generation, mtime_ns, data_version
+
+    @contextlib.contextmanager
+    def connection(self, timeout=30):
+        """Borrow a connection; waits up to `timeout` seconds when all `size` are in use."""
+        generation = self.version()[0]
+        conn = None
+        while conn is None:
+            try:
+                conn, conn_generation = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    create = self._created < self.size
+                    if create:
+                        self._created += 1
+                if create:
+                    conn, conn_generation = connect_read_only(self.db_path, self.mmap_bytes), generation
+                else:
+                    conn, conn_generation = self._idle.get(timeout=timeout)
+            if conn_generation != generation:
+                conn.close()
+                conn = None
+                with self._lock:
+                    self._created -= 1
+        try:
+            yield conn
+        finally:
+            self._idle.put((conn, generation))
+
+
+def _estimated_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_estimated_bytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """
+    Process-wide cache of query results keyed by SQL text plus parameters.
+
+    Entries expire after `ttl_seconds`, the least recently used ones are
+    evicted beyond `max_entries` or `max_bytes` (DataFrame sizes are
+    measured, other values estimated), and the whole cache is dropped when
+    `version()` (e.g. ConnectionPool.version) returns a new token. Results
+    are shared between sessions, not copied, so callers must not modify them.
+    """
+
+    def __init__(self, version, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _evict(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, sql, params, compute):
+        """The cached result of (`sql`, `params`), or compute() stored under that key."""
+        key = (' '.join(sql.split()), tuple(params))
+        version = self.version()
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._evict(key)
+            self.misses += 1
+
+        # Computed outside the lock so slow queries do not block other sessions
+        value = compute()
+        size = _estimated_bytes(value)
+        with self._lock:
+            if self._version == version and size <= self.max_bytes:
+                if key in self._entries:
+                    self._evict(key)
+                self._entries[key] = (value, now, size)
+                self._bytes += size
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    self._evict(next(iter(self._entries)))
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
@@ -1,11 +1,21 @@
 import streamlit as st
-import pandas as pd
 import sqlite3
 import plotly.express as px
+import plotly.graph_objects as go
 import json
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 import os
+import sys
+
+from connections import ConnectionPool, QueryCache
+from explorer import DEFAULT_PAGE_SIZE, FILTER_OPERATORS, PAGE_SIZES, TablePager, sortable_columns, table_columns
+from queries import FrameQueries, ai_summaries, load_frames, sql_queries, sql_queries_available
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.memory import optimize_memory
+
+DB_PATH = os.path.join('..', 'ecommerce.db')
 
 # Configure page
 st.set_page_config(
@@ -51,89 +61,131 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+@st.cache_resource
+def db_pool():
+    """Read-only connections shared by every session of this Streamlit process."""
+    return ConnectionPool(DB_PATH)
+
+@st.cache_resource
+def query_cache():
+    """
+    Query results shared by every session, keyed by SQL text and parameters
+    and dropped whenever the database changes (ConnectionPool.version).
+    """
+    return QueryCache(db_pool().version)
+
+@st.cache_resource(max_entries=1)
+def _load_tables(db_version):
+    with db_pool().connection() as conn:
+        # Load all tables, with categorical/downcast dtypes to keep the shared copy small
+        return tuple(optimize_memory(df, verbose=False) for df in load_frames(conn))
+
 def load_data():
-    """Load data from SQLite database"""
+    """
+    Load data from SQLite database. One copy is shared by every session (not
+    copied per session as st.cache_data would) and reloaded when the
+    database changes; callers must not modify the frames.
+    """
     try:
-        file_path = os.path.join('..', 'ecommerce.db')
-        conn = sqlite3.connect(file_path)
-        
-        # Load all tables
-        customers = pd.read_sql_query("SELECT * FROM customers", conn)
-        products = pd.read_sql_query("SELECT * FROM products", conn) 
-        orders = pd.read_sql_query("SELECT * FROM orders", conn)
-        order_items = pd.read_sql_query("SELECT * FROM order_items", conn)
-        suppliers = pd.read_sql_query("SELECT * FROM suppliers", conn)
-        
-        conn.close()
-        return customers, products, orders, order_items, suppliers
+        return _load_tables(db_pool().version())
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None, None, None, None, None
 
-def create_business_metrics(customers, orders, order_items, products):
-    """Calculate key business metrics"""
-    
-    # Total metrics
-    total_customers = len(customers)
-    total_orders = len(orders)
-    total_revenue = orders['order_total'].sum()
-    avg_order_value = orders['order_total'].mean()
-    
-    # Customer metrics
-    active_customers = len(customers[customers['status'] == 'active'])
-    customer_retention_rate = (active_customers / total_customers) * 100
-    
-    # Product metrics
-    total_products = len(products)
-    active_products = len(products[products['is_active'] == True])
-    
-    return {
-        'total_customers': total_customers,
-        'total_orders': total_orders,
-        'total_revenue': total_revenue,
-        'avg_order_value': avg_order_value,
-        'active_customers': active_customers,
-        'customer_retention_rate': customer_retention_rate,
-        'total_products': total_products,
-        'active_products': active_products
-    }
-
-def create_data_quality_metrics(customers, products, orders):
-    """Calculate data quality metrics"""
-    
-    # Customer data quality
-    customer_completeness = {
-        'email': customers['email'].notna().sum() / len(customers) * 100,
-        'phone': customers['phone'].notna().sum() / len(customers) * 100,
-        'address': customers['address'].notna().sum() / len(customers) * 100,
-    }
-    
-    # Product data quality
-    product_completeness = {
-        'description': products['description'].notna().sum() / len(products) * 100,
-        'category': products['final_category'].notna().sum() / len(products) * 100,
-        'brand': products['brand'].notna().sum() / len(products) * 100,
-    }
-    
-    # Data issues detected
-    category_mismatches = products['category_mismatch'].sum() if 'category_mismatch' in products.columns else 0
-    active_flag_issues = products['is_active_flag_issue'].sum() if 'is_active_flag_issue' in products.columns else 0
-    
-    return {
-        'customer_completeness': customer_completeness,
-        'product_completeness': product_completeness,
-        'category_mismatches': category_mismatches,
-        'active_flag_issues': active_flag_issues
-    }
-
-def create_customer_segmentation_chart(customers):
+def with_queries(compute):
+    """
+    compute(queries) over the rollup tables or SQL aggregation, falling back
+    to pandas over load_data() when the database cannot answer it. Each
+    statement's small result is kept in query_cache().
+    """
+    try:
+        with db_pool().connection() as conn:
+            if sql_queries_available(conn):
+                return compute(sql_queries(conn, query_cache()))
+    except sqlite3.Error:
+        pass
+    customers, products, orders, order_items, _ = load_data()
+    return compute(FrameQueries(customers, products, orders, order_items))
+
+def run_query(name, *args):
+    """Compute one dashboard dataset (a SqlQueries/FrameQueries method), see with_queries()."""
+    return with_queries(lambda queries: getattr(queries, name)(*args))
+
+@st.cache_resource(max_entries=1)
+def _ai_context(db_version):
+    business_summary, question_context = with_queries(ai_summaries)
+    return (json.dumps(business_summary, indent=2, default=str),
+            json.dumps(question_context, indent=2, default=str))
+
+def ai_context():
+    """
+    The JSON business summary and question context for the AI prompts
+    (queries.ai_summaries), computed once per database version. Being short
+    strings, they are cheap for st.cache_data to hash as cache keys.
+    """
+    return _ai_context(db_pool().version())
+
+def render_table_explorer(table):
+    """One page of `table` at a time, filtered, sorted and paged in SQLite (see explorer.TablePager)."""
+    with db_pool().connection() as conn:
+        columns = table_columns(conn, table)
+        sort_options = ["(table order)"] + sortable_columns(conn, table)
+
+        col1, col2, col3 = st.columns(3)
+        sort = col1.selectbox("Sort by (indexed columns):", sort_options, key=f"explorer_sort_{table}")
+        descending = col2.selectbox("Order:", ["Ascending", "Descending"], key=f"explorer_order_{table}") == "Descending"
+        page_size = col3.selectbox("Rows per page:", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                   key=f"explorer_page_size_{table}")
+
+        filters = []
+        with st.expander("🔎 Filters"):
+            for column in st.multiselect("Filter columns:", columns, key=f"explorer_filter_columns_{table}"):
+                col1, col2 = st.columns([1, 2])
+                operator = col1.selectbox(column, list(FILTER_OPERATORS), key=f"explorer_op_{table}_{column}")
+                if 'param' in FILTER_OPERATORS[operator]:
+                    value = col2.text_input("Value", key=f"explorer_value_{table}_{column}")
+                    if value == '':
+                        continue
+                else:
+                    value = None
+                filters.append((column, operator, value))
+        filters = tuple(filters)
+
+        pager = TablePager(conn, table, None if sort == sort_options[0] else sort, descending, filters, page_size,
+                           cache=query_cache())
+        total = pager.count()
+        pages = max(1, -(-total // page_size))
+
+        # The page is remembered as the request that fetched it (cursors, not
+        # offsets); any change of table, order, filters or data starts over
+        view = (table, sort, descending, filters, page_size, db_pool().version())
+        state = st.session_state.get('explorer')
+        if state is None or state['view'] != view:
+            state = st.session_state.explorer = {'view': view, 'page': 1, 'request': {}, 'first': None, 'last': None}
+
+        col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+        if col1.button("⏮ First", disabled=state['page'] == 1):
+            state.update(page=1, request={})
+        if col2.button("◀ Previous", disabled=state['page'] == 1):
+            state.update(page=state['page'] - 1, request={'before': state['first']})
+        if col4.button("Next ▶", disabled=state['page'] >= pages):
+            state.update(page=state['page'] + 1, request={'after': state['last']})
+        if col5.button("Last ⏭", disabled=state['page'] >= pages):
+            # The last page holds the remainder, so earlier pages keep their boundaries
+            state.update(page=pages, request={'from_end': True, 'limit': total - (pages - 1) * page_size})
+
+        rows, state['first'], state['last'] = pager.page(**state['request'])
+        col3.markdown(f"Page **{state['page']:,}** of **{pages:,}**")
+
+    start = (state['page'] - 1) * page_size
+    st.caption(f"Rows {start + 1 if len(rows) else 0:,}–{start + len(rows):,} of {total:,}")
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+def create_customer_segmentation_chart(segment_counts):
     """Create customer segmentation visualization"""
-    segment_counts = customers['segment'].value_counts()
-    
     fig = px.pie(
-        values=segment_counts.values,
-        names=segment_counts.index,
+        values=segment_counts['count'],
+        names=segment_counts['segment'],
         title="Customer Segmentation Distribution",
         color_discrete_sequence=px.colors.qualitative.Set3
     )
@@ -143,17 +195,11 @@ def create_customer_segmentation_chart(customers):
     
     return fig
 
-def create_revenue_trend_chart(orders):
+def create_revenue_trend_chart(monthly_revenue):
     """Create revenue trend over time"""
-    # Convert order_date to datetime
-    orders['order_date_parsed'] = pd.to_datetime(orders['order_date'], errors='coerce')
-    
-    # Group by month and sum revenue
-    monthly_revenue = orders.groupby(orders['order_date_parsed'].dt.to_period('M'))['order_total'].sum()
-    
     fig = px.line(
-        x=monthly_revenue.index.astype(str),
-        y=monthly_revenue.values,
+        x=monthly_revenue['month'],
+        y=monthly_revenue['revenue'],
         title="Monthly Revenue Trend",
         labels={'x': 'Month', 'y': 'Revenue ($)'}
     )
@@ -163,24 +209,8 @@ def create_revenue_trend_chart(orders):
     
     return fig
 
-def create_product_performance_chart(products, order_items):
+def create_product_performance_chart(top_products):
     """Create product performance visualization"""
-    # Calculate product sales
-    product_sales = order_items.groupby('product_id').agg({
-        'quantity': 'sum',
-        'total_amount': 'sum'
-    }).reset_index()
-    
-    # Merge with product info
-    product_perf = product_sales.merge(
-        products[['product_id', 'product_name', 'category', 'final_category']], 
-        on='product_id', 
-        how='left'
-    )
-    
-    # Top 10 products by revenue
-    top_products = product_perf.nlargest(10, 'total_amount')
-    
     fig = px.bar(
         top_products,
         x='total_amount',
@@ -195,33 +225,13 @@ def create_product_performance_chart(products, order_items):
     return fig
 
 @st.cache_data
-def generate_business_insights(customers, products, orders, order_items):
-    """Generate AI-powered business insights using LangChain + Gemini"""
+def generate_business_insights(business_summary):
+    """Generate AI-powered business insights using LangChain + Gemini from the JSON summary of ai_context()"""
     
     try:
         # Initialize LLM
         llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
         
-        # Calculate business metrics for AI analysis
-        business_summary = {
-            "total_customers": len(customers),
-            "total_orders": len(orders),
-            "total_revenue": float(orders['order_total'].sum()),
-            "avg_order_value": float(orders['order_total'].mean()),
-            "customer_segments": customers['segment'].value_counts().to_dict(),
-            "customer_status": customers['status'].value_counts().to_dict(),
-            "top_categories": order_items.merge(products[['product_id', 'final_category']], on='product_id')['final_category'].value_counts().head(5).to_dict(),
-            "monthly_revenue_trend": {str(k): float(v) for k, v in orders.groupby(pd.to_datetime(orders['order_date'], errors='coerce').dt.to_period('M'))['order_total'].sum().tail(6).items()},
-            "customer_lifetime_value": customers.groupby('segment')['total_spent'].mean().to_dict(),
-            "product_performance": order_items.groupby('product_id')['total_amount'].sum().nlargest(5).to_dict(),
-            "geographic_distribution": customers['state'].value_counts().head(5).to_dict() if 'state' in customers.columns else {},
-            "inventory_alerts": {
-                "low_stock_products": len(products[products['stock_quantity'] < products['reorder_level']]),
-                "inactive_products": len(products[products['is_active'] == False]),
-                "total_products": len(products)
-            }
-        }
-        
         # Create prompt for business insights
         business_insights_template = """
         You are a senior business analyst for TechCorp, an e-commerce company. 
@@ -251,7 +261,7 @@ def generate_business_insights(customers, products, orders, order_items):
         
         # Generate insights
         result = chain.invoke({
-            "business_data": json.dumps(business_summary, indent=2, default=str)
+            "business_data": business_summary
         })
         return result.content
         
@@ -259,36 +269,13 @@ def generate_business_insights(customers, products, orders, order_items):
         return f"Error generating AI insights: {str(e)}"
 
 @st.cache_data  
-def answer_business_question(question, customers, products, orders, order_items):
-    """Answer specific business questions using AI"""
+def answer_business_question(question, data_context):
+    """Answer specific business questions using AI, given the JSON data context of ai_context()"""
     
     try:
         # Initialize LLM
         llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
         
-        # Prepare relevant data context based on question
-        data_context = {
-            "customers_summary": {
-                "total": len(customers),
-                "by_segment": customers['segment'].value_counts().to_dict(),
-                "by_status": customers['status'].value_counts().to_dict(),
-                "avg_spent": float(customers['total_spent'].mean()),
-                "avg_orders": float(customers['total_orders'].mean())
-            },
-            "products_summary": {
-                "total": len(products),
-                "categories": products['final_category'].value_counts().to_dict(),
-                "avg_price": float(products['price'].mean()),
-                "low_stock_count": len(products[products['stock_quantity'] < products['reorder_level']])
-            },
-            "orders_summary": {
-                "total": len(orders),
-                "total_revenue": float(orders['order_total'].sum()),
-                "avg_order_value": float(orders['order_total'].mean()),
-                "status_distribution": orders['status'].value_counts().to_dict()
-            }
-        }
-        
         # Create prompt for question answering
         qa_template = """
         You are a data analyst for TechCorp e-commerce company. Answer the following business question 
@@ -312,7 +299,7 @@ def answer_business_question(question, customers, products, orders, order_items)
         
         result = chain.invoke({
             "question": question,
-            "data_context": json.dumps(data_context, indent=2, default=str)
+            "data_context": data_context
         })
         
         return result.content
@@ -320,17 +307,8 @@ def answer_business_question(question, customers, products, orders, order_items)
     except Exception as e:
         return f"Error answering question: {str(e)}"
 
-def create_category_analysis(products, order_items):
+def create_category_analysis(category_sales):
     """Analyze product categories"""
-    # Use final_category (cleaned) for analysis
-    category_sales = order_items.merge(
-        products[['product_id', 'final_category']], 
-        on='product_id'
-    ).groupby('final_category').agg({
-        'quantity': 'sum',
-        'total_amount': 'sum'
-    }).reset_index()
-    
     fig = px.scatter(
         category_sales,
         x='quantity',
@@ -345,17 +323,25 @@ def create_category_analysis(products, order_items):
     
     return fig
 
+def create_histogram_chart(histogram, column, title):
+    """Bar chart of pre-binned counts (bin_start, bin_end, count)"""
+    fig = px.bar(
+        x=(histogram['bin_start'] + histogram['bin_end']) / 2,
+        y=histogram['count'],
+        title=title,
+        labels={'x': column, 'y': 'count'}
+    )
+    fig.update_layout(bargap=0)
+    
+    return fig
+
 
 def main():
     # Header
     st.markdown('<h1 class="main-header">🚀 TechCorp Data Analytics Dashboard</h1>', unsafe_allow_html=True)
     st.markdown("### AI-Powered Business Intelligence from Unified E-Commerce Data")
     
-    # Load data
-    with st.spinner("Loading data from cleaned database..."):
-        customers, products, orders, order_items, suppliers = load_data()
-    
-    if customers is None:
+    if not os.path.exists(DB_PATH):
         st.error("Unable to load data. Please ensure the database file exists.")
         return
     
@@ -376,7 +362,7 @@ def main():
         st.markdown('<h2 class="sub-header">Executive Dashboard</h2>', unsafe_allow_html=True)
         
         # Calculate metrics
-        metrics = create_business_metrics(customers, orders, order_items, products)
+        metrics = run_query('business_metrics')
         
         # Key metrics row
         col1, col2, col3, col4 = st.columns(4)
@@ -413,11 +399,11 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_segments = create_customer_segmentation_chart(customers)
+            fig_segments = create_customer_segmentation_chart(run_query('customer_counts', 'segment'))
             st.plotly_chart(fig_segments, use_container_width=True)
         
         with col2:
-            fig_revenue = create_revenue_trend_chart(orders)
+            fig_revenue = create_revenue_trend_chart(run_query('monthly_revenue'))
             st.plotly_chart(fig_revenue, use_container_width=True)
     
     elif page == "👥 Customer Analytics":
@@ -427,45 +413,63 @@ def main():
         
         with col1:
             # Customer status distribution
-            status_counts = customers['status'].value_counts()
+            status_counts = run_query('customer_counts', 'status')
             fig_status = px.bar(
-                x=status_counts.index,
-                y=status_counts.values,
+                x=status_counts['status'],
+                y=status_counts['count'],
                 title="Customer Status Distribution",
                 labels={'x': 'Status', 'y': 'Count'}
             )
             st.plotly_chart(fig_status, use_container_width=True)
         
         with col2:
-            # Customer segments by total spent
-            fig_segment_spend = px.box(
-                customers,
-                x='segment',
-                y='total_spent',
-                title="Spending Distribution by Customer Segment"
+            # Customer segments by total spent (quartiles and whiskers computed per segment by the query)
+            spending = run_query('segment_spending')
+            fig_segment_spend = go.Figure(go.Box(
+                x=spending['segment'],
+                q1=spending['q1'],
+                median=spending['median'],
+                q3=spending['q3'],
+                lowerfence=spending['lowerfence'],
+                upperfence=spending['upperfence'],
+                name='total_spent'
+            ))
+            # Only the most extreme customer beyond each whisker is known; mark it
+            low = spending[spending['min'] < spending['lowerfence']]
+            high = spending[spending['max'] > spending['upperfence']]
+            if len(low) or len(high):
+                fig_segment_spend.add_trace(go.Scatter(
+                    x=list(low['segment']) + list(high['segment']),
+                    y=list(low['min']) + list(high['max']),
+                    mode='markers',
+                    name='min/max outlier'
+                ))
+            fig_segment_spend.update_layout(
+                title="Spending Distribution by Customer Segment",
+                xaxis_title='segment',
+                yaxis_title='total_spent'
             )
             st.plotly_chart(fig_segment_spend, use_container_width=True)
         
         # Customer geographic distribution
-        if 'state' in customers.columns:
-            state_counts = customers['state'].value_counts().head(10)
-            fig_geo = px.bar(
-                x=state_counts.values,
-                y=state_counts.index,
-                orientation='h',
-                title="Top 10 States by Customer Count"
-            )
-            st.plotly_chart(fig_geo, use_container_width=True)
+        state_counts = run_query('customer_counts', 'state', 10)
+        fig_geo = px.bar(
+            x=state_counts['count'],
+            y=state_counts['state'],
+            orientation='h',
+            title="Top 10 States by Customer Count"
+        )
+        st.plotly_chart(fig_geo, use_container_width=True)
     
     elif page == "📦 Product Analytics":
         st.markdown('<h2 class="sub-header">Product Analytics</h2>', unsafe_allow_html=True)
         
         # Product performance chart
-        fig_products = create_product_performance_chart(products, order_items)
+        fig_products = create_product_performance_chart(run_query('top_products', 10))
         st.plotly_chart(fig_products, use_container_width=True)
         
         # Category analysis
-        fig_categories = create_category_analysis(products, order_items)
+        fig_categories = create_category_analysis(run_query('category_sales'))
         st.plotly_chart(fig_categories, use_container_width=True)
         
         # Product inventory analysis
@@ -473,28 +477,26 @@ def main():
         
         with col1:
             # Stock levels
-            fig_stock = px.histogram(
-                products,
-                x='stock_quantity',
-                title="Product Stock Distribution",
-                nbins=20
+            fig_stock = create_histogram_chart(
+                run_query('histogram', 'products', 'stock_quantity', 20),
+                'stock_quantity',
+                "Product Stock Distribution"
             )
             st.plotly_chart(fig_stock, use_container_width=True)
         
         with col2:
             # Price distribution
-            fig_price = px.histogram(
-                products,
-                x='price',
-                title="Product Price Distribution",
-                nbins=20
+            fig_price = create_histogram_chart(
+                run_query('histogram', 'products', 'price', 20),
+                'price',
+                "Product Price Distribution"
             )
             st.plotly_chart(fig_price, use_container_width=True)
     
     elif page == "🔍 Data Quality Report":
         st.markdown('<h2 class="sub-header">Data Quality Assessment</h2>', unsafe_allow_html=True)
         
-        quality_metrics = create_data_quality_metrics(customers, products, orders)
+        quality_metrics = run_query('data_quality_metrics')
         
         # Data completeness section
         st.subheader("📋 Data Completeness Analysis")
@@ -535,10 +537,13 @@ def main():
     elif page == "🤖 AI Insights":
         st.markdown('<h2 class="sub-header">AI-Generated Business Insights</h2>', unsafe_allow_html=True)
         
+        # Compact summaries of the data, not the tables, are sent to the AI (and key its cache)
+        business_summary, data_context = ai_context()
+        
         # Generate AI insights button
         if st.button("🧠 Generate Fresh AI Insights", type="primary"):
             with st.spinner("🤖 AI is analyzing your business data..."):
-                ai_insights = generate_business_insights(customers, products, orders, order_items)
+                ai_insights = generate_business_insights(business_summary)
                 st.session_state.ai_insights = ai_insights
         
         # Display AI insights
@@ -586,7 +591,7 @@ def main():
             
         if question_to_ask:
             with st.spinner(f"🤖 AI is analyzing: {question_to_ask}"):
-                ai_answer = answer_business_question(question_to_ask, customers, products, orders, order_items)
+                ai_answer = answer_business_question(question_to_ask, data_context)
                 st.markdown("### 🎯 AI Response:")
                 st.info(ai_answer)
         
@@ -598,24 +603,12 @@ def main():
         st.markdown('<h2 class="sub-header">Raw Data Explorer</h2>', unsafe_allow_html=True)
         
         # Table selector
-        table_choice = st.selectbox("Select table to explore:", 
-                                   ["Customers", "Products", "Orders", "Order Items", "Suppliers"])
-        
-        if table_choice == "Customers":
-            st.subheader(f"Customers Data ({len(customers)} records)")
-            st.dataframe(customers, use_container_width=True)
-        elif table_choice == "Products":
-            st.subheader(f"Products Data ({len(products)} records)")
-            st.dataframe(products, use_container_width=True)
-        elif table_choice == "Orders":
-            st.subheader(f"Orders Data ({len(orders)} records)")
-            st.dataframe(orders, use_container_width=True)
-        elif table_choice == "Order Items":
-            st.subheader(f"Order Items Data ({len(order_items)} records)")
-            st.dataframe(order_items, use_container_width=True)
-        elif table_choice == "Suppliers":
-            st.subheader(f"Suppliers Data ({len(suppliers)} records)")
-            st.dataframe(suppliers, use_container_width=True)
+        tables = {"Customers": 'customers', "Products": 'products', "Orders": 'orders',
+                  "Order Items": 'order_items', "Suppliers": 'suppliers'}
+        table_choice = st.selectbox("Select table to explore:", list(tables))
+        
+        st.subheader(f"{table_choice} Data")
+        render_table_explorer(tables[table_choice])
 
 if __name__ == "__main__":
     main()
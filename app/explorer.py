@@ -0,0 +1,145 @@
+import pandas as pd
+
+from queries import TABLES
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+
+# Column filters pushed into the WHERE clause: the SQL for a quoted column
+# and, for operators that take a value, how the user's text is bound. Bound
+# text compares numerically against INTEGER/REAL columns (SQLite applies the
+# column's affinity), so the same operators serve every column.
+FILTER_OPERATORS = {
+    'contains': {'sql': "{column} LIKE ? ESCAPE '\\'",
+                 'param': lambda value: '%' + value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'},
+    'equals': {'sql': "{column} = ?", 'param': str},
+    'at least': {'sql': "{column} >= ?", 'param': str},
+    'at most': {'sql': "{column} <= ?", 'param': str},
+    'is empty': {'sql': "{column} IS NULL"},
+    'is not empty': {'sql': "{column} IS NOT NULL"},
+}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def table_columns(conn, table):
+    """Column names of `table` in schema order; `table` must be one of TABLES."""
+    if table not in TABLES:
+        raise ValueError(f"Unsupported table: {table}")
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def sortable_columns(conn, table):
+    """
+    Columns a page can be sorted by without sorting the whole table: the
+    INTEGER PRIMARY KEY (the rowid itself) and the leading column of every
+    index. Any other order would make each page a full scan.
+    """
+    info = list(conn.execute(f"PRAGMA table_info({table})"))
+    keys = [row for row in info if row[5]]
+    columns = [keys[0][1]] if len(keys) == 1 and keys[0][2].upper() == 'INTEGER' else []
+    for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        first = conn.execute(f"PRAGMA index_info({_quote(index[1])})").fetchone()
+        # Expression indexes have no column name
+        if first and first[2] and first[2] not in columns:
+            columns.append(first[2])
+    return [column for column in table_columns(conn, table) if column in columns]
+
+
+class TablePager:
+    """
+    Pages of one table, filtered and ordered in SQLite, fetched with keyset
+    pagination: a page starts right after (or ends right before) the
+    (sort value, rowid) of a row of the neighbouring page, so SQLite seeks
+    to it through the sort column's index instead of stepping over every
+    earlier row as OFFSET does. Page flips cost the same at any depth.
+    """
+
+    def __init__(self, conn, table, sort=None, descending=False, filters=(), page_size=DEFAULT_PAGE_SIZE,
+                 cache=None):
+        self.conn = conn
+        self.cache = cache
+        self.table = table
+        self.columns = table_columns(conn, table)
+        if sort is not None and sort not in self.columns:
+            raise ValueError(f"Unsupported sort column: {table}.{sort}")
+        self.sort = sort
+        self.descending = descending
+        self.page_size = page_size
+        self.where, self.params = self._filter_clause(filters)
+
+    def _filter_clause(self, filters):
+        """WHERE conditions and parameters of (column, operator, value) filters."""
+        conditions, params = [], []
+        for column, operator, value in filters:
+            if column not in self.columns or operator not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter: {column} {operator}")
+            spec = FILTER_OPERATORS[operator]
+            conditions.append(spec['sql'].format(column=_quote(column)))
+            if 'param' in spec:
+                params.append(spec['param'](value))
+        return conditions, params
+
+    def count(self):
+        """Rows matching the filters: a full COUNT(*), looked up in the `cache` (connections.QueryCache) first."""
+        where = f"WHERE {' AND '.join(self.where)}" if self.where else ''
+        sql = f"SELECT COUNT(*) FROM {self.table} {where}"
+        compute = lambda: self.conn.execute(sql, self.params).fetchone()[0]
+        return compute() if self.cache is None else self.cache.get(sql, self.params, compute)
+
+    def _segments(self, cursor, greater):
+        """
+        Conditions selecting the rows after (`greater`) or before `cursor` in
+        ascending (sort, rowid) order, where SQLite sorts NULL first. Rows
+        on both sides of the NULL boundary come from separate conditions, in
+        the order they are read, as an OR of them could not seek the index.
+        """
+        if cursor is None:
+            return [('', [])]
+        value, rowid = cursor
+        op = '>' if greater else '<'
+        if self.sort is None:
+            return [(f"rowid {op} ?", [rowid])]
+        column = _quote(self.sort)
+        if value is None:
+            nulls = (f"{column} IS NULL AND rowid {op} ?", [rowid])
+            return [nulls, (f"{column} IS NOT NULL", [])] if greater else [nulls]
+        values = (f"({column}, rowid) {op} (?, ?)", [value, rowid])
+        return [values] if greater else [values, (f"{column} IS NULL", [])]
+
+    def page(self, after=None, before=None, from_end=False, limit=None):
+        """
+        (rows, first cursor, last cursor) of the page starting right after
+        cursor `after`, ending right before cursor `before`, ending at the
+        last row (`from_end`), or else the first page. Cursors are
+        (sort value, rowid) pairs; `limit` defaults to the page size.
+        """
+        backwards = before is not None or from_end
+        ascending = self.descending == backwards
+        direction = 'ASC' if ascending else 'DESC'
+        order = f"{_quote(self.sort)} {direction}, rowid {direction}" if self.sort else f"rowid {direction}"
+        limit = limit or self.page_size
+
+        rows, description = [], None
+        for condition, bound_params in self._segments(before if backwards else after, greater=ascending):
+            conditions = self.where + ([condition] if condition else [])
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            result = self.conn.execute(
+                f"SELECT rowid, * FROM {self.table} {where} ORDER BY {order} LIMIT ?",
+                self.params + bound_params + [limit - len(rows)],
+            )
+            rows.extend(result.fetchall())
+            description = result.description
+            if len(rows) == limit:
+                break
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return pd.DataFrame(columns=self.columns), None, None
+
+        sort_position = self.columns.index(self.sort) + 1 if self.sort else None
+        cursors = [(row[sort_position] if sort_position else None, row[0]) for row in (rows[0], rows[-1])]
+        frame = pd.DataFrame([row[1:] for row in rows], columns=[d[0] for d in description[1:]])
+        return frame, cursors[0], cursors[1]
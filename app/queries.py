@@ -0,0 +1,559 @@
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from db.rollups import rollups_available
+
+TABLES = ['customers', 'products', 'orders', 'order_items', 'suppliers']
+
+# Identifiers the parameterised queries below accept
+CUSTOMER_COUNT_COLUMNS = ['segment', 'status', 'state']
+HISTOGRAM_COLUMNS = {'products': ['stock_quantity', 'price']}
+
+# Box plot statistics: quartiles interpolated linearly between ranks (as
+# numpy and plotly do), whiskers at the furthest values within 1.5 IQR
+BOX_QUARTILES = {'q1': 0.25, 'median': 0.5, 'q3': 0.75}
+BOX_WHISKER_IQR = 1.5
+BOX_COLUMNS = ['segment', 'customer_count', 'min', 'lowerfence', 'q1', 'median', 'q3', 'upperfence', 'max']
+
+
+
+def load_frames(conn):
+    """Load every table in full (the original dashboard data path)."""
+    return tuple(pd.read_sql_query(f"SELECT * FROM {table}", conn) for table in TABLES)
+
+
+class SqlQueries:
+    """
+    Dashboard datasets computed with GROUP BY in SQLite; only the aggregates
+    are returned. With a `cache` (connections.QueryCache), every statement's
+    result is looked up by its SQL text and parameters first.
+    """
+
+    def __init__(self, conn, cache=None):
+        self.conn = conn
+        self.cache = cache
+
+    def _cached(self, sql, params, compute):
+        return compute() if self.cache is None else self.cache.get(sql, params, compute)
+
+    def _frame(self, sql, params=()):
+        return self._cached(sql, params, lambda: pd.read_sql_query(sql, self.conn, params=params))
+
+    def _row(self, sql, params=()):
+        return self._cached(sql, params, lambda: self.conn.execute(sql, params).fetchone())
+
+    def _rows(self, sql, params=()):
+        return self._cached(sql, params, lambda: self.conn.execute(sql, params).fetchall())
+
+    def _scalar(self, sql, params=()):
+        return self._row(sql, params)[0]
+
+    def business_metrics(self):
+        total_customers, active_customers = self._row(
+            "SELECT COUNT(*), SUM(status = 'active') FROM customers"
+        )
+        total_orders, total_revenue, avg_order_value = self._row(
+            "SELECT COUNT(*), COALESCE(SUM(order_total), 0), AVG(order_total) FROM orders"
+        )
+        total_products, active_products = self._row(
+            "SELECT COUNT(*), SUM(is_active = 1) FROM products"
+        )
+        return {
+            'total_customers': total_customers,
+            'total_orders': total_orders,
+            'total_revenue': total_revenue,
+            'avg_order_value': avg_order_value,
+            'active_customers': active_customers or 0,
+            'customer_retention_rate': (active_customers or 0) / total_customers * 100,
+            'total_products': total_products,
+            'active_products': active_products or 0,
+        }
+
+    def monthly_revenue(self):
+        return self._frame("""
+            SELECT substr(order_date, 1, 7) AS month, SUM(order_total) AS revenue
+            FROM orders
+            WHERE order_date IS NOT NULL
+            GROUP BY substr(order_date, 1, 7)
+            ORDER BY month
+        """)
+
+    def top_products(self, limit=10):
+        return self._frame("""
+            SELECT s.product_id, s.quantity, s.total_amount,
+                   p.product_name, p.category, p.final_category
+            FROM (
+                SELECT product_id, SUM(quantity) AS quantity, SUM(total_amount) AS total_amount
+                FROM order_items
+                GROUP BY product_id
+                ORDER BY total_amount DESC
+                LIMIT ?
+            ) AS s
+            LEFT JOIN products AS p ON p.product_id = s.product_id
+            ORDER BY s.total_amount DESC
+        """, (limit,))
+
+    def category_sales(self):
+        return self._frame("""
+            SELECT p.final_category, SUM(oi.quantity) AS quantity, SUM(oi.total_amount) AS total_amount,
+                   COUNT(*) AS order_item_count
+            FROM order_items AS oi
+            JOIN products AS p ON p.product_id = oi.product_id
+            WHERE p.final_category IS NOT NULL
+            GROUP BY p.final_category
+            ORDER BY p.final_category
+        """)
+
+    def customer_counts(self, column, limit=None):
+        if column not in CUSTOMER_COUNT_COLUMNS:
+            raise ValueError(f"Unsupported customer column: {column}")
+        return self._frame(f"""
+            SELECT {column}, COUNT(*) AS count
+            FROM customers
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+            ORDER BY count DESC
+            LIMIT ?
+        """, (limit if limit is not None else -1,))
+
+    def segment_spending(self):
+        """
+        Box plot statistics of total_spent per segment (BOX_COLUMNS), one row
+        per segment. Each statistic is a seek or a short ordered scan on
+        idx_customers_segment_spent, so no customer rows leave SQLite.
+        """
+        segments = self._frame("""
+            SELECT segment, COUNT(*) AS customer_count, MIN(total_spent) AS min, MAX(total_spent) AS max
+            FROM customers
+            WHERE segment IS NOT NULL AND total_spent IS NOT NULL
+            GROUP BY segment
+            ORDER BY segment
+        """)
+        rows = []
+        for segment, customer_count, low, high in segments.itertuples(index=False):
+            quartiles = []
+            for share in BOX_QUARTILES.values():
+                position = (customer_count - 1) * share
+                below = int(position)
+                values = [value for value, in self._rows("""
+                    SELECT total_spent FROM customers
+                    WHERE segment = ? AND total_spent IS NOT NULL
+                    ORDER BY total_spent
+                    LIMIT 2 OFFSET ?
+                """, (segment, below))]
+                quartiles.append(values[0] + (values[-1] - values[0]) * (position - below))
+            q1, median, q3 = quartiles
+            reach = BOX_WHISKER_IQR * (q3 - q1)
+            lowerfence = self._scalar(
+                "SELECT MIN(total_spent) FROM customers WHERE segment = ? AND total_spent >= ?", (segment, q1 - reach)
+            )
+            upperfence = self._scalar(
+                "SELECT MAX(total_spent) FROM customers WHERE segment = ? AND total_spent <= ?", (segment, q3 + reach)
+            )
+            rows.append([segment, customer_count, low, lowerfence, q1, median, q3, upperfence, high])
+        return pd.DataFrame(rows, columns=BOX_COLUMNS)
+
+    def customer_averages(self):
+        avg_spent, avg_orders = self._row("SELECT AVG(total_spent), AVG(total_orders) FROM customers")
+        by_segment = self._frame("""
+            SELECT segment, AVG(total_spent) AS avg_spent
+            FROM customers
+            WHERE segment IS NOT NULL
+            GROUP BY segment
+            ORDER BY segment
+        """)
+        return {
+            'avg_spent': avg_spent,
+            'avg_orders': avg_orders,
+            'avg_spent_by_segment': dict(zip(by_segment['segment'], by_segment['avg_spent'])),
+        }
+
+    def order_status_counts(self):
+        return self._frame("""
+            SELECT status, COUNT(*) AS count
+            FROM orders
+            WHERE status IS NOT NULL
+            GROUP BY status
+            ORDER BY count DESC
+        """)
+
+    def product_category_counts(self):
+        return self._frame("""
+            SELECT final_category, COUNT(*) AS count
+            FROM products
+            WHERE final_category IS NOT NULL
+            GROUP BY final_category
+            ORDER BY count DESC
+        """)
+
+    def inventory_metrics(self):
+        total_products, inactive_products, low_stock_products, avg_price = self._row("""
+            SELECT COUNT(*), COALESCE(SUM(is_active = 0), 0),
+                   COALESCE(SUM(stock_quantity < reorder_level), 0), AVG(price)
+            FROM products
+        """)
+        return {
+            'total_products': total_products,
+            'inactive_products': inactive_products,
+            'low_stock_products': low_stock_products,
+            'avg_price': avg_price,
+        }
+
+    def histogram(self, table, column, bins=20):
+        if column not in HISTOGRAM_COLUMNS.get(table, []):
+            raise ValueError(f"Unsupported histogram column: {table}.{column}")
+        low, high = self._row(f"SELECT MIN({column}), MAX({column}) FROM {table}")
+        if low is None:
+            return pd.DataFrame(columns=['bin_start', 'bin_end', 'count'])
+        width = (high - low) / bins or 1
+        counts = self._frame(f"""
+            SELECT MIN(CAST(({column} - ?) / ? AS INTEGER), ? - 1) AS bin, COUNT(*) AS count
+            FROM {table}
+            WHERE {column} IS NOT NULL
+            GROUP BY bin
+        """, (low, width, bins))
+        return _histogram_frame(low, width, bins, counts.set_index('bin')['count'])
+
+    def data_quality_metrics(self):
+        customers = self._row(
+            "SELECT COUNT(*), COUNT(email), COUNT(phone), COUNT(address) FROM customers"
+        )
+        products = self._row("""
+            SELECT COUNT(*), COUNT(description), COUNT(final_category), COUNT(brand),
+                   COALESCE(SUM(category_mismatch), 0), COALESCE(SUM(is_active_flag_issue), 0)
+            FROM products
+        """)
+        return {
+            'customer_completeness': {
+                'email': customers[1] / customers[0] * 100,
+                'phone': customers[2] / customers[0] * 100,
+                'address': customers[3] / customers[0] * 100,
+            },
+            'product_completeness': {
+                'description': products[1] / products[0] * 100,
+                'category': products[2] / products[0] * 100,
+                'brand': products[3] / products[0] * 100,
+            },
+            'category_mismatches': products[4],
+            'active_flag_issues': products[5],
+        }
+
+
+class RollupQueries(SqlQueries):
+    """
+    SqlQueries that read the summary tables maintained by the loader
+    (db/rollups.py), so each dataset costs O(groups) instead of O(rows).
+    """
+
+    def _dimension(self, dimension, value):
+        row = self._row(
+            "SELECT customer_count FROM agg_customer_dims WHERE dimension = ? AND value = ?",
+            (dimension, value),
+        )
+        return row[0] if row else 0
+
+    def business_metrics(self):
+        total_customers = self._dimension('all', 'all')
+        active_customers = self._dimension('status', 'active')
+        total_orders, total_revenue, revenue_count = self._row(
+            "SELECT COALESCE(SUM(order_count), 0), COALESCE(SUM(revenue), 0), SUM(revenue_count) FROM agg_order_status"
+        )
+        total_products, active_products = self._row(
+            "SELECT total_products, active_products FROM agg_product_stats"
+        ) or (0, 0)
+        return {
+            'total_customers': total_customers,
+            'total_orders': total_orders,
+            'total_revenue': total_revenue,
+            'avg_order_value': total_revenue / revenue_count if revenue_count else None,
+            'active_customers': active_customers,
+            'customer_retention_rate': active_customers / total_customers * 100,
+            'total_products': total_products,
+            'active_products': active_products,
+        }
+
+    def monthly_revenue(self):
+        return self._frame("SELECT month, revenue FROM agg_monthly_revenue ORDER BY month")
+
+    def top_products(self, limit=10):
+        return self._frame("""
+            SELECT s.product_id, s.quantity, s.total_amount,
+                   p.product_name, p.category, p.final_category
+            FROM (
+                SELECT product_id, quantity, total_amount
+                FROM agg_product_sales
+                ORDER BY total_amount DESC
+                LIMIT ?
+            ) AS s
+            LEFT JOIN products AS p ON p.product_id = s.product_id
+            ORDER BY s.total_amount DESC
+        """, (limit,))
+
+    def category_sales(self):
+        return self._frame(
+            "SELECT final_category, quantity, total_amount, order_item_count FROM agg_category_sales ORDER BY final_category"
+        )
+
+    def customer_counts(self, column, limit=None):
+        if column not in CUSTOMER_COUNT_COLUMNS:
+            raise ValueError(f"Unsupported customer column: {column}")
+        return self._frame(f"""
+            SELECT value AS {column}, customer_count AS count
+            FROM agg_customer_dims
+            WHERE dimension = ?
+            ORDER BY count DESC
+            LIMIT ?
+        """, (column, limit if limit is not None else -1))
+
+    def customer_averages(self):
+        averages = self._frame("""
+            SELECT dimension, value,
+                   total_spent_sum / total_spent_count AS avg_spent,
+                   total_orders_sum / total_orders_count AS avg_orders
+            FROM agg_customer_dims
+            WHERE dimension IN ('all', 'segment')
+            ORDER BY dimension, value
+        """)
+        overall = averages[averages['dimension'] == 'all']
+        by_segment = averages[averages['dimension'] == 'segment']
+        return {
+            'avg_spent': overall['avg_spent'].iloc[0] if len(overall) else None,
+            'avg_orders': overall['avg_orders'].iloc[0] if len(overall) else None,
+            'avg_spent_by_segment': dict(zip(by_segment['value'], by_segment['avg_spent'])),
+        }
+
+    def order_status_counts(self):
+        return self._frame("""
+            SELECT status, order_count AS count
+            FROM agg_order_status
+            WHERE status != ''
+            ORDER BY count DESC
+        """)
+
+    def inventory_metrics(self):
+        total_products, inactive_products, low_stock_products, price_sum, price_count = self._row(
+            "SELECT total_products, inactive_products, low_stock_products, price_sum, price_count FROM agg_product_stats"
+        ) or (0, 0, 0, None, 0)
+        return {
+            'total_products': total_products,
+            'inactive_products': inactive_products,
+            'low_stock_products': low_stock_products,
+            'avg_price': price_sum / price_count if price_count else None,
+        }
+
+
+class FrameQueries:
+    """The same datasets computed with pandas from fully loaded tables (fallback path)."""
+
+    def __init__(self, customers, products, orders, order_items):
+        self.customers = customers
+        self.products = products
+        self.orders = orders
+        self.order_items = order_items
+
+    def business_metrics(self):
+        customers, orders, products = self.customers, self.orders, self.products
+        total_customers = len(customers)
+        active_customers = len(customers[customers['status'] == 'active'])
+        return {
+            'total_customers': total_customers,
+            'total_orders': len(orders),
+            'total_revenue': orders['order_total'].sum(),
+            'avg_order_value': orders['order_total'].mean(),
+            'active_customers': active_customers,
+            'customer_retention_rate': (active_customers / total_customers) * 100,
+            'total_products': len(products),
+            'active_products': len(products[products['is_active'] == True]),
+        }
+
+    def monthly_revenue(self):
+        order_month = pd.to_datetime(self.orders['order_date'], errors='coerce').dt.to_period('M')
+        monthly = self.orders.groupby(order_month)['order_total'].sum()
+        return pd.DataFrame({'month': monthly.index.astype(str), 'revenue': monthly.values})
+
+    def top_products(self, limit=10):
+        product_sales = self.order_items.groupby('product_id', observed=True).agg({
+            'quantity': 'sum',
+            'total_amount': 'sum'
+        }).reset_index()
+        product_perf = product_sales.merge(
+            self.products[['product_id', 'product_name', 'category', 'final_category']],
+            on='product_id',
+            how='left'
+        )
+        return product_perf.nlargest(limit, 'total_amount')
+
+    def category_sales(self):
+        return self.order_items.merge(
+            self.products[['product_id', 'final_category']],
+            on='product_id'
+        ).groupby('final_category', observed=True).agg(
+            quantity=('quantity', 'sum'),
+            total_amount=('total_amount', 'sum'),
+            order_item_count=('quantity', 'size'),
+        ).reset_index()
+
+    def customer_counts(self, column, limit=None):
+        counts = self.customers[column].value_counts()
+        if limit is not None:
+            counts = counts.head(limit)
+        return pd.DataFrame({column: counts.index, 'count': counts.values})
+
+    def segment_spending(self):
+        spent = self.customers[['segment', 'total_spent']].dropna()
+        rows = []
+        for segment, values in spent.groupby('segment', observed=True)['total_spent']:
+            q1, median, q3 = values.quantile(list(BOX_QUARTILES.values()))
+            reach = BOX_WHISKER_IQR * (q3 - q1)
+            rows.append([segment, len(values), values.min(), values[values >= q1 - reach].min(),
+                         q1, median, q3, values[values <= q3 + reach].max(), values.max()])
+        return pd.DataFrame(rows, columns=BOX_COLUMNS).sort_values('segment', ignore_index=True)
+
+    def customer_averages(self):
+        customers = self.customers
+        return {
+            'avg_spent': customers['total_spent'].mean(),
+            'avg_orders': customers['total_orders'].mean(),
+            'avg_spent_by_segment': customers.groupby('segment', observed=True)['total_spent'].mean().to_dict(),
+        }
+
+    def order_status_counts(self):
+        counts = self.orders['status'].value_counts()
+        return pd.DataFrame({'status': counts.index, 'count': counts.values})
+
+    def product_category_counts(self):
+        counts = self.products['final_category'].value_counts()
+        return pd.DataFrame({'final_category': counts.index, 'count': counts.values})
+
+    def inventory_metrics(self):
+        products = self.products
+        return {
+            'total_products': len(products),
+            'inactive_products': len(products[products['is_active'] == False]),
+            'low_stock_products': len(products[products['stock_quantity'] < products['reorder_level']]),
+            'avg_price': products['price'].mean(),
+        }
+
+    def histogram(self, table, column, bins=20):
+        values = getattr(self, table)[column].dropna().astype(np.float64)
+        if values.empty:
+            return pd.DataFrame(columns=['bin_start', 'bin_end', 'count'])
+        low, high = values.min(), values.max()
+        width = (high - low) / bins or 1
+        bin_index = np.minimum(((values - low) / width).astype(int), bins - 1)
+        return _histogram_frame(low, width, bins, bin_index.value_counts())
+
+    def data_quality_metrics(self):
+        customers, products = self.customers, self.products
+        return {
+            'customer_completeness': {
+                'email': customers['email'].notna().sum() / len(customers) * 100,
+                'phone': customers['phone'].notna().sum() / len(customers) * 100,
+                'address': customers['address'].notna().sum() / len(customers) * 100,
+            },
+            'product_completeness': {
+                'description': products['description'].notna().sum() / len(products) * 100,
+                'category': products['final_category'].notna().sum() / len(products) * 100,
+                'brand': products['brand'].notna().sum() / len(products) * 100,
+            },
+            'category_mismatches': products['category_mismatch'].sum() if 'category_mismatch' in products.columns else 0,
+            'active_flag_issues': products['is_active_flag_issue'].sum() if 'is_active_flag_issue' in products.columns else 0,
+        }
+
+
+def _histogram_frame(low, width, bins, counts):
+    """Equal-width bins from `low` with the counts per bin index filled in."""
+    edges = low + width * np.arange(bins + 1)
+    return pd.DataFrame({
+        'bin_start': edges[:-1],
+        'bin_end': edges[1:],
+        'count': counts.reindex(range(bins), fill_value=0).to_numpy(),
+    })
+
+
+def _counts(frame, column, limit=None):
+    """{value: count} of a (column, count) dataset as plain Python values, for the AI prompts."""
+    frame = frame if limit is None else frame.head(limit)
+    return {str(value): int(count) for value, count in zip(frame[column], frame['count'])}
+
+
+def _number(value):
+    return None if value is None or pd.isna(value) else float(value)
+
+
+def ai_summaries(queries):
+    """
+    The business summary and question-answering context sent with the AI
+    Insights prompts, built from the datasets of `queries` (SqlQueries,
+    RollupQueries or FrameQueries). Both are small dicts of plain values, so
+    they serialize to a few kilobytes whatever the size of the tables.
+    """
+    metrics = queries.business_metrics()
+    averages = queries.customer_averages()
+    inventory = queries.inventory_metrics()
+    segments = _counts(queries.customer_counts('segment'), 'segment')
+    statuses = _counts(queries.customer_counts('status'), 'status')
+    categories = queries.category_sales().sort_values('order_item_count', ascending=False, kind='stable').head(5)
+    monthly = queries.monthly_revenue().tail(6)
+    top_products = queries.top_products(5)
+    avg_spent_by_segment = {str(k): _number(v) for k, v in averages['avg_spent_by_segment'].items()}
+
+    business_summary = {
+        'total_customers': int(metrics['total_customers']),
+        'total_orders': int(metrics['total_orders']),
+        'total_revenue': _number(metrics['total_revenue']),
+        'avg_order_value': _number(metrics['avg_order_value']),
+        'customer_segments': segments,
+        'customer_status': statuses,
+        'top_categories': {str(k): int(v) for k, v in zip(categories['final_category'], categories['order_item_count'])},
+        'monthly_revenue_trend': {str(k): float(v) for k, v in zip(monthly['month'], monthly['revenue'])},
+        'customer_lifetime_value': avg_spent_by_segment,
+        'product_performance': {str(k): float(v) for k, v in zip(top_products['product_id'], top_products['total_amount'])},
+        'geographic_distribution': _counts(queries.customer_counts('state', 5), 'state'),
+        'inventory_alerts': {
+            'low_stock_products': int(inventory['low_stock_products']),
+            'inactive_products': int(inventory['inactive_products']),
+            'total_products': int(inventory['total_products']),
+        },
+    }
+    question_context = {
+        'customers_summary': {
+            'total': int(metrics['total_customers']),
+            'by_segment': segments,
+            'by_status': statuses,
+            'avg_spent': _number(averages['avg_spent']),
+            'avg_orders': _number(averages['avg_orders']),
+        },
+        'products_summary': {
+            'total': int(inventory['total_products']),
+            'categories': _counts(queries.product_category_counts(), 'final_category'),
+            'avg_price': _number(inventory['avg_price']),
+            'low_stock_count': int(inventory['low_stock_products']),
+        },
+        'orders_summary': {
+            'total': int(metrics['total_orders']),
+            'total_revenue': _number(metrics['total_revenue']),
+            'avg_order_value': _number(metrics['avg_order_value']),
+            'status_distribution': _counts(queries.order_status_counts(), 'status'),
+        },
+    }
+    return business_summary, question_context
+
+
+def sql_queries_available(conn):
+    """True when every dashboard table exists in the database behind `conn`."""
+    try:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    except sqlite3.Error:
+        return False
+    return all(table in names for table in TABLES)
+
+
+def sql_queries(conn, cache=None):
+    """RollupQueries when the loader has built the rollup tables, SqlQueries otherwise."""
+    return RollupQueries(conn, cache) if rollups_available(conn) else SqlQueries(conn, cache)
@@ -0,0 +1,124 @@
+"""
+Benchmark the column-wise customer merge against the row-wise _merge_* helpers.
+
+Usage:
+    python benchmarks/bench_customer_merge.py [--sizes 10000 1000000 10000000]
+
+First, every pair of a few constructed values (missing as None and NaN, blank
+and whitespace strings, equal-length strings, with and without '@' or a space,
+and numbers) is merged both ways and checked for equality, since the sample
+file does not contain all of these combinations. Then the sample customers
+file is tiled up to each size and timed. Sizes up to --legacy-max-rows also
+run the row-wise helpers and check their result against CUSTOMER_MERGE_RULES.
+Larger sizes only time the vectorized path, because the row-wise apply takes
+many minutes there.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from cleaners.clean_customers import (
+    CUSTOMER_MERGE_RULES,
+    _merge_names, _merge_emails, _merge_phones,
+    _merge_zip_codes, _merge_dates, _merge_status,
+)
+from utils.column_merge import merge_column_pair
+
+LEGACY_HELPERS = {
+    'customer_name': _merge_names,
+    'email': _merge_emails,
+    'phone': _merge_phones,
+    'zip_code': _merge_zip_codes,
+    'registration_date': _merge_dates,
+    'status': _merge_status,
+}
+
+# Values paired with each other in every merged column pair
+EDGE_VALUES = [None, np.nan, '', '   ', 'ab', 'cd', 'a b', 'x@y.com', 'y@z.io', '12345-6789', 12345, 98765, 1.5]
+
+
+def edge_cases():
+    """Every (target, source) combination of EDGE_VALUES, for each merged column pair."""
+    pairs = list(itertools.product(EDGE_VALUES, repeat=2))
+    columns = {}
+    for rule in CUSTOMER_MERGE_RULES:
+        columns[rule['target']] = pd.Series([target for target, _ in pairs], dtype=object)
+        columns[rule['source']] = pd.Series([source for _, source in pairs], dtype=object)
+    return pd.DataFrame(columns)
+
+
+def load_sample(n_rows):
+    file_path = os.path.join(os.path.dirname(__file__), '..', 'Data', 'customers_messy_data.json')
+    df = pd.read_json(file_path)
+    reps = int(np.ceil(n_rows / len(df)))
+    return pd.concat([df] * reps, ignore_index=True).iloc[:n_rows]
+
+
+def merge_legacy(df):
+    return {
+        rule['target']: df.apply(
+            lambda row, helper=LEGACY_HELPERS[rule['target']], rule=rule:
+                helper(row[rule['target']], row[rule['source']]),
+            axis=1,
+        )
+        for rule in CUSTOMER_MERGE_RULES
+    }
+
+
+def merge_vectorized(df):
+    return {
+        rule['target']: merge_column_pair(
+            df, rule['target'], rule['source'], rule['prefer_source'],
+            source_transform=rule.get('source_transform'),
+            as_str=rule.get('as_str', False),
+        )
+        for rule in CUSTOMER_MERGE_RULES
+    }
+
+
+def check_equivalent(legacy, vectorized):
+    for col, expected in legacy.items():
+        # None and NaN both mean "missing" to every later cleaning step
+        actual = vectorized[col].astype(object)
+        expected = expected.astype(object)
+        pd.testing.assert_series_equal(
+            actual.where(actual.notna(), None), expected.where(expected.notna(), None),
+            check_names=False,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--legacy-max-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    edges = edge_cases()
+    check_equivalent(merge_legacy(edges), merge_vectorized(edges))
+    print(f"Row-wise and vectorized merges agree on {len(edges)} constructed edge cases\n")
+    print(f"{'rows':>12} {'row-wise (s)':>14} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_rows in args.sizes:
+        df = load_sample(n_rows)
+
+        start = time.perf_counter()
+        vectorized = merge_vectorized(df)
+        vectorized_s = time.perf_counter() - start
+
+        if n_rows <= args.legacy_max_rows:
+            start = time.perf_counter()
+            legacy = merge_legacy(df)
+            legacy_s = time.perf_counter() - start
+            check_equivalent(legacy, vectorized)
+            print(f"{n_rows:>12,} {legacy_s:>14.3f} {vectorized_s:>15.3f} {legacy_s / vectorized_s:>8.1f}x")
+        else:
+            print(f"{n_rows:>12,} {'skipped':>14} {vectorized_s:>15.3f} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Verify and time the dashboard indexes from db/indexes.py.
+
+Usage:
+    python benchmarks/bench_dashboard_indexes.py [--scale 1000] [--repeat 5]
+
+The cleaned datasets are tiled `--scale` times (with unique keys) into a
+temporary database. The script first asserts with EXPLAIN QUERY PLAN that
+every dashboard query uses its index, then times each query with and
+without the indexes.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from db.create_tables import create_tables
+from db.indexes import INDEXES, check_query_plans, create_indexes, drop_indexes, explain_query_plan
+from db.insert_cleaned_data import load_tables, prepare_tables, read_cleaned_data
+
+
+def scaled_tables(scale):
+    customers, products, orders = read_cleaned_data()
+    # Offsetting the ids must not overflow a narrow integer or hit a category
+    # (cleaned files written before utils.memory kept key dtypes)
+    customers = customers.astype({'customer_id': np.int64})
+    products = products.astype({'product_id': str})
+    orders = orders.astype({'order_id': str, 'customer_id': np.int64})
+    copies_customers, copies_products, copies_orders = [], [], []
+    for i in range(scale):
+        c = customers.copy()
+        c['customer_id'] = c['customer_id'] + i * len(customers)
+        copies_customers.append(c)
+        p = products.copy()
+        p['product_id'] = p['product_id'] + f'_{i}'
+        copies_products.append(p)
+        o = orders.copy()
+        o['order_id'] = o['order_id'] + f'_{i}'
+        o['customer_id'] = o['customer_id'] + i * len(customers)
+        copies_orders.append(o)
+    return prepare_tables(
+        pd.concat(copies_customers, ignore_index=True),
+        pd.concat(copies_products, ignore_index=True),
+        pd.concat(copies_orders, ignore_index=True),
+    )
+
+
+def time_query(conn, sql, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'ecommerce.db')
+        create_tables(db_path)
+        load_tables(scaled_tables(args.scale), db_path=db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            plans = check_query_plans(conn)
+            for index in INDEXES:
+                assert plans[index['name']], (
+                    f"{index['name']} not used: {explain_query_plan(conn, index['query'])}"
+                )
+            print("All dashboard queries use their index.\n")
+
+            with_index = {index['name']: time_query(conn, index['query'], args.repeat) for index in INDEXES}
+            drop_indexes(conn)
+            without_index = {index['name']: time_query(conn, index['query'], args.repeat) for index in INDEXES}
+            create_indexes(conn)
+
+        print(f"{'index':<32} {'without (ms)':>13} {'with (ms)':>10} {'speedup':>8}")
+        for index in INDEXES:
+            name = index['name']
+            print(f"{name:<32} {without_index[name] * 1000:>13.1f} {with_index[name] * 1000:>10.1f} "
+                  f"{without_index[name] / with_index[name]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare the dashboard's data paths: rollup tables, SQL aggregation over the
+base tables, and the full-table pandas fallback.
+
+Usage:
+    python benchmarks/bench_dashboard_queries.py [--scale 1000]
+
+For each path it reports time-to-first-chart (the Executive Dashboard
+datasets) and the peak Python memory of the session (tracemalloc),
+then the time of every other dataset.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+from benchmarks.bench_dashboard_indexes import scaled_tables
+from db.create_tables import create_tables
+from db.insert_cleaned_data import load_tables
+from queries import FrameQueries, RollupQueries, SqlQueries, load_frames
+
+FIRST_CHART = [('business_metrics',), ('customer_counts', 'segment'), ('monthly_revenue',)]
+OTHER_DATASETS = [
+    ('customer_counts', 'status'), ('customer_counts', 'state', 10), ('segment_spending',),
+    ('top_products', 10), ('category_sales',),
+    ('histogram', 'products', 'stock_quantity', 20), ('histogram', 'products', 'price', 20),
+    ('data_quality_metrics',),
+]
+
+
+def sql_session(conn):
+    return SqlQueries(conn)
+
+
+def rollup_session(conn):
+    return RollupQueries(conn)
+
+
+def pandas_session(conn):
+    customers, products, orders, order_items, _ = load_frames(conn)
+    return FrameQueries(customers, products, orders, order_items)
+
+
+def measure(conn, make_session):
+    tracemalloc.start()
+    start = time.perf_counter()
+    session = make_session(conn)
+    for name, *args in FIRST_CHART:
+        getattr(session, name)(*args)
+    first_chart_s = time.perf_counter() - start
+
+    timings = {}
+    for name, *args in OTHER_DATASETS:
+        start = time.perf_counter()
+        getattr(session, name)(*args)
+        timings[' '.join(map(str, [name, *args]))] = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_chart_s, peak / 1024 / 1024, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'ecommerce.db')
+        create_tables(db_path)
+        load_tables(scaled_tables(args.scale), db_path=db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            results = {
+                'pandas': measure(conn, pandas_session),
+                'sql': measure(conn, sql_session),
+                'rollup': measure(conn, rollup_session),
+            }
+
+    print(f"\n{'path':<8} {'first chart (s)':>16} {'peak memory (MB)':>17}")
+    for path, (first_chart_s, peak_mb, _) in results.items():
+        print(f"{path:<8} {first_chart_s:>16.3f} {peak_mb:>17.1f}")
+
+    print(f"\n{'dataset':<40} {'pandas (ms)':>12} {'sql (ms)':>10} {'rollup (ms)':>12}")
+    for dataset in results['sql'][2]:
+        print(f"{dataset:<40} {results['pandas'][2][dataset] * 1000:>12.1f} "
+              f"{results['sql'][2][dataset] * 1000:>10.1f} {results['rollup'][2][dataset] * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Many concurrent dashboard sessions: per-session copies vs. the shared connection pool and query cache.
+
+Usage:
+    python benchmarks/bench_dashboard_sessions.py [--scale 100] [--sessions 1 8 32]
+
+Every session (a thread, as Streamlit runs them) renders all dashboard
+datasets and opens the AI Insights page, which needs the full tables.
+'per-session' is the old data path: a fresh connection per dataset and
+st.cache_data-style results, which every session gets as its own unpickled
+copy. 'shared' is app/connections.py: pooled read-only connections, a
+QueryCache keyed by SQL text and one copy of the tables for all sessions.
+The report shows the wall time for all sessions and the peak Python memory
+(tracemalloc) while they hold their data.
+"""
+import argparse
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import closing
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+from benchmarks.bench_dashboard_indexes import scaled_tables
+from benchmarks.bench_dashboard_queries import FIRST_CHART, OTHER_DATASETS
+from connections import ConnectionPool, QueryCache
+from db.create_tables import create_tables
+from db.insert_cleaned_data import load_tables
+from queries import load_frames, sql_queries
+
+
+def per_session_path(db_path):
+    # st.cache_data computes once, then unpickles a fresh copy for every caller
+    cached = {}
+    lock = threading.Lock()
+
+    def cache_data(key, compute):
+        with lock:
+            if key not in cached:
+                cached[key] = pickle.dumps(compute())
+            return pickle.loads(cached[key])
+
+    def session():
+        held = []
+        for name, *args in FIRST_CHART + OTHER_DATASETS:
+            def compute():
+                with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+                    return getattr(sql_queries(conn), name)(*args)
+            held.append(cache_data((name, *args), compute))
+        def tables():
+            with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+                return load_frames(conn)
+        held.append(cache_data('load_data', tables))
+        return held
+    return session
+
+
+def shared_path(db_path):
+    pool = ConnectionPool(db_path)
+    cache = QueryCache(pool.version)
+    tables = {}
+    lock = threading.Lock()
+
+    def session():
+        held = []
+        with pool.connection() as conn:
+            queries = sql_queries(conn, cache)
+            for name, *args in FIRST_CHART + OTHER_DATASETS:
+                held.append(getattr(queries, name)(*args))
+        # st.cache_resource: one object, handed to every caller as is
+        with lock:
+            if 'tables' not in tables:
+                with pool.connection() as conn:
+                    tables['tables'] = load_frames(conn)
+        held.append(tables['tables'])
+        return held
+    return session
+
+
+def run_sessions(session, n_sessions):
+    results = [None] * n_sessions
+    barrier = threading.Barrier(n_sessions)
+
+    def run(i):
+        barrier.wait()
+        results[i] = session()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n_sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'ecommerce.db')
+        create_tables(db_path)
+        load_tables(scaled_tables(args.scale), db_path=db_path)
+
+        print(f"\n{'sessions':>8} {'path':<12} {'wall (s)':>9} {'peak memory (MB)':>17}")
+        for n_sessions in args.sessions:
+            for name, make_path in [('per-session', per_session_path), ('shared', shared_path)]:
+                seconds, peak_mb = run_sessions(make_path(db_path), n_sessions)
+                print(f"{n_sessions:>8} {name:<12} {seconds:>9.2f} {peak_mb:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark utils.dates.parse_dates against the per-cell date parsers it replaced.
+
+Usage:
+    python benchmarks/bench_date_parsing.py [--sizes 10000 100000 1000000]
+
+Each column of the sample files is tiled up to the requested size, parsed both
+ways, checked for equal results and reported as rows per second. First, a few
+constructed customer dates outside CUSTOMER_DATE_FORMATS (which the samples do
+not contain) check that they are still inferred, as the old cleaner's final
+pd.to_datetime could, instead of becoming NaT.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from cleaners.clean_customers import CUSTOMER_DATE_FORMATS
+from cleaners.clean_orders import ORDER_DATE_FORMATS
+from cleaners.clean_products import PRODUCT_DATE_FORMATS
+from utils.dates import parse_dates
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'Data')
+
+
+# Reference per-cell implementations, as they were in the cleaners
+def legacy_customer_date(date_str):
+    if pd.isna(date_str) or str(date_str).strip() == '':
+        return np.nan
+    for fmt in ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d']:
+        try:
+            return datetime.strptime(str(date_str), fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return date_str
+
+
+def legacy_order_date(date_str):
+    if pd.isna(date_str) or date_str == '':
+        return pd.NaT
+    for fmt in ['%m/%d/%Y', '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']:
+        try:
+            return pd.to_datetime(date_str, format=fmt)
+        except Exception:
+            continue
+    try:
+        return pd.to_datetime(date_str)
+    except Exception:
+        return pd.NaT
+
+
+def legacy_product_date(val):
+    if pd.isna(val) or val == '':
+        return np.nan
+    try:
+        if 'T' in str(val):
+            return pd.to_datetime(val, format='%Y-%m-%dT%H:%M:%S.%fZ')
+        return pd.to_datetime(val, format='%Y-%m-%d')
+    except Exception:
+        return np.nan
+
+
+CASES = [
+    # (label, file, column, legacy parser, parse_dates kwargs)
+    ('customers.registration_date', 'customers_messy_data.json', 'registration_date',
+     lambda s: pd.to_datetime(s.apply(legacy_customer_date), errors='coerce'),
+     {'formats': CUSTOMER_DATE_FORMATS, 'fallback': True}),
+    ('orders.order_date', 'orders_unstructured_data.csv', 'order_date',
+     lambda s: s.apply(legacy_order_date),
+     {'formats': ORDER_DATE_FORMATS, 'fallback': True, 'strip_blank': False}),
+    ('products.last_updated', 'products_inconsistent_data.json', 'last_updated',
+     lambda s: pd.to_datetime(s.apply(legacy_product_date)),
+     {'formats': PRODUCT_DATE_FORMATS, 'strip_blank': False}),
+]
+
+
+# (raw customer date, expected date) for values the sample files lack
+CUSTOMER_FALLBACK_DATES = [
+    ('03/15/2023', '2023-03-15'),
+    ('15/03/2023', '2023-03-15'),
+    ('2023/03/15', '2023-03-15'),
+    ('Jan 5 2023', '2023-01-05'),
+    ('5 January 2023', '2023-01-05'),
+    ('2023-01-05T10:30:00', '2023-01-05 10:30:00'),
+    ('not a date', None),
+    ('  ', None),
+    (None, None),
+]
+
+
+def check_customer_fallback():
+    raw, expected = zip(*CUSTOMER_FALLBACK_DATES)
+    parsed, hits = parse_dates(pd.Series(raw, dtype=object), **CASES[0][4])
+    pd.testing.assert_series_equal(parsed, pd.to_datetime(pd.Series(expected, dtype=object), format='ISO8601'), check_names=False)
+    print(f"Customer dates outside the formats are inferred: {hits}\n")
+
+
+def load_column(file_name, column, n_rows):
+    path = os.path.join(DATA_DIR, file_name)
+    df = pd.read_json(path) if file_name.endswith('.json') else pd.read_csv(path)
+    values = df[column]
+    reps = int(np.ceil(n_rows / len(values)))
+    return pd.concat([values] * reps, ignore_index=True).iloc[:n_rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    check_customer_fallback()
+    print(f"{'column':<30} {'rows':>10} {'per-cell rows/s':>16} {'parse_dates rows/s':>19} {'speedup':>8}")
+    for label, file_name, column, legacy, kwargs in CASES:
+        for n_rows in args.sizes:
+            values = load_column(file_name, column, n_rows)
+
+            start = time.perf_counter()
+            expected = legacy(values)
+            legacy_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parsed, _ = parse_dates(values, **kwargs)
+            shared_s = time.perf_counter() - start
+
+            pd.testing.assert_series_equal(
+                parsed.astype('datetime64[ns]'), expected.astype('datetime64[ns]'), check_names=False
+            )
+            print(f"{label:<30} {n_rows:>10,} {n_rows / legacy_s:>16,.0f} "
+                  f"{n_rows / shared_s:>19,.0f} {legacy_s / shared_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark loading order_items into SQLite: DataFrame.to_sql vs. the bulk loader,
+plus an incremental refresh where --change-pct of the rows were modified.
+
+Usage:
+    python benchmarks/bench_db_load.py [--sizes 100000 1000000 10000000] [--to-sql-max-rows 1000000]
+
+Each size loads synthetic order_items rows into a fresh database created by
+db/create_tables.py in a temporary directory.
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from db.insert_cleaned_data import load_tables, load_tables_incremental
+
+
+def synthetic_order_items(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    quantity = rng.integers(1, 10, n_rows)
+    unit_price = rng.uniform(5, 500, n_rows).round(2)
+    return pd.DataFrame({
+        'order_id': pd.Series(np.arange(n_rows)).map('ORD_{:08d}'.format),
+        'item_id': rng.integers(1, 200, n_rows),
+        'product_id': pd.Series(rng.integers(1, 200, n_rows)).map('PROD_{:03d}'.format),
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'total_amount': (quantity * unit_price).round(2),
+    })
+
+
+def fresh_database(tmp):
+    db_path = os.path.join(tmp, 'ecommerce.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    subprocess.run([sys.executable, os.path.join(ROOT, 'db', 'create_tables.py')], cwd=tmp, check=True)
+    return db_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--to-sql-max-rows', type=int, default=1_000_000)
+    parser.add_argument('--change-pct', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'to_sql rows/s':>14} {'bulk rows/s':>12} {'bulk total (s)':>15} "
+          f"{'incremental (s)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            df = synthetic_order_items(n_rows)
+
+            to_sql_rate = '-'
+            if n_rows <= args.to_sql_max_rows:
+                db_path = fresh_database(tmp)
+                start = time.perf_counter()
+                with sqlite3.connect(db_path) as conn:
+                    df.to_sql('order_items', conn, if_exists='append', index=False)
+                to_sql_rate = f"{n_rows / (time.perf_counter() - start):,.0f}"
+
+            db_path = fresh_database(tmp)
+            start = time.perf_counter()
+            load_tables({'order_items': df}, db_path=db_path)
+            bulk_s = time.perf_counter() - start
+
+            changed = df.copy()
+            n_changed = int(n_rows * args.change_pct / 100)
+            changed.loc[changed.index[:n_changed], 'quantity'] += 1
+            start = time.perf_counter()
+            load_tables_incremental({'order_items': changed}, db_path=db_path)
+            incremental_s = time.perf_counter() - start
+            print(f"{n_rows:>12,} {to_sql_rate:>14} {n_rows / bulk_s:>12,.0f} {bulk_s:>15.2f} "
+                  f"{incremental_s:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
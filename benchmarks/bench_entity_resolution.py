@@ -0,0 +1,174 @@
+"""
+Accuracy and throughput of utils/entity_resolution.py on synthetic customers with known duplicates.
+
+Usage:
+    python benchmarks/bench_entity_resolution.py [--people 1000000] [--duplicate-share 0.15] [--sizes 10000,100000]
+
+`--people` distinct people are generated (names drawn from small lists, so
+many unrelated people share a name and a zip prefix), and a share of them
+get one or two extra records the way another platform would have stored
+them: email re-cased, +tagged or missing, phone in another layout or
+missing, name as 'first.last123', 'LAST FIRST' or 'first_last', address
+abbreviated or with a typo. Every size in `--sizes` (plus `--people`) is
+resolved once; the report shows the time, candidate pairs, and pairwise
+precision and recall of the resulting clusters against the known people.
+First, a few constructed records check the linking policy: a household
+sharing an email (or a phone and zip) stays separate customers, and one
+customer stored twice is linked.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from utils.entity_resolution import resolve_entities
+
+FIRST_NAMES = ['james', 'mary', 'john', 'patricia', 'robert', 'jennifer', 'michael', 'linda', 'william', 'elizabeth',
+               'david', 'barbara', 'richard', 'susan', 'joseph', 'jessica', 'thomas', 'sarah', 'charles', 'karen',
+               'henry', 'grace', 'frank', 'eve', 'alice', 'bob', 'jane', 'oscar', 'nina', 'paul']
+LAST_NAMES = ['smith', 'johnson', 'williams', 'brown', 'jones', 'garcia', 'miller', 'davis', 'rodriguez', 'martinez',
+              'hernandez', 'lopez', 'gonzalez', 'wilson', 'anderson', 'thomas', 'taylor', 'moore', 'jackson', 'martin',
+              'lee', 'perez', 'thompson', 'white', 'harris', 'sanchez', 'clark', 'ramirez', 'lewis', 'robinson',
+              'walker', 'young', 'allen', 'king', 'wright', 'scott', 'torres', 'nguyen', 'hill', 'flores']
+STREETS = ['main', 'oak', 'pine', 'maple', 'cedar', 'elm', 'second', 'third', 'park', 'lake', 'hill', 'washington']
+STREET_TYPES = [('street', 'st'), ('avenue', 'ave'), ('road', 'rd'), ('drive', 'dr'), ('lane', 'ln')]
+
+
+def synthetic_people(n, seed=0):
+    rng = np.random.default_rng(seed)
+    first = np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), n)]
+    last = np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), n)]
+    street_type = rng.integers(0, len(STREET_TYPES), n)
+    numbers = rng.integers(1, 10_000, n)
+    return pd.DataFrame({
+        'person': np.arange(n),
+        'first': first,
+        'last': last,
+        'email': pd.Series(first) + '.' + pd.Series(last) + pd.Series(np.arange(n)).astype(str) + '@example.com',
+        # Distinct per person: the multiplier is coprime with the range
+        'phone': pd.Series((np.arange(n, dtype=np.int64) * 2_654_435_761) % 7_000_000_000 + 2_000_000_000).astype(str),
+        'number': numbers,
+        'street': np.array(STREETS)[rng.integers(0, len(STREETS), n)],
+        'street_type': street_type,
+        'zip_code': pd.Series(rng.integers(10_000, 99_999, n)).astype(str),
+    })
+
+
+def render(people, rng, variant):
+    """Customer records of `people`; `variant` records are formatted as another platform would."""
+    n = len(people)
+    phone = people['phone']
+    if variant:
+        style = rng.integers(0, 4, n)
+        email = people['email'].where(style != 1, people['email'].str.upper())
+        email = email.where(style != 2, email.str.replace('@', '+shop@', regex=False))
+        email = email.where(rng.random(n) > 0.3, None)
+        phone = pd.Series(np.select(
+            [style == 0, style == 1],
+            ['(' + phone.str[:3] + ') ' + phone.str[3:6] + '-' + phone.str[6:], '+1' + phone],
+            phone.str[:3] + '-' + phone.str[3:6] + '-' + phone.str[6:]), index=people.index)
+        phone = phone.where(rng.random(n) > 0.3, None)
+        name = pd.Series(np.select(
+            [style == 0, style == 1, style == 2],
+            [people['first'] + '.' + people['last'] + pd.Series(rng.integers(1, 999, n), index=people.index).astype(str),
+             (people['last'] + ' ' + people['first']).str.upper(),
+             people['first'] + '_' + people['last']],
+            people['first'].str.title() + ' ' + people['last'].str.title()), index=people.index)
+        street_type = np.array([short for _, short in STREET_TYPES])[people['street_type']]
+        street = people['street'].where(rng.random(n) > 0.2, people['street'].str[:-1])
+    else:
+        email = people['email']
+        phone = '(' + phone.str[:3] + ') ' + phone.str[3:6] + '-' + phone.str[6:]
+        name = people['first'].str.title() + ' ' + people['last'].str.title()
+        street_type = np.array([full for full, _ in STREET_TYPES])[people['street_type']]
+        street = people['street']
+    return pd.DataFrame({
+        'person': people['person'],
+        'customer_name': name,
+        'email': email,
+        'phone': phone,
+        'address': people['number'].astype(str) + ' ' + street + ' ' + street_type,
+        'zip_code': people['zip_code'],
+    })
+
+
+def synthetic_customers(n_people, duplicate_share, seed=0):
+    """Customer records of `n_people` people, a `duplicate_share` of them stored two or three times."""
+    rng = np.random.default_rng(seed + 1)
+    people = synthetic_people(n_people, seed)
+    duplicated = people[rng.random(n_people) < duplicate_share]
+    copies = [duplicated, duplicated[rng.random(len(duplicated)) < 0.3]]
+    customers = pd.concat([render(people, rng, False)] + [render(p, rng, True) for p in copies], ignore_index=True)
+    customers = customers.sample(frac=1, random_state=seed).reset_index(drop=True)
+    customers.insert(0, 'customer_id', np.arange(1, len(customers) + 1))
+    return customers
+
+
+def _pairs(*keys):
+    sizes = pd.DataFrame(dict(enumerate(keys))).value_counts().to_numpy()
+    return int((sizes * (sizes - 1) // 2).sum())
+
+
+def pairwise_accuracy(predicted, truth):
+    """Pairwise precision and recall of the `predicted` clusters against the `truth` clusters."""
+    both = _pairs(predicted, truth)
+    predicted_pairs, true_pairs = _pairs(predicted), _pairs(truth)
+    precision = both / predicted_pairs if predicted_pairs else 1.0
+    recall = both / true_pairs if true_pairs else 1.0
+    return precision, recall
+
+
+# (customer_id, name, email, phone, address, zip) and the master id each record must get
+POLICY_RECORDS = [
+    # Household sharing an email and an address: two customers
+    (1, 'John Smith', 'family@x.com', '555-100-0001', '1 Main Street', '10001', 1),
+    (2, 'Mary Jones', 'family@x.com', '555-100-0002', '1 Main St', '10001', 2),
+    # Same phone and zip, nothing else in common: two customers
+    (3, 'Alice Brown', 'alice@x.com', '555-111-2222', '5 Oak Ave', '20002', 3),
+    (4, 'Bob Green', 'bob@y.com', '(555) 111-2222', '9 Pine Rd', '20002', 4),
+    (5, 'Carol White', None, '555-333-4444', '7 Elm St', '30003', 5),
+    (6, None, None, '5553334444', '88 Lake Dr', '30003', 6),
+    # One customer stored by two platforms: linked
+    (7, 'Henry Davis', 'henry.davis@z.com', None, '12 Cedar Road', '40004', 7),
+    (8, 'henry.davis123', 'HENRY.DAVIS@Z.COM', '555-444-5555', None, None, 7),
+]
+
+
+def check_policy():
+    records = pd.DataFrame(POLICY_RECORDS, columns=['customer_id', 'customer_name', 'email', 'phone', 'address',
+                                                    'zip_code', 'expected'])
+    master_ids, _, _ = resolve_entities(records.drop(columns='expected'))
+    wrong = records[master_ids.to_numpy() != records['expected'].to_numpy()]
+    if len(wrong):
+        raise AssertionError(f"Linking policy violated for customer ids {wrong['customer_id'].tolist()}")
+    print("Linking policy holds: shared household identifiers stay separate, re-stored customers link\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--people', type=int, default=1_000_000)
+    parser.add_argument('--duplicate-share', type=float, default=0.15)
+    parser.add_argument('--sizes', default='10000,100000', help="Smaller people counts to resolve first")
+    args = parser.parse_args()
+
+    check_policy()
+    sizes = sorted({int(size) for size in args.sizes.split(',') if size} | {args.people})
+    print(f"{'people':>10} {'records':>10} {'seconds':>9} {'records/s':>11} {'candidates':>12} {'linked':>10} "
+          f"{'precision':>10} {'recall':>8}")
+    for n_people in sizes:
+        customers = synthetic_customers(n_people, args.duplicate_share)
+        start = time.perf_counter()
+        master_ids, links, stats = resolve_entities(customers)
+        seconds = time.perf_counter() - start
+        precision, recall = pairwise_accuracy(master_ids.to_numpy(), customers['person'].to_numpy())
+        print(f"{n_people:>10,} {len(customers):>10,} {seconds:>9.2f} {len(customers) / seconds:>11,.0f} "
+              f"{stats['candidate_pairs']:>12,} {stats['linked_pairs']:>10,} {precision:>10.4f} {recall:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
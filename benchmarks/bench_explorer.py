@@ -0,0 +1,98 @@
+"""
+Page-flip latency of the Raw Data Explorer: keyset pagination (app/explorer.py) vs. LIMIT/OFFSET.
+
+Usage:
+    python benchmarks/bench_explorer.py [--sizes 100000 1000000 5000000] [--page-size 50] [--repeat 5]
+
+An orders table of each size is built in a temporary database with the
+dashboard indexes. For the table order and for an indexed sort column
+(customer_id, descending), the page after a row at the start, the middle and
+the end of the order is fetched both ways and checked to match; the report
+shows the best time of each and of the COUNT(*) the dashboard caches. Keyset pages should cost the same at
+any depth, while OFFSET grows with it.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+from db.create_tables import create_tables
+from db.indexes import create_indexes
+from db.insert_cleaned_data import bulk_insert
+from explorer import TablePager
+
+SORTS = [(None, False), ('customer_id', True)]
+
+
+def synthetic_orders(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'order_id': pd.Series(np.arange(1, n + 1)).map('ORD_{:08d}'.format),
+        'customer_id': rng.integers(1, max(2, n // 4), n),
+        'order_date': (pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D'))
+                      .strftime('%Y-%m-%d'),
+        'status': rng.choice(['pending', 'shipped', 'delivered', 'cancelled'], n),
+        'order_total': rng.uniform(5, 2000, n).round(2),
+    })
+
+
+def best_time(run, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def offset_page(conn, sort, descending, offset, page_size):
+    direction = 'DESC' if descending else 'ASC'
+    order = f"{sort} {direction}, rowid {direction}" if sort else f"rowid {direction}"
+    return conn.execute(f"SELECT rowid, * FROM orders ORDER BY {order} LIMIT ? OFFSET ?", (page_size, offset)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'sort':<18} {'depth':<7} {'keyset (ms)':>12} {'offset (ms)':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'explorer.db')
+            create_tables(db_path)
+            with sqlite3.connect(db_path) as conn:
+                bulk_insert(conn, 'orders', synthetic_orders(size))
+                create_indexes(conn)
+
+            conn = sqlite3.connect(db_path)
+            count_s = best_time(lambda: TablePager(conn, 'orders').count(), args.repeat)
+            for sort, descending in SORTS:
+                pager = TablePager(conn, 'orders', sort, descending, page_size=args.page_size)
+                label = f"{sort or 'rowid'}{' desc' if descending else ''}"
+                for depth, offset in [('first', 0), ('middle', size // 2), ('last', size - 2 * args.page_size)]:
+                    # The cursor a user paging this far would hold (not timed)
+                    row = offset_page(conn, sort, descending, offset, args.page_size)[-1]
+                    cursor = (row[1 + pager.columns.index(sort)] if sort else None, row[0])
+                    expected = offset_page(conn, sort, descending, offset + args.page_size, args.page_size)
+                    if [r[1] for r in expected] != pager.page(after=cursor)[0]['order_id'].tolist():
+                        raise AssertionError(f"Keyset and OFFSET pages differ: {label}, {depth}")
+                    keyset_s = best_time(lambda: pager.page(after=cursor), args.repeat)
+                    offset_s = best_time(lambda: offset_page(conn, sort, descending, offset + args.page_size,
+                                                             args.page_size), args.repeat)
+                    print(f"{size:>10,} {label:<18} {depth:<7} {keyset_s * 1000:>12.2f} {offset_s * 1000:>12.2f}")
+            print(f"{size:>10,} {'COUNT(*)':<18} {'':<7} {count_s * 1000:>12.2f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
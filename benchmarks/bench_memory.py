@@ -0,0 +1,97 @@
+"""
+Memory footprint of the cleaned frames before and after utils.memory.optimize_memory.
+
+Usage:
+    python benchmarks/bench_memory.py [--scale 100]
+
+The sample datasets are cleaned (unoptimized) and each cleaned frame is
+tiled `--scale` times with unique ids per copy, so key columns stay
+high-cardinality while the descriptive columns keep the sample's value
+mix. The report shows the deep memory usage per frame, the reduction and
+the time optimize_memory took; every optimized frame is checked to hold
+the same values as the original.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from cleaners.clean_customers import clean_customer_data
+from cleaners.clean_orders import clean_orders_dataset
+from cleaners.clean_products import clean_product_dataset
+from utils.memory import memory_report, optimize_memory
+
+DATA_DIR = os.path.join(ROOT, 'Data')
+
+
+def cleaned_frames():
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return {
+            'customers': clean_customer_data(
+                pd.read_json(os.path.join(DATA_DIR, 'customers_messy_data.json')), optimize=False),
+            'products': clean_product_dataset(
+                pd.read_json(os.path.join(DATA_DIR, 'products_inconsistent_data.json')), optimize=False),
+            'orders': clean_orders_dataset(
+                pd.read_csv(os.path.join(DATA_DIR, 'orders_unstructured_data.csv')), optimize=False),
+        }
+
+
+def tile(df, scale, id_columns):
+    """`scale` copies of `df`; string ids get a copy suffix, integer ids an offset."""
+    copies = []
+    for i in range(scale):
+        copy = df.copy()
+        for col in id_columns:
+            if pd.api.types.is_numeric_dtype(copy[col]):
+                copy[col] = copy[col] + i * len(df)
+            else:
+                copy[col] = copy[col].where(copy[col].isna(), copy[col] + f'_{i}')
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+# Columns that identify a row (or reference another table's row)
+ID_COLUMNS = {
+    'customers': ['customer_id', 'email', 'phone'],
+    'products': ['product_id', 'item_id'],
+    'orders': ['order_id', 'customer_id', 'product_id', 'tracking_number'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=100)
+    args = parser.parse_args()
+
+    frames = {name: tile(df, args.scale, ID_COLUMNS[name]) for name, df in cleaned_frames().items()}
+
+    optimized, timings = {}, {}
+    for name, df in frames.items():
+        start = time.perf_counter()
+        optimized[name] = optimize_memory(df, verbose=False)
+        timings[name] = time.perf_counter() - start
+        restored = optimized[name].astype(df.dtypes.to_dict())
+        pd.testing.assert_frame_equal(df, restored)
+
+    before = memory_report(frames).set_index('frame')
+    after = memory_report(optimized).set_index('frame')
+    print(f"{'frame':<10} {'rows':>10} {'before (MB)':>12} {'after (MB)':>11} {'smaller':>8} {'optimize (s)':>13}")
+    for name in frames:
+        b, a = before.loc[name, 'memory_mb'], after.loc[name, 'memory_mb']
+        print(f"{name:<10} {before.loc[name, 'rows']:>10,} {b:>12.1f} {a:>11.1f} {b / a:>7.1f}x {timings[name]:>13.2f}")
+    total_before, total_after = before['memory_mb'].sum(), after['memory_mb'].sum()
+    print(f"{'total':<10} {'':>10} {total_before:>12.1f} {total_after:>11.1f} {total_before / total_after:>7.1f}x")
+
+    print("\nOptimized dtypes:")
+    for name, df in optimized.items():
+        changed = {col: str(dtype) for col, dtype in df.dtypes.items() if dtype != frames[name][col].dtype}
+        print(f"  - {name}: {changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark utils.normalize.LookupNormalizer against the per-cell _standardize_* helpers it replaced.
+
+Usage:
+    python benchmarks/bench_normalizers.py [--sizes 10000 100000 1000000]
+
+The city/state/status/gender columns of the sample customers file are tiled
+up to each size and normalized both ways with the same lookup tables; the
+results are checked equal and reported as rows per second. The normalizer
+only touches the distinct values, so its time should stay nearly flat as
+the row count grows.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.normalize import LookupNormalizer
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'Data')
+
+
+# Reference per-cell implementations, as they were in clean_customers.py
+def legacy_city(city):
+    if pd.isna(city):
+        return np.nan
+    city_mapping = {'nyc': 'New York', 'la': 'Los Angeles', 'chi': 'Chicago', 'houston': 'Houston', 'phoenix': 'Phoenix'}
+    return city_mapping.get(str(city).strip().lower(), str(city).title())
+
+
+def legacy_state(state):
+    if pd.isna(state):
+        return np.nan
+    state_mapping = {'california': 'CA', 'new york': 'NY', 'texas': 'TX', 'illinois': 'IL',
+                     'arizona': 'AZ', 'pennsylvania': 'PA', 'florida': 'FL'}
+    return state_mapping.get(str(state).strip().lower(), str(state).upper())
+
+
+def legacy_status(status):
+    if pd.isna(status):
+        return np.nan
+    status_mapping = {'active': 'Active', 'inactive': 'Inactive', 'suspended': 'Suspended', 'pending': 'Pending'}
+    return status_mapping.get(str(status).strip().lower(), str(status).title())
+
+
+def legacy_gender(gender):
+    if pd.isna(gender):
+        return np.nan
+    gender_mapping = {'f': 'Female', 'female': 'Female', 'm': 'Male', 'male': 'Male', 'other': 'Other'}
+    return gender_mapping.get(str(gender).strip().lower(), str(gender).title())
+
+
+# column: (legacy function, equivalent normalizer)
+CASES = {
+    'city': (legacy_city, LookupNormalizer(
+        {'nyc': 'New York', 'la': 'Los Angeles', 'chi': 'Chicago', 'houston': 'Houston', 'phoenix': 'Phoenix'}, 'title')),
+    'state': (legacy_state, LookupNormalizer(
+        {'california': 'CA', 'new york': 'NY', 'texas': 'TX', 'illinois': 'IL',
+         'arizona': 'AZ', 'pennsylvania': 'PA', 'florida': 'FL'}, 'upper')),
+    'status': (legacy_status, LookupNormalizer(
+        {'active': 'Active', 'inactive': 'Inactive', 'suspended': 'Suspended', 'pending': 'Pending'}, 'title')),
+    'gender': (legacy_gender, LookupNormalizer(
+        {'f': 'Female', 'female': 'Female', 'm': 'Male', 'male': 'Male', 'other': 'Other'}, 'title')),
+}
+
+
+def tile(s, size):
+    return pd.Series(np.resize(s.to_numpy(dtype=object), size), name=s.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    customers = pd.read_json(os.path.join(DATA_DIR, 'customers_messy_data.json'))
+    print(f"{'column':<8} {'rows':>10} {'per-cell (rows/s)':>18} {'normalizer (rows/s)':>20} {'speedup':>8}")
+    for size in args.sizes:
+        for column, (legacy, normalizer) in CASES.items():
+            values = tile(customers[column], size)
+
+            start = time.perf_counter()
+            expected = values.apply(legacy)
+            legacy_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = normalizer(values)
+            normalizer_s = time.perf_counter() - start
+
+            pd.testing.assert_series_equal(expected, result, check_dtype=False)
+            print(f"{column:<8} {size:>10,} {size / legacy_s:>18,.0f} {size / normalizer_s:>20,.0f} "
+                  f"{legacy_s / normalizer_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
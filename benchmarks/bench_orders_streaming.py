@@ -0,0 +1,87 @@
+"""
+Check that streaming clean_orders keeps peak memory flat as the input grows.
+
+Usage:
+    python benchmarks/bench_orders_streaming.py [--sizes 100000 1000000 5000000] [--chunksize 100000]
+
+The sample orders CSV is tiled into a temporary file of each size, which is
+then cleaned by `cleaners/clean_orders.py --chunksize` in a fresh process so
+every size reports its own peak RSS. Beforehand, streaming output is checked
+to equal the in-memory clean on the sample, and on a file whose first chunk
+has an entirely blank status column.
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+SAMPLE = os.path.join(ROOT, 'Data', 'orders_unstructured_data.csv')
+CLEANER = os.path.join(ROOT, 'cleaners', 'clean_orders.py')
+
+sys.path.append(ROOT)
+from cleaners.clean_orders import CSV_DTYPES, clean_orders_dataset, clean_orders_streaming
+from utils.storage import write_frame
+
+
+def write_tiled_csv(path, n_rows, block_rows=100_000):
+    sample = pd.read_csv(SAMPLE, dtype=str, keep_default_na=False)
+    block = pd.concat([sample] * int(np.ceil(block_rows / len(sample))), ignore_index=True)
+    written = 0
+    while written < n_rows:
+        part = block.iloc[:min(len(block), n_rows - written)]
+        part.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += len(part)
+
+
+def check_equivalent(tmp):
+    """Streaming and in-memory cleaning must write the same rows, whatever each chunk holds."""
+    sample = pd.read_csv(SAMPLE, dtype=str, keep_default_na=False)
+    blank_status = sample.head(40).copy()
+    blank_status.loc[:19, 'status'] = ''
+    for name, raw, chunksize in [('sample', sample, 250), ('blank status chunk', blank_status, 20)]:
+        input_path = os.path.join(tmp, 'check.csv')
+        full_path, streamed_path = os.path.join(tmp, 'check_full.csv'), os.path.join(tmp, 'check_streamed.csv')
+        raw.to_csv(input_path, index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_frame(clean_orders_dataset(pd.read_csv(input_path, dtype=CSV_DTYPES)), full_path)
+            clean_orders_streaming(input_path, streamed_path, chunksize)
+        pd.testing.assert_frame_equal(pd.read_csv(full_path), pd.read_csv(streamed_path), obj=name)
+        print(f"Streaming output matches the in-memory clean: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_equivalent(tmp)
+        print(f"\n{'rows':>12} {'input MB':>9} {'time (s)':>9} {'peak RSS MB':>12}")
+        input_path = os.path.join(tmp, 'orders.csv')
+        output_path = os.path.join(tmp, 'orders_cleaned.csv')
+        for n_rows in args.sizes:
+            write_tiled_csv(input_path, n_rows)
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, CLEANER, '--input', input_path, '--output', output_path,
+                 '--chunksize', str(args.chunksize)],
+                capture_output=True, text=True, check=True,
+            )
+            elapsed = time.perf_counter() - start
+            peak = re.findall(r'peak RSS ([\d.]+) MB', result.stdout)[-1]
+            size_mb = os.path.getsize(input_path) / 1024 / 1024
+            print(f"{n_rows:>12,} {size_mb:>9.1f} {elapsed:>9.1f} {float(peak):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the vectorized normalize_phones/validate_emails against the per-cell helpers they replaced.
+
+Usage:
+    python benchmarks/bench_phone_email.py [--sizes 100000 1000000 10000000]
+
+The phone and email values of the sample customers file (both columns of
+each duplicated pair, plus a few malformed emails) are tiled up to each
+size, processed both ways, checked for equal results and reported as rows
+per second.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.normalize import normalize_phones, validate_emails
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'Data')
+
+
+# Reference per-cell implementations, as they were in clean_customers.py
+def legacy_phone(phone):
+    if pd.isna(phone):
+        return np.nan
+    phone_digits = re.sub(r'\D', '', str(phone))
+    if len(phone_digits) == 10:
+        return f"({phone_digits[:3]}) {phone_digits[3:6]}-{phone_digits[6:]}"
+    elif len(phone_digits) == 11 and phone_digits[0] == '1':
+        return f"({phone_digits[1:4]}) {phone_digits[4:7]}-{phone_digits[7:]}"
+    else:
+        return phone
+
+
+def legacy_email(email):
+    if pd.isna(email):
+        return np.nan
+    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if re.match(email_pattern, str(email)):
+        return email
+    return np.nan
+
+
+def sample_values(size):
+    customers = pd.read_json(os.path.join(DATA_DIR, 'customers_messy_data.json'))
+    phones = pd.concat([customers['phone'], customers['phone_number'], pd.Series(['1-555-123-4567', '+1 555 765 4321'])])
+    emails = pd.concat([customers['email'], customers['email_address'],
+                        pd.Series(['no-at-sign.example.com', 'user@localhost', 'a b@example.com'])])
+    tile = lambda s: pd.Series(np.resize(s.to_numpy(dtype=object), size))
+    return tile(phones), tile(emails)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'column':<7} {'rows':>11} {'per-cell (rows/s)':>18} {'vectorized (rows/s)':>20} {'speedup':>8} {'failures':>10}")
+    for size in args.sizes:
+        phones, emails = sample_values(size)
+        for column, values, legacy, vectorized in [('phone', phones, legacy_phone, normalize_phones),
+                                                   ('email', emails, legacy_email, validate_emails)]:
+            start = time.perf_counter()
+            expected = values.apply(legacy)
+            legacy_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result, failures = vectorized(values)
+            vectorized_s = time.perf_counter() - start
+
+            pd.testing.assert_series_equal(expected, result, check_dtype=False)
+            print(f"{column:<7} {size:>11,} {size / legacy_s:>18,.0f} {size / vectorized_s:>20,.0f} "
+                  f"{legacy_s / vectorized_s:>7.1f}x {failures:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Time pipeline.py end to end with the cleaners run serially vs. in a process pool.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--orders 100000] [--workers 0 3]
+
+Synthetic raw datasets with `--orders` order rows (utils/synthetic.py) are
+written to a temporary data directory, then `pipeline.py` runs once per
+`--workers` value in a fresh process with the stage cache off. With a pool,
+the end-to-end time should approach the slowest cleaner plus the load,
+provided the machine has a free core per cleaner.
+
+It then measures the stage cache: a cold run, a warm run with nothing
+changed, and a run after only the orders file changed (the nightly case).
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from utils.synthetic import generate
+
+PIPELINE = os.path.join(ROOT, 'pipeline.py')
+
+
+def run_pipeline(data_dir, db_path, workers, cache_dir=None):
+    cache_args = ['--cache-dir', cache_dir] if cache_dir else ['--no-cache']
+    out = subprocess.run(
+        [sys.executable, PIPELINE, '--data-dir', data_dir, '--db', db_path, '--workers', str(workers), *cache_args],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    stages = {}
+    for line in out.splitlines():
+        match = re.match(r'^(\w+)\s+([\d.]+)\s+([\d.]+)\s+([\d.-]+)\s+\d+\s*(yes)?$', line)
+        if match:
+            stages[match.group(1)] = float(match.group(2))
+    total = float(re.search(r'End-to-end wall time: ([\d.]+)s', out).group(1))
+    return total, stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 3])
+    args = parser.parse_args()
+
+    print(f"CPUs available: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(tmp, args.orders)
+        results = {}
+        for workers in args.workers:
+            db_path = os.path.join(tmp, f'pipeline_{workers}.db')
+            results[workers] = run_pipeline(tmp, db_path, workers)
+
+        cache_dir = os.path.join(tmp, 'cache')
+        db_path = os.path.join(tmp, 'pipeline_cache.db')
+        workers = args.workers[-1]
+        cache_runs = {'cold cache': run_pipeline(tmp, db_path, workers, cache_dir)}
+        cache_runs['warm cache'] = run_pipeline(tmp, db_path, workers, cache_dir)
+        orders_path = os.path.join(tmp, 'orders_unstructured_data.csv')
+        with open(orders_path, 'a') as f:
+            f.write('\n')
+        cache_runs['orders changed'] = run_pipeline(tmp, db_path, workers, cache_dir)
+
+    print(f"\n{'workers':>7} {'end-to-end (s)':>15} {'slowest cleaner (s)':>20} {'load (s)':>9}")
+    for workers, (total, stages) in results.items():
+        slowest = max(wall for name, wall in stages.items() if name.startswith('clean_'))
+        print(f"{workers:>7} {total:>15.2f} {slowest:>20.2f} {stages['load']:>9.2f}")
+
+    print(f"\n{'stage cache':<15} {'end-to-end (s)':>15}")
+    for run, (total, _) in cache_runs.items():
+        print(f"{run:<15} {total:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
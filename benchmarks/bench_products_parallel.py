@@ -0,0 +1,67 @@
+"""
+Scaling of clean_product_dataset_parallel across worker counts.
+
+Usage:
+    python benchmarks/bench_products_parallel.py [--rows 5000000] [--workers 1 2 4 8] [--shards-per-worker 4]
+
+A synthetic catalog of `--rows` products is drawn (seeded, with
+replacement) from the sample products file and given unique product ids,
+so it keeps the sample's mix of messy values. Every worker count cleans
+the same catalog; the results are asserted equal to the 1-worker run.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from cleaners.clean_products import clean_product_dataset, clean_product_dataset_parallel
+
+
+def synthetic_catalog(rows, seed=0):
+    sample = pd.read_json(os.path.join(ROOT, 'Data', 'products_inconsistent_data.json'))
+    catalog = sample.sample(n=rows, replace=True, random_state=seed).reset_index(drop=True)
+    catalog['product_id'] = 'PROD_' + pd.Series(np.arange(1, rows + 1)).astype(str).str.zfill(len(str(rows)))
+    catalog['item_id'] = np.arange(1, rows + 1)
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--shards-per-worker', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"CPUs available: {os.cpu_count()}")
+    catalog = synthetic_catalog(args.rows)
+
+    timings, baseline = {}, None
+    for workers in args.workers:
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if workers == 1:
+                cleaned = clean_product_dataset(catalog)
+            else:
+                cleaned = clean_product_dataset_parallel(
+                    catalog, workers=workers, shards=workers * args.shards_per_worker)
+        timings[workers] = time.perf_counter() - start
+        if baseline is None:
+            baseline = cleaned
+        else:
+            pd.testing.assert_frame_equal(baseline, cleaned)
+        print(f"  - {workers} workers: {timings[workers]:.2f}s")
+
+    first = timings[args.workers[0]]
+    print(f"\n{'workers':>7} {'time (s)':>9} {'speedup':>8} {'rows/sec':>12}")
+    for workers, seconds in timings.items():
+        print(f"{workers:>7} {seconds:>9.2f} {first / seconds:>7.2f}x {args.rows / seconds:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Accuracy and throughput of db/reconcile.py on a synthetic feed with known outcomes.
+
+Usage:
+    python benchmarks/bench_reconcile.py [--orders 1000000] [--records 1000000] [--chunk-rows 100000] [--skip-in-memory]
+
+A database with `--orders` orders (one to three items each) is built in a
+temporary directory, and a feed of `--records` records is drawn from it:
+most records copy their order exactly, and the rest are perturbed so the
+expected outcome is known (amount or customer changed -> conflicting,
+transaction reference removed or pointing at another order -> matched
+through the band join, reference and amount both wrong -> unmatched). The feed is reconciled in chunks
+against SQLite and, unless skipped, with both tables in pandas; the report
+shows records/sec and checks that every record got its expected outcome
+and that both paths agree.
+"""
+import argparse
+import contextlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from db.create_tables import create_tables
+from db.indexes import create_indexes
+from db.insert_cleaned_data import bulk_insert
+from db.reconcile import OUTCOMES, FrameSource, SqliteSource, reconcile
+
+# Share of feed records perturbed per case, and the outcome each case must get
+CASES = [
+    {'name': 'exact', 'share': 0.77, 'expected': 'matched'},
+    {'name': 'amount_changed', 'share': 0.07, 'expected': 'conflicting'},
+    {'name': 'customer_changed', 'share': 0.05, 'expected': 'conflicting'},
+    {'name': 'reference_missing', 'share': 0.05, 'expected': 'matched'},
+    {'name': 'wrong_reference', 'share': 0.03, 'expected': 'matched'},
+    {'name': 'unknown_order', 'share': 0.03, 'expected': 'unmatched'},
+]
+
+
+def synthetic_tables(n_orders, seed=0):
+    rng = np.random.default_rng(seed)
+    items_per_order = rng.integers(1, 4, n_orders)
+    order_numbers = np.repeat(np.arange(1, n_orders + 1), items_per_order)
+    quantity = rng.integers(1, 10, len(order_numbers))
+    unit_price = rng.uniform(5, 500, len(order_numbers)).round(2)
+    items = pd.DataFrame({
+        'order_id': pd.Series(order_numbers).map('ORD_{:05d}'.format),
+        'item_id': np.arange(len(order_numbers)),
+        # Distinct products within an order, so (order, product) is a key
+        'product_id': pd.Series(rng.integers(1, 300, len(order_numbers)) * 4
+                                + pd.Series(order_numbers).groupby(order_numbers).cumcount()).map('PROD_{:03d}'.format),
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'total_amount': (quantity * unit_price).round(2),
+    })
+    orders = pd.DataFrame({
+        'order_id': pd.Series(np.arange(1, n_orders + 1)).map('ORD_{:05d}'.format),
+        'customer_id': rng.integers(1, max(2, n_orders // 2), n_orders),
+        'order_date': (pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n_orders), unit='D'))
+                      .strftime('%Y-%m-%d'),
+        'order_total': items.groupby(order_numbers)['total_amount'].sum().round(2).to_numpy(),
+    })
+    return orders, items
+
+
+def synthetic_feed(orders, items, n_records, seed=0):
+    """Feed records drawn from the tables, and the outcome each one should get."""
+    rng = np.random.default_rng(seed + 1)
+    first_items = items.drop_duplicates('order_id').set_index('order_id')
+    picked = orders.iloc[rng.integers(0, len(orders), n_records)].reset_index(drop=True)
+    item = first_items.loc[picked['order_id']].reset_index()
+    feed = pd.DataFrame({
+        'client_reference': picked['customer_id'].map('CLI_{:04d}'.format),
+        'transaction_ref': 'TXN_' + picked['order_id'].str[4:],
+        'item_reference': 'ITM_' + item['product_id'].str[5:],
+        'transaction_date': pd.to_datetime(picked['order_date']).dt.strftime('%-m/%-d/%Y'),
+        'amount_paid': picked['order_total'],
+        'quantity_ordered': item['quantity'],
+        'total_value': item['total_amount'],
+    })
+
+    case = rng.choice(len(CASES), n_records, p=[c['share'] for c in CASES])
+    names = np.array([c['name'] for c in CASES])[case]
+    feed.loc[names == 'amount_changed', 'amount_paid'] += 25
+    feed.loc[names == 'customer_changed', 'client_reference'] = 'CLI_0000'
+    feed.loc[names == 'reference_missing', 'transaction_ref'] = None
+    wrong = names == 'wrong_reference'
+    other_order = (picked.loc[wrong, 'order_id'].str[4:].astype('int64') % len(orders)) + 1
+    feed.loc[wrong, 'transaction_ref'] = 'TXN_' + other_order.map('{:05d}'.format)
+    unknown = names == 'unknown_order'
+    feed.loc[unknown, 'transaction_ref'] = 'TXN_' + pd.Series(np.arange(unknown.sum()) + 10 * len(orders) + 1,
+                                                              index=feed.index[unknown]).astype(str)
+    feed.loc[unknown, 'amount_paid'] += 1000
+    expected = pd.Series(np.array([c['expected'] for c in CASES])[case])
+    # reference_missing and wrong_reference records could only go wrong if their
+    # customer had two orders with the same total within the date window
+    return feed, expected
+
+
+def run(feed, source, chunk_rows, out_dir):
+    chunks = (feed.iloc[start:start + chunk_rows] for start in range(0, len(feed), chunk_rows))
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        reconcile(chunks, source, out_dir, 'parquet', chunk_rows)
+    seconds = time.perf_counter() - start
+    outcomes = pd.concat([
+        pd.read_parquet(os.path.join(out_dir, f'{name}.parquet'), columns=['contact_email']).assign(outcome=name)
+        for name in OUTCOMES
+    ])
+    return seconds, outcomes.set_index('contact_email')['outcome']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--records', type=int, default=1_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=100_000)
+    parser.add_argument('--skip-in-memory', action='store_true')
+    args = parser.parse_args()
+
+    orders, items = synthetic_tables(args.orders)
+    feed, expected = synthetic_feed(orders, items, args.records)
+    # Record ids to line the outputs up with the expectations
+    feed['contact_email'] = [f'record{i}@test.com' for i in range(len(feed))]
+    expected.index = feed['contact_email']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'recon.db')
+        create_tables(db_path)
+        with sqlite3.connect(db_path) as conn:
+            bulk_insert(conn, 'orders', orders)
+            bulk_insert(conn, 'order_items', items)
+            create_indexes(conn)
+        print(f"{len(orders):,} orders, {len(items):,} items, {len(feed):,} feed records\n")
+        print(f"{'path':<10} {'seconds':>9} {'records/s':>11}  " + '  '.join(f"{name:>11}" for name in OUTCOMES)
+              + "  wrong outcome")
+
+        results = {}
+        conn = sqlite3.connect(db_path)
+        paths = [('sqlite', lambda: SqliteSource(conn))]
+        if not args.skip_in_memory:
+            paths.append(('in-memory', lambda: FrameSource(orders, items)))
+        for name, make_source in paths:
+            seconds, outcomes = run(feed, make_source(), args.chunk_rows, os.path.join(tmp, name))
+            results[name] = outcomes
+            wrong = (outcomes.reindex(expected.index) != expected).sum()
+            counts = outcomes.value_counts()
+            print(f"{name:<10} {seconds:>9.2f} {len(feed) / seconds:>11,.0f}  "
+                  + '  '.join(f"{counts.get(o, 0):>11,}" for o in OUTCOMES) + f"  {wrong:,}")
+        conn.close()
+
+    if len(results) == 2:
+        a, b = results.values()
+        print(f"\nPaths agree on every record: {bool((a.sort_index() == b.sort_index()).all())}")
+
+
+if __name__ == "__main__":
+    main()
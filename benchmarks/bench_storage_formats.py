@@ -0,0 +1,69 @@
+"""
+Compare the cleaned/ stage formats from utils/storage.py.
+
+Usage:
+    python benchmarks/bench_storage_formats.py [--scale 100] [--repeat 3]
+
+The three cleaners run in-process on the sample data and their outputs are
+tiled `--scale` times. Each frame is then written and read back in every
+format, reporting file size, best write time, best read time, and whether
+the dtypes survived the round trip.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from cleaners.clean_customers import clean_customer_data
+from cleaners.clean_orders import clean_orders_dataset
+from cleaners.clean_products import clean_product_dataset
+from utils.storage import STORAGE_FORMATS, read_frame, write_frame
+
+
+def cleaned_frames(scale):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        frames = {
+            'customers': clean_customer_data(pd.read_json(os.path.join(ROOT, 'Data', 'customers_messy_data.json'))),
+            'products': clean_product_dataset(pd.read_json(os.path.join(ROOT, 'Data', 'products_inconsistent_data.json'))),
+            'orders': clean_orders_dataset(pd.read_csv(os.path.join(ROOT, 'Data', 'orders_unstructured_data.csv'))),
+        }
+    return {name: pd.concat([df] * scale, ignore_index=True) for name, df in frames.items()}
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frames = cleaned_frames(args.scale)
+
+    print(f"{'dataset':<10} {'rows':>9} {'format':<8} {'size (MB)':>10} {'write (s)':>10} {'read (s)':>9}  dtypes kept")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, df in frames.items():
+            for fmt, spec in STORAGE_FORMATS.items():
+                path = os.path.join(tmp, f"{name}{spec['extension']}")
+                write_s, _ = best_of(args.repeat, lambda: write_frame(df, path, fmt))
+                read_s, back = best_of(args.repeat, lambda: read_frame(path, fmt))
+                kept = (back.dtypes.astype(str) == df.dtypes.astype(str)).sum()
+                print(f"{name:<10} {len(df):>9} {fmt:<8} {os.path.getsize(path) / 1024 / 1024:>10.2f} "
+                      f"{write_s:>10.3f} {read_s:>9.3f}  {kept}/{len(df.columns)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Exact vs approximate (streaming) summarize_dataframe on synthetic raw files.
+
+Usage:
+    python benchmarks/bench_summarise.py [--orders 1000000] [--chunk-rows 100000] [--data-dir DIR]
+
+Synthetic raw files (utils/synthetic.py) are written once, then each file is
+profiled in a fresh process both ways: loaded whole and summarized exactly,
+and streamed through summarize_chunks. The report shows the wall time and
+peak RSS of each, and checks every approximate figure against the exact
+one: null percentages and sample values must match, and distinct counts
+must fall within the reported error bound.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+from utils.resources import peak_rss_mb
+from utils.summarise import read_chunks, read_whole, summarize_chunks, summarize_dataframe
+from utils.synthetic import DATASETS, generate
+
+
+def profile_file(path, approx, chunk_rows):
+    """Summaries of one file plus the time and peak RSS of this process."""
+    start = time.perf_counter()
+    if approx:
+        summaries = summarize_chunks(read_chunks(path, chunk_rows), 'bench')
+    else:
+        summaries = summarize_dataframe(read_whole(path), 'bench')
+    return {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb(), 'summaries': summaries}
+
+
+def run_isolated(path, approx, chunk_rows):
+    command = [sys.executable, __file__, '--child', path, '--chunk-rows', str(chunk_rows)]
+    if approx:
+        command.append('--approx')
+    return json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+
+
+def check(exact, approx):
+    """Mismatches between the exact and approximate summaries of a file."""
+    problems = []
+    for e, a in zip(exact, approx):
+        if e['null_percentage'] != a['null_percentage'] or e['sample_values'] != a['sample_values']:
+            problems.append(f"{e['column']}: nulls/samples differ")
+        if abs(e['unique_count'] - a['unique_count']) > a['unique_count_error']:
+            problems.append(f"{e['column']}: {a['unique_count']:,} +/- {a['unique_count_error']:,} "
+                            f"misses {e['unique_count']:,} distinct")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=100_000)
+    parser.add_argument('--data-dir', default=None, help="Reuse synthetic files here (generated if missing)")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--approx', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(profile_file(args.child, args.approx, args.chunk_rows), default=str))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        if not all(os.path.exists(os.path.join(data_dir, spec['file'])) for spec in DATASETS.values()):
+            print(f"Generating {args.orders:,} orders of synthetic data...")
+            generate(data_dir, args.orders)
+
+        print(f"\n{'file':<34} {'exact (s)':>10} {'MB':>8} {'approx (s)':>11} {'MB':>8} {'speedup':>8}  check")
+        for spec in DATASETS.values():
+            path = os.path.join(data_dir, spec['file'])
+            exact = run_isolated(path, False, args.chunk_rows)
+            approx = run_isolated(path, True, args.chunk_rows)
+            problems = check(exact['summaries'], approx['summaries'])
+            print(f"{spec['file']:<34} {exact['seconds']:>10.1f} {exact['peak_rss_mb']:>8.0f} "
+                  f"{approx['seconds']:>11.1f} {approx['peak_rss_mb']:>8.0f} "
+                  f"{exact['seconds'] / approx['seconds']:>7.1f}x  {'ok' if not problems else '; '.join(problems)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Benchmark suite for the cleaners, customer entity resolution,
+summarize_dataframe, the DB load and the dashboard datasets, with a JSON
+history for regression tracking.
+
+Usage:
+    python benchmarks/suite.py run [--sizes 1000 10000 100000] [--repeat 3] [--only clean_] [--label NAME]
+    python benchmarks/suite.py compare [--baseline -2] [--current -1] [--threshold 0.10]
+    python benchmarks/suite.py list
+
+`run` generates synthetic inputs (utils/synthetic.py) for every size, given
+in order rows (customers = orders / 2, products = orders / 5), and times
+every benchmark in BENCHMARKS on them: the best of `--repeat` runs, then
+one more run under tracemalloc for the peak Python memory. The results are
+appended to the history file together with the git commit and the
+interpreter/library versions.
+
+`compare` lines up two runs of the history (by index, run id or label;
+default: the last two) and flags every benchmark whose time or peak memory
+grew by more than `--threshold`. It exits with status 1 when anything
+regressed, so it can gate a CI job. Timings below `--min-seconds` are too
+noisy to flag.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'app'))
+from benchmarks.bench_dashboard_queries import FIRST_CHART, OTHER_DATASETS
+from cleaners.clean_customers import clean_customer_data
+from cleaners.clean_orders import clean_orders_dataset
+from cleaners.clean_products import clean_product_dataset
+from db.create_tables import create_tables
+from db.insert_cleaned_data import load_tables, prepare_tables
+from queries import FrameQueries, RollupQueries, SqlQueries, load_frames
+from utils.entity_resolution import resolve_entities
+from utils.memory import optimize_memory
+from utils.summarise import summarize_dataframe
+from utils.synthetic import DATASETS, generate
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'history.json')
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+@contextlib.contextmanager
+def _quiet():
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def build_workload(tmp, orders):
+    """Raw, cleaned and loaded versions of a synthetic dataset with `orders` order rows."""
+    data_dir = os.path.join(tmp, f'data_{orders}')
+    with _quiet():
+        generate(data_dir, orders)
+        raw = {
+            'customers': pd.read_json(os.path.join(data_dir, DATASETS['customers']['file'])),
+            'products': pd.read_json(os.path.join(data_dir, DATASETS['products']['file'])),
+            'orders': pd.read_csv(os.path.join(data_dir, DATASETS['orders']['file'])),
+        }
+        tables = prepare_tables(
+            clean_customer_data(raw['customers'].copy()),
+            clean_product_dataset(raw['products'].copy()),
+            clean_orders_dataset(raw['orders'].copy()),
+        )
+        db_path = os.path.join(tmp, f'queries_{orders}.db')
+        create_tables(db_path)
+        load_tables(tables, db_path=db_path)
+        load_db_path = os.path.join(tmp, f'load_{orders}.db')
+        create_tables(load_db_path)
+
+    conn = sqlite3.connect(db_path)
+    # As the dashboard's load_data() holds them
+    customers, products, orders_df, order_items, _ = (optimize_memory(df, verbose=False) for df in load_frames(conn))
+    return {
+        'raw': raw,
+        'tables': tables,
+        'load_db_path': load_db_path,
+        'conn': conn,
+        'sessions': {
+            'sql': SqlQueries(conn),
+            'rollup': RollupQueries(conn),
+            'pandas': FrameQueries(customers, products, orders_df, order_items),
+        },
+    }
+
+
+def _dataset_benchmark(path, name, *args):
+    return {
+        'name': f"dashboard.{path}.{'.'.join(map(str, (name, *args)))}",
+        'run': lambda w: getattr(w['sessions'][path], name)(*args),
+    }
+
+
+# Every benchmark is a `run(workload)` callable over build_workload()'s result;
+# it must not modify the workload, since it runs several times on it.
+BENCHMARKS = [
+    {'name': 'clean_customer_data', 'run': lambda w: clean_customer_data(w['raw']['customers'].copy())},
+    {'name': 'clean_product_dataset', 'run': lambda w: clean_product_dataset(w['raw']['products'].copy())},
+    {'name': 'clean_orders_dataset', 'run': lambda w: clean_orders_dataset(w['raw']['orders'].copy())},
+    {'name': 'resolve_entities', 'run': lambda w: resolve_entities(w['tables']['customers'])},
+    {'name': 'summarize_dataframe',
+     'run': lambda w: [summarize_dataframe(df, name) for name, df in w['raw'].items()]},
+    {'name': 'load_tables', 'run': lambda w: load_tables(w['tables'], db_path=w['load_db_path'])},
+] + [
+    _dataset_benchmark(path, *dataset)
+    for path in ['sql', 'rollup', 'pandas']
+    for dataset in FIRST_CHART + OTHER_DATASETS
+]
+
+
+def measure(run, workload, repeat):
+    """Best and mean wall time over `repeat` runs, then the tracemalloc peak of one more."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        with _quiet():
+            run(workload)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with _quiet():
+            run(workload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(timings), 'mean_seconds': float(np.mean(timings)), 'peak_mb': peak / 1024 / 1024}
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def load_history(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'runs': []}
+
+
+def save_history(history, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_suite(sizes, repeat, only=None, label=None):
+    benchmarks = [b for b in BENCHMARKS if not only or any(pattern in b['name'] for pattern in only)]
+    run = {
+        'id': datetime.now().strftime('%Y%m%d-%H%M%S'),
+        'label': label,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'repeat': repeat,
+        'environment': environment(),
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            print(f"Size {size:,} orders: building workload...")
+            workload = build_workload(tmp, size)
+            try:
+                for benchmark in benchmarks:
+                    result = measure(benchmark['run'], workload, repeat)
+                    run['results'].append({'benchmark': benchmark['name'], 'size': size, **result})
+                    print(f"  - {benchmark['name']:<55} {result['seconds'] * 1000:>10.1f} ms "
+                          f"{result['peak_mb']:>9.1f} MB")
+            finally:
+                workload['conn'].close()
+    return run
+
+
+def select_run(history, selector):
+    """A run of the history by index (e.g. -1), id or label."""
+    runs = history['runs']
+    try:
+        return runs[int(selector)]
+    except ValueError:
+        pass
+    except IndexError:
+        raise SystemExit(f"History has {len(runs)} runs; no run {selector}")
+    for run in reversed(runs):
+        if selector in (run['id'], run.get('label')):
+            return run
+    raise SystemExit(f"No run with id or label '{selector}'")
+
+
+def compare_runs(baseline, current, threshold, min_seconds):
+    """Print the per-benchmark change between two runs; returns the regressions."""
+    before = {(r['benchmark'], r['size']): r for r in baseline['results']}
+    regressions = []
+    print(f"Baseline: {baseline['id']} ({baseline['environment']['commit']})  "
+          f"Current: {current['id']} ({current['environment']['commit']})  threshold {threshold:.0%}\n")
+    print(f"{'benchmark':<55} {'size':>8} {'time (ms)':>20} {'change':>7} {'peak (MB)':>18} {'change':>7}  status")
+    for result in current['results']:
+        key = (result['benchmark'], result['size'])
+        if key not in before:
+            continue
+        old = before[key]
+        time_ratio = result['seconds'] / old['seconds'] if old['seconds'] else 1.0
+        memory_ratio = result['peak_mb'] / old['peak_mb'] if old['peak_mb'] else 1.0
+
+        slower = time_ratio > 1 + threshold and max(result['seconds'], old['seconds']) >= min_seconds
+        bigger = memory_ratio > 1 + threshold
+        if slower or bigger:
+            status = 'REGRESSION (' + ', '.join(n for n, hit in [('time', slower), ('memory', bigger)] if hit) + ')'
+            regressions.append(key)
+        elif time_ratio < 1 - threshold or memory_ratio < 1 - threshold:
+            status = 'improved'
+        else:
+            status = ''
+        print(f"{key[0]:<55} {key[1]:>8,} {old['seconds'] * 1000:>8.1f} -> {result['seconds'] * 1000:<8.1f} "
+              f"{time_ratio - 1:>+7.0%} {old['peak_mb']:>7.1f} -> {result['peak_mb']:<7.1f} "
+              f"{memory_ratio - 1:>+7.0%}  {status}")
+    print(f"\n{len(regressions)} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', default=HISTORY_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the suite and append the results to the history")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Order rows per workload")
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--only', nargs='+', default=None, help="Run benchmarks whose name contains any of these")
+    run_parser.add_argument('--label', default=None, help="Name to select this run by in `compare`")
+
+    compare_parser = commands.add_parser('compare', help="Flag regressions between two runs of the history")
+    compare_parser.add_argument('--baseline', default='-2', help="Run index, id or label")
+    compare_parser.add_argument('--current', default='-1', help="Run index, id or label")
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help="Allowed relative growth (0.10 = 10%%)")
+    compare_parser.add_argument('--min-seconds', type=float, default=0.005,
+                                help="Ignore time changes of benchmarks faster than this")
+
+    commands.add_parser('list', help="List the runs in the history")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    if args.command == 'run':
+        history['runs'].append(run_suite(args.sizes, args.repeat, args.only, args.label))
+        save_history(history, args.history)
+        print(f"\nAppended run {history['runs'][-1]['id']} to {args.history}")
+    elif args.command == 'compare':
+        regressions = compare_runs(select_run(history, args.baseline), select_run(history, args.current),
+                                   args.threshold, args.min_seconds)
+        sys.exit(1 if regressions else 0)
+    else:
+        for i, run in enumerate(history['runs']):
+            env = run['environment']
+            sizes = sorted({r['size'] for r in run['results']})
+            print(f"{i:>3} {run['id']} {run.get('label') or '':<12} commit {env['commit']}{'+' if env['dirty'] else ''} "
+                  f"sizes {sizes} ({len(run['results'])} results)")
+
+
+if __name__ == "__main__":
+    main()
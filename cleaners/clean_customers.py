@@ -1,94 +1,114 @@
+import argparse
 import os
+import sys
 
 import pandas as pd
 import numpy as np
-import re
 from datetime import datetime
 
-def clean_customer_data(df):
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.column_merge import merge_columns, before_dash
+from utils.dates import parse_dates
+from utils.memory import optimize_memory
+from utils.normalize import PHONE_STYLES, load_normalizers, normalize_columns, normalize_phones, validate_emails
+from utils.profiling import StageProfiler
+from utils.storage import DEFAULT_FORMAT, STORAGE_FORMATS, cleaned_path, write_frame
+
+# Accepted date formats, highest priority first
+CUSTOMER_DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d']
+
+# Duplicate column pairs and which value wins. Each rule mirrors the matching
+# _merge_* helper below, evaluated on whole columns instead of row by row.
+CUSTOMER_MERGE_RULES = [
+    # _merge_names
+    {'target': 'customer_name', 'source': 'full_name', 'prefer_source': 'when_only_source_has_space'},
+    # _merge_emails
+    {'target': 'email', 'source': 'email_address', 'prefer_source': 'when_only_source_has_at'},
+    # _merge_phones
+    {'target': 'phone', 'source': 'phone_number', 'prefer_source': 'when_longer'},
+    # _merge_zip_codes
+    {'target': 'zip_code', 'source': 'postal_code', 'prefer_source': 'when_missing',
+     'source_transform': before_dash, 'as_str': True},
+    # _merge_dates
+    {'target': 'registration_date', 'source': 'reg_date', 'prefer_source': 'when_blank'},
+    # _merge_status
+    {'target': 'status', 'source': 'customer_status', 'prefer_source': 'when_blank'},
+]
+
+# city/state/status/gender lookup tables (config/normalizers.json), built once
+CUSTOMER_NORMALIZERS = load_normalizers('customers')
+
+def clean_customer_data(df, context=None, optimize=True, phone_style='us'):
     """
     Cleans customer data with improved support for downstream joins and formatting.
+    `context` holds extra inputs (e.g. related tables) for the consistency rules.
+    With `optimize`, the result goes through utils.memory.optimize_memory.
+    `phone_style` is a utils.normalize.PHONE_STYLES layout ('us' or 'e164').
     """
     df_clean = df.copy()
+    profiler = StageProfiler('clean_customer_data')
 
     # 🔧 Keep customer_id intact; drop cust_id instead
     print("Step 1: Resolving duplicate columns...")
-    df_clean.drop('cust_id', axis=1, inplace=True)
+    with profiler.stage('1. Merge duplicate columns', lambda: df_clean):
+        df_clean.drop('cust_id', axis=1, inplace=True)
 
-    # Merge customer_name and full_name
-    df_clean['customer_name'] = df_clean.apply(
-        lambda row: _merge_names(row['customer_name'], row['full_name']), axis=1
-    )
-    df_clean.drop('full_name', axis=1, inplace=True)
-
-    # Merge email columns
-    df_clean['email'] = df_clean.apply(
-        lambda row: _merge_emails(row['email'], row['email_address']), axis=1
-    )
-    df_clean.drop('email_address', axis=1, inplace=True)
-
-    # Merge phone columns
-    df_clean['phone'] = df_clean.apply(
-        lambda row: _merge_phones(row['phone'], row['phone_number']), axis=1
-    )
-    df_clean.drop('phone_number', axis=1, inplace=True)
-
-    # Merge zip code columns
-    df_clean['zip_code'] = df_clean.apply(
-        lambda row: _merge_zip_codes(row['zip_code'], row['postal_code']), axis=1
-    )
-    df_clean.drop('postal_code', axis=1, inplace=True)
-
-    # Merge registration date columns
-    df_clean['registration_date'] = df_clean.apply(
-        lambda row: _merge_dates(row['registration_date'], row['reg_date']), axis=1
-    )
-    df_clean.drop('reg_date', axis=1, inplace=True)
-
-    # Merge status columns
-    df_clean['status'] = df_clean.apply(
-        lambda row: _merge_status(row['status'], row['customer_status']), axis=1
-    )
-    df_clean.drop('customer_status', axis=1, inplace=True)
+        # Merge the duplicated column pairs column-wise (see CUSTOMER_MERGE_RULES)
+        df_clean = merge_columns(df_clean, CUSTOMER_MERGE_RULES)
 
     print("Step 2: Standardizing data formats...")
-    df_clean['phone'] = df_clean['phone'].apply(_standardize_phone)
-    df_clean['registration_date'] = df_clean['registration_date'].apply(_standardize_date)
-    df_clean['birth_date'] = df_clean['birth_date'].apply(_standardize_date)
-    df_clean['city'] = df_clean['city'].apply(_standardize_city)
-    df_clean['state'] = df_clean['state'].apply(_standardize_state)
-    df_clean['status'] = df_clean['status'].apply(_standardize_status)
-    df_clean['gender'] = df_clean['gender'].apply(_standardize_gender)
+    with profiler.stage('2a. Normalize phones', lambda: df_clean):
+        df_clean['phone'], failures = normalize_phones(df_clean['phone'], phone_style)
+        print(f"  - Normalized 'phone': {failures} values could not be normalized")
+    with profiler.stage('2b. Parse dates', lambda: df_clean):
+        for col in ['registration_date', 'birth_date']:
+            df_clean[col], hits = parse_dates(df_clean[col], CUSTOMER_DATE_FORMATS, fallback=True)
+            print(f"  - Parsed '{col}': {hits}")
+    with profiler.stage('2c. Normalize city/state/status/gender', lambda: df_clean):
+        df_clean = normalize_columns(df_clean, CUSTOMER_NORMALIZERS)
 
     print("Step 3: Handling missing values...")
-    null_values = ['', 'null', 'NULL', 'None', 'nan', 'NaN']
-    df_clean = df_clean.replace(null_values, np.nan)
-    df_clean = df_clean.replace(r'^\s*$', np.nan, regex=True)
+    with profiler.stage('3. Replace null markers', lambda: df_clean):
+        null_values = ['', 'null', 'NULL', 'None', 'nan', 'NaN']
+        df_clean = df_clean.replace(null_values, np.nan)
+        df_clean = df_clean.replace(r'^\s*$', np.nan, regex=True)
 
     print("Step 4: Correcting data types...")
-    df_clean['total_orders'] = pd.to_numeric(df_clean['total_orders'], errors='coerce')
-    df_clean['total_spent'] = pd.to_numeric(df_clean['total_spent'], errors='coerce')
-    df_clean['loyalty_points'] = pd.to_numeric(df_clean['loyalty_points'], errors='coerce')
-    df_clean['age'] = pd.to_numeric(df_clean['age'], errors='coerce')
+    with profiler.stage('4. Correct data types', lambda: df_clean):
+        df_clean['total_orders'] = pd.to_numeric(df_clean['total_orders'], errors='coerce')
+        df_clean['total_spent'] = pd.to_numeric(df_clean['total_spent'], errors='coerce')
+        df_clean['loyalty_points'] = pd.to_numeric(df_clean['loyalty_points'], errors='coerce')
+        df_clean['age'] = pd.to_numeric(df_clean['age'], errors='coerce')
 
-    # 🔧 Zip code stays string, remove .0 from floats
-    df_clean['zip_code'] = df_clean['zip_code'].astype(str).str.replace(r'\.0$', '', regex=True)
-    df_clean['zip_code'] = df_clean['zip_code'].replace('nan', np.nan)
+        # 🔧 Zip code stays string, remove .0 from floats
+        df_clean['zip_code'] = df_clean['zip_code'].astype(str).str.replace(r'\.0$', '', regex=True)
+        df_clean['zip_code'] = df_clean['zip_code'].replace('nan', np.nan)
 
-    df_clean['registration_date'] = pd.to_datetime(df_clean['registration_date'], errors='coerce')
-    df_clean['birth_date'] = pd.to_datetime(df_clean['birth_date'], errors='coerce')
+        df_clean['registration_date'] = pd.to_datetime(df_clean['registration_date'], errors='coerce')
+        df_clean['birth_date'] = pd.to_datetime(df_clean['birth_date'], errors='coerce')
 
     print("Step 5: Performing data validation...")
-    df_clean['email'] = df_clean['email'].apply(_validate_email)
-    df_clean = _validate_age_consistency(df_clean)
-    df_clean = df_clean.drop_duplicates(subset=['customer_id'], keep='first')
-
-
-    print("Step 6: Generating cleaning summary...")
-    _generate_cleaning_summary(df, df_clean)
-
+    with profiler.stage('5a. Validate emails', lambda: df_clean):
+        df_clean['email'], failures = validate_emails(df_clean['email'])
+        print(f"  - Validated 'email': {failures} invalid values removed")
+    with profiler.stage('5b. Consistency rules', lambda: df_clean):
+        df_clean = _apply_consistency_rules(df_clean, context=context)
+    with profiler.stage('5c. Drop duplicate customers', lambda: df_clean):
+        df_clean = df_clean.drop_duplicates(subset=['customer_id'], keep='first')
+
+    if optimize:
+        print("Step 6: Optimizing memory...")
+        with profiler.stage('6. Optimize memory', lambda: df_clean):
+            df_clean = optimize_memory(df_clean)
+
+    print("Step 7: Generating cleaning summary...")
+    with profiler.stage('7. Cleaning summary', lambda: df_clean):
+        _generate_cleaning_summary(df, df_clean)
+
+    profiler.report()
     return df_clean
 # Helper functions
+# The row-wise _merge_* helpers are the reference behaviour for CUSTOMER_MERGE_RULES.
 def _merge_names(name1, name2):
     """Merge customer name columns, prioritizing more complete names."""
     if pd.isna(name1) and pd.isna(name2):
@@ -167,132 +187,47 @@ def _merge_status(status1, status2):
         return status1
     return status1
 
-def _standardize_phone(phone):
-    """Standardize phone number format."""
-    if pd.isna(phone):
-        return np.nan
-    
-    # Remove all non-digit characters
-    phone_digits = re.sub(r'\D', '', str(phone))
-    
-    # Format as (XXX) XXX-XXXX for 10-digit numbers
-    if len(phone_digits) == 10:
-        return f"({phone_digits[:3]}) {phone_digits[3:6]}-{phone_digits[6:]}"
-    elif len(phone_digits) == 11 and phone_digits[0] == '1':
-        # Handle 11-digit numbers starting with 1
-        return f"({phone_digits[1:4]}) {phone_digits[4:7]}-{phone_digits[7:]}"
-    else:
-        return phone  # Return original if format is unclear
+def _age_from_birth_date(df, context):
+    """Age implied by birth_date (current year minus birth year)."""
+    return datetime.now().year - df['birth_date'].dt.year
 
-def _standardize_date(date_str):
-    """Standardize date format to YYYY-MM-DD."""
-    if pd.isna(date_str) or str(date_str).strip() == '':
-        return np.nan
-    
-    try:
-        # Try different date formats
-        for fmt in ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d']:
-            try:
-                return datetime.strptime(str(date_str), fmt).strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-        return date_str  # Return original if no format matches
-    except:
-        return np.nan
-
-def _standardize_city(city):
-    """Standardize city names."""
-    if pd.isna(city):
-        return np.nan
-    
-    city_mapping = {
-        'nyc': 'New York',
-        'la': 'Los Angeles',
-        'chi': 'Chicago',
-        'houston': 'Houston',
-        'phoenix': 'Phoenix'
-    }
-    
-    city_clean = str(city).strip().lower()
-    return city_mapping.get(city_clean, str(city).title())
-
-def _standardize_state(state):
-    """Standardize state names to abbreviations."""
-    if pd.isna(state):
-        return np.nan
-    
-    state_mapping = {
-        'california': 'CA',
-        'new york': 'NY',
-        'texas': 'TX',
-        'illinois': 'IL',
-        'arizona': 'AZ',
-        'pennsylvania': 'PA',
-        'florida': 'FL'
-    }
-    
-    state_clean = str(state).strip().lower()
-    return state_mapping.get(state_clean, str(state).upper())
-
-def _standardize_status(status):
-    """Standardize status values."""
-    if pd.isna(status):
-        return np.nan
-    
-    status_mapping = {
-        'active': 'Active',
-        'inactive': 'Inactive',
-        'suspended': 'Suspended',
-        'pending': 'Pending'
-    }
-    
-    status_clean = str(status).strip().lower()
-    return status_mapping.get(status_clean, str(status).title())
-
-def _standardize_gender(gender):
-    """Standardize gender values."""
-    if pd.isna(gender):
-        return np.nan
-    
-    gender_mapping = {
-        'f': 'Female',
-        'female': 'Female',
-        'm': 'Male',
-        'male': 'Male',
-        'other': 'Other'
-    }
-    
-    gender_clean = str(gender).strip().lower()
-    return gender_mapping.get(gender_clean, str(gender).title())
-
-def _validate_email(email):
-    """Validate email format."""
-    if pd.isna(email):
-        return np.nan
-    
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if re.match(email_pattern, str(email)):
-        return email
-    return np.nan  # Invalid email becomes null
+def _age_inconsistent(df, context):
+    """Rows with a birth_date whose age is missing or off by more than 1 year."""
+    calculated_age = _age_from_birth_date(df, context)
+    return df['birth_date'].notna() & (
+        df['age'].isna() | ((calculated_age - df['age']).abs() > 1)
+    )
 
-def _validate_age_consistency(df):
-    """Validate age consistency with birth_date."""
-    current_year = datetime.now().year
-    
-    for idx, row in df.iterrows():
-        if pd.notna(row['birth_date']) and pd.notna(row['age']):
-            birth_year = pd.to_datetime(row['birth_date']).year
-            calculated_age = current_year - birth_year
-            
-            # If ages differ by more than 1 year, prioritize calculated age
-            if abs(calculated_age - row['age']) > 1:
-                df.loc[idx, 'age'] = calculated_age
-        
-        elif pd.notna(row['birth_date']) and pd.isna(row['age']):
-            # Calculate age from birth_date
-            birth_year = pd.to_datetime(row['birth_date']).year
-            df.loc[idx, 'age'] = current_year - birth_year
-    
+# Cross-field consistency rules, applied in order by _apply_consistency_rules.
+# `check(df, context)` returns a boolean mask of violating rows and
+# `fix(df, context)` the corrected `target` values (written only where the mask
+# is True). `requires` lists the columns that must exist and `context_keys` the
+# extra inputs (e.g. an orders frame) that must be passed in `context`;
+# rules whose inputs are missing are skipped.
+CONSISTENCY_RULES = [
+    {
+        'name': 'age_vs_birth_date',
+        'target': 'age',
+        'requires': ['age', 'birth_date'],
+        'context_keys': [],
+        'check': _age_inconsistent,
+        'fix': _age_from_birth_date,
+    },
+]
+
+def _apply_consistency_rules(df, rules=CONSISTENCY_RULES, context=None):
+    """Apply column-level cross-field consistency rules."""
+    context = context or {}
+    for rule in rules:
+        if not all(col in df.columns for col in rule['requires']):
+            continue
+        if not all(key in context for key in rule.get('context_keys', [])):
+            print(f"  - Skipped '{rule['name']}' (missing context)")
+            continue
+        mask = rule['check'](df, context)
+        if mask.any():
+            df.loc[mask, rule['target']] = rule['fix'](df, context)[mask]
+        print(f"  - {rule['name']}: corrected {int(mask.sum())} '{rule['target']}' values")
     return df
 
 def _generate_cleaning_summary(df_original, df_clean):
@@ -316,14 +251,24 @@ def _generate_cleaning_summary(df_original, df_clean):
     
     print("\nCleaning completed successfully!")
 
-# Example usage
-if __name__ == "__main__":
-    file_path = os.path.join(os.path.dirname(__file__), '..', 'Data', 'customers_messy_data.json')
-    df = pd.read_json(file_path)
-    df_cleaned = clean_customer_data(df)
-    file_path = os.path.join(os.path.dirname(__file__), '..', 'cleaned', 'customers_cleaned_data.json')
-    df_cleaned.to_json(file_path, orient='records', indent=2)
-
-    print("\n Cleaned data saved to 'customers_cleaned_data.json'")
+def main():
+    parser = argparse.ArgumentParser(description="Clean the customers dataset.")
+    parser.add_argument('--input', default=os.path.join(os.path.dirname(__file__), '..', 'Data', 'customers_messy_data.json'))
+    parser.add_argument('--output', default=None,
+                        help="Output file; its extension picks the format (default: cleaned/customers_cleaned_data.<format>)")
+    parser.add_argument('--format', choices=list(STORAGE_FORMATS), default=DEFAULT_FORMAT)
+    parser.add_argument('--phone-format', choices=list(PHONE_STYLES), default='us',
+                        help="Phone number layout: 'us' -> (555) 123-4567, 'e164' -> +15551234567")
+    args = parser.parse_args()
+    output = args.output or cleaned_path(os.path.join(os.path.dirname(__file__), '..', 'cleaned'), 'customers', args.format)
+
+    df = pd.read_json(args.input)
+    df_cleaned = clean_customer_data(df, phone_style=args.phone_format)
+    write_frame(df_cleaned, output)
+
+    print(f"\n Cleaned data saved to '{os.path.basename(output)}'")
     print(df_cleaned.head())
+    return df_cleaned
 
+if __name__ == "__main__":
+    main()
@@ -2,47 +2,91 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
+import argparse
+import contextlib
 import warnings
 import os
+import sys
 warnings.filterwarnings('ignore')
 
-def clean_orders_dataset(df):
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.dates import parse_dates
+from utils.memory import optimize_memory
+from utils.profiling import StageProfiler
+from utils.resources import peak_rss_mb
+from utils.storage import DEFAULT_FORMAT, STORAGE_FORMATS, FrameWriter, cleaned_path, write_frame
+
+# Explicit order_date formats, highest priority first; anything else is inferred
+ORDER_DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y']
+
+# Text columns of the raw CSV, read as strings: inferred per chunk, a chunk in
+# which one of them is entirely blank would come back as float64
+CSV_DTYPES = {col: str for col in [
+    'order_id', 'cust_id', 'order_date', 'order_datetime', 'product_id', 'status', 'order_status',
+    'payment_method', 'shipping_address', 'notes', 'tracking_number',
+]}
+
+def clean_orders_dataset(df, notes_stats=None, optimize=True, profiler=None):
     """
     Clean the orders dataset with relational awareness and data consistency.
+    `notes_stats` (see scan_notes_statistics) replaces the in-frame notes
+    statistics when `df` is only one chunk of the full file. With `optimize`,
+    the result goes through utils.memory.optimize_memory. A `profiler` passed
+    in collects the steps and is reported by the caller, once per run.
     """
     cleaned_df = df.copy()
+    own_profiler = profiler is None
+    if own_profiler:
+        profiler = StageProfiler('clean_orders_dataset')
     print("Starting data cleaning process...")
     print(f"Original dataset shape: {cleaned_df.shape}")
 
     # 1. Handle duplicate columns
-    cleaned_df = remove_duplicate_columns(cleaned_df)
+    with profiler.stage('1. remove_duplicate_columns', lambda: cleaned_df):
+        cleaned_df = remove_duplicate_columns(cleaned_df)
 
     # 2. Standardize date formats
-    cleaned_df = standardize_date_formats(cleaned_df)
+    with profiler.stage('2. standardize_date_formats', lambda: cleaned_df):
+        cleaned_df = standardize_date_formats(cleaned_df)
 
     # 3. Handle missing values
-    cleaned_df = handle_missing_values(cleaned_df)
+    with profiler.stage('3. handle_missing_values', lambda: cleaned_df):
+        cleaned_df = handle_missing_values(cleaned_df)
 
     # 4. Standardize status columns
-    cleaned_df = standardize_status_columns(cleaned_df)
+    with profiler.stage('4. standardize_status_columns', lambda: cleaned_df):
+        cleaned_df = standardize_status_columns(cleaned_df)
 
     # 5. Flag quantity conflicts before merging
-    cleaned_df = flag_quantity_conflict(cleaned_df)
+    with profiler.stage('5. flag_quantity_conflict', lambda: cleaned_df):
+        cleaned_df = flag_quantity_conflict(cleaned_df)
 
     # 6. Fix quantity mismatches (merge)
-    cleaned_df = fix_quantity_columns(cleaned_df)
+    with profiler.stage('6. fix_quantity_columns', lambda: cleaned_df):
+        cleaned_df = fix_quantity_columns(cleaned_df)
 
     # 7. Recalculate financial columns
-    cleaned_df = recalculate_financial_columns(cleaned_df)
+    with profiler.stage('7. recalculate_financial_columns', lambda: cleaned_df):
+        cleaned_df = recalculate_financial_columns(cleaned_df)
 
     # 8. Handle low-value columns
-    cleaned_df = handle_low_value_columns(cleaned_df)
+    with profiler.stage('8. handle_low_value_columns', lambda: cleaned_df):
+        cleaned_df = handle_low_value_columns(cleaned_df, notes_stats)
 
     # 9. Final data validation
-    cleaned_df = final_data_validation(cleaned_df)
+    with profiler.stage('9. final_data_validation', lambda: cleaned_df):
+        cleaned_df = final_data_validation(cleaned_df)
+
+    # 10. Shrink dtypes (categories, downcast numerics)
+    if optimize:
+        print("Optimizing memory...")
+        with profiler.stage('10. optimize_memory', lambda: cleaned_df):
+            cleaned_df = optimize_memory(cleaned_df)
 
     print(f"Cleaned dataset shape: {cleaned_df.shape}")
     print("Data cleaning completed successfully!")
+    if own_profiler:
+        profiler.report()
 
     return cleaned_df
 
@@ -61,24 +105,9 @@ def remove_duplicate_columns(df):
 
 def standardize_date_formats(df):
     print("Standardizing date formats...")
-
-    def parse_date(date_str):
-        if pd.isna(date_str) or date_str == '':
-            return pd.NaT
-        formats = ['%m/%d/%Y', '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y']
-        for fmt in formats:
-            try:
-                return pd.to_datetime(date_str, format=fmt)
-            except:
-                continue
-        try:
-            return pd.to_datetime(date_str)
-        except:
-            return pd.NaT
-
     if 'order_date' in df.columns:
-        df['order_date'] = df['order_date'].apply(parse_date)
-        print("  - Standardized 'order_date'")
+        df['order_date'], hits = parse_dates(df['order_date'], ORDER_DATE_FORMATS, fallback=True, strip_blank=False)
+        print(f"  - Standardized 'order_date': {hits}")
     if 'order_datetime' in df.columns:
         df['order_datetime'] = pd.to_datetime(df['order_datetime'], errors='coerce')
         print("  - Standardized 'order_datetime'")
@@ -92,12 +121,18 @@ def handle_missing_values(df):
         print(f"  - Filled {mask.sum()} missing order_date values from order_datetime")
 
         mask = df['order_datetime'].isna() & df['order_date'].notna()
-        df.loc[mask, 'order_datetime'] = pd.to_datetime(df.loc[mask, 'order_date'].astype(str) + ' 12:00:00')
+        filled = pd.to_datetime(df.loc[mask, 'order_date'].astype(str) + ' 12:00:00')
+        # Keep the column a single tz-aware dtype so columnar formats can store it
+        if isinstance(df['order_datetime'].dtype, pd.DatetimeTZDtype):
+            filled = filled.dt.tz_localize(df['order_datetime'].dt.tz)
+        df.loc[mask, 'order_datetime'] = filled
         print(f"  - Filled {mask.sum()} missing order_datetime values")
 
     if 'tracking_number' in df.columns and 'status' in df.columns:
         shipped_mask = df['status'].str.upper().isin(['SHIPPED', 'DELIVERED']) & df['tracking_number'].isna()
-        df.loc[shipped_mask, 'tracking_number'] = 'TRK' + np.random.randint(100000, 999999, size=shipped_mask.sum()).astype(str)
+        # Derived from order_id, so re-cleaning the same order gives the same placeholder (and row hash)
+        order_hash = pd.util.hash_pandas_object(df.loc[shipped_mask, 'order_id'].astype(str), index=False)
+        df.loc[shipped_mask, 'tracking_number'] = 'TRK' + (order_hash % 900000 + 100000).astype(str)
         print(f"  - Generated {shipped_mask.sum()} tracking numbers for shipped/delivered orders")
 
     return df
@@ -158,11 +193,13 @@ def recalculate_financial_columns(df):
         print("  - Recalculated totals and added 'total_mismatch' flag")
     return df
 
-def handle_low_value_columns(df):
+def handle_low_value_columns(df, notes_stats=None):
     print("Handling low-value columns...")
     if 'notes' in df.columns:
-        null_pct = df['notes'].isna().sum() / len(df) * 100
-        if null_pct > 75 and df['notes'].nunique() <= 2:
+        if notes_stats is None:
+            notes_stats = {'rows': len(df), 'nulls': df['notes'].isna().sum(), 'distinct': df['notes'].nunique()}
+        null_pct = notes_stats['nulls'] / notes_stats['rows'] * 100
+        if null_pct > 75 and notes_stats['distinct'] <= 2:
             df.drop('notes', axis=1, inplace=True)
             print("  - Dropped low-value 'notes' column")
         else:
@@ -192,16 +229,79 @@ def generate_data_quality_report(df):
         print(f"{col:20}: {null_pct:.1f}% null | {df[col].nunique()} unique | {df[col].dtype}")
     print("✓ Ready for joining with customers/products")
 
+def scan_notes_statistics(file_path, chunksize):
+    """
+    First pass over the CSV collecting what handle_low_value_columns needs
+    globally: row count, null notes and distinct notes (counted up to 3, which
+    is enough to decide the `<= 2` rule).
+    """
+    stats = {'rows': 0, 'nulls': 0, 'distinct': 0}
+    seen = set()
+    for chunk in pd.read_csv(file_path, usecols=lambda col: col == 'notes', dtype=CSV_DTYPES,
+                             chunksize=chunksize):
+        stats['rows'] += len(chunk)
+        if 'notes' not in chunk.columns:
+            continue
+        stats['nulls'] += int(chunk['notes'].isna().sum())
+        if len(seen) <= 2:
+            seen.update(chunk['notes'].dropna().unique()[:3])
+    stats['distinct'] = len(seen)
+    return stats
+
+def clean_orders_streaming(input_path, output_path, chunksize=100_000):
+    """
+    Clean a large orders CSV chunk by chunk with bounded memory.
+
+    Every cleaning step is row-local except the notes null/distinct check,
+    which is taken from a first statistics pass. Cleaned chunks are appended
+    to `output_path` (csv, parquet or feather) as they are produced.
+    """
+    # One profile for the whole file: every chunk adds to the same steps
+    profiler = StageProfiler('clean_orders_dataset')
+    print(f"Scanning '{input_path}' for global statistics...")
+    with profiler.stage('0. scan_notes_statistics'):
+        notes_stats = scan_notes_statistics(input_path, chunksize)
+    print(f"  - {notes_stats['rows']} rows, notes: {notes_stats}")
+
+    rows_written = 0
+    with FrameWriter(output_path) as writer:
+        for chunk_no, chunk in enumerate(pd.read_csv(input_path, dtype=CSV_DTYPES, chunksize=chunksize), start=1):
+            # The per-step messages are the same for every chunk; keep only progress lines
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                # Unoptimized: per-chunk categories/downcasts would change the schema between chunks
+                cleaned_chunk = clean_orders_dataset(chunk, notes_stats, optimize=False, profiler=profiler)
+            with profiler.stage('11. write_chunk', lambda: cleaned_chunk):
+                writer.write(cleaned_chunk)
+            rows_written += len(cleaned_chunk)
+            print(f"  - Chunk {chunk_no}: {rows_written} rows written, peak RSS {peak_rss_mb():.1f} MB")
+
+    print(f"Streaming clean completed: {rows_written} rows, peak RSS {peak_rss_mb():.1f} MB")
+    profiler.report()
+    return rows_written
+
 def main():
-    file_path = os.path.join(os.path.dirname(__file__), '..', 'Data', 'orders_unstructured_data.csv')
-    df = pd.read_csv(file_path)
+    parser = argparse.ArgumentParser(description="Clean the orders dataset.")
+    parser.add_argument('--input', default=os.path.join(os.path.dirname(__file__), '..', 'Data', 'orders_unstructured_data.csv'))
+    parser.add_argument('--output', default=None,
+                        help="Output file; its extension picks the format (default: cleaned/orders_cleaned_data.<format>)")
+    parser.add_argument('--format', choices=list(STORAGE_FORMATS), default=DEFAULT_FORMAT)
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows instead of loading it whole")
+    args = parser.parse_args()
+    output = args.output or cleaned_path(os.path.join(os.path.dirname(__file__), '..', 'cleaned'), 'orders', args.format)
+
+    if args.chunksize:
+        clean_orders_streaming(args.input, output, args.chunksize)
+        print("\n Cleaned orders saved.")
+        return None
+
+    df = pd.read_csv(args.input, dtype=CSV_DTYPES)
 
     cleaned_df = clean_orders_dataset(df)
 
     generate_data_quality_report(cleaned_df)
 
-    output_path = os.path.join(os.path.dirname(__file__), '..', 'cleaned', 'orders_cleaned_data.csv')
-    cleaned_df.to_csv(output_path, index=False)
+    write_frame(cleaned_df, output)
     print("\n Cleaned orders saved.")
 
     return cleaned_df
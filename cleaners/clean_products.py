@@ -2,157 +2,194 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
+import argparse
+import contextlib
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def clean_product_dataset(df):
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.dates import parse_dates
+from utils.memory import optimize_memory
+from utils.profiling import StageProfiler
+from utils.storage import DEFAULT_FORMAT, STORAGE_FORMATS, cleaned_path, write_frame
+
+# ISO timestamps ('...T...Z') and plain ISO dates; anything else becomes NaT
+PRODUCT_DATE_FORMATS = ['%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%d']
+
+def clean_product_dataset(df, optimize=True, profiler=None):
     """
     Clean the product dataset by addressing missing values, formatting issues,
     and standardizing categorical/numerical values. Includes improvements based
     on relational analysis (e.g., category conflicts, is_active checks).
+    With `optimize`, the result goes through utils.memory.optimize_memory.
+    A `profiler` passed in collects the steps and is reported by the caller.
     """
     cleaned_df = df.copy()
+    own_profiler = profiler is None
+    if own_profiler:
+        profiler = StageProfiler('clean_product_dataset')
     print("Starting data cleaning process...")
     print(f"Initial dataset shape: {cleaned_df.shape}")
 
     # 1. Convert empty strings to NaN
-    print("\n1. Converting empty strings to NaN...")
-    string_columns = ['description', 'brand', 'manufacturer', 'color', 'size',
-                      'supplier_id', 'created_date', 'last_updated', 'dimensions']
-    for col in string_columns:
-        if col in cleaned_df.columns:
-            cleaned_df[col] = cleaned_df[col].replace('', np.nan)
+    with profiler.stage('1. Convert empty strings to NaN', lambda: cleaned_df):
+        print("\n1. Converting empty strings to NaN...")
+        string_columns = ['description', 'brand', 'manufacturer', 'color', 'size',
+                          'supplier_id', 'created_date', 'last_updated', 'dimensions']
+        for col in string_columns:
+            if col in cleaned_df.columns:
+                # where() keeps the object dtype even if every value becomes NaN
+                cleaned_df[col] = cleaned_df[col].where(cleaned_df[col] != '', np.nan)
 
     # 2. Convert price-related fields to numeric
-    print("\n2. Converting price columns to proper numeric types...")
-    price_columns = ['price', 'list_price', 'cost', 'weight']
-    for col in price_columns:
-        if col in cleaned_df.columns:
-            cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce')
+    with profiler.stage('2. Convert price-related fields to numeric', lambda: cleaned_df):
+        print("\n2. Converting price columns to proper numeric types...")
+        price_columns = ['price', 'list_price', 'cost', 'weight']
+        for col in price_columns:
+            if col in cleaned_df.columns:
+                cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce')
 
     # 3. Standardize category and product_category
-    print("\n3. Standardizing category and product_category...")
-    category_mapping = {
-        'clothing': 'Clothing', 'CLOTHING': 'Clothing',
-        'electronics': 'Electronics', 'ELECTRONICS': 'Electronics',
-        'sports': 'Sports', 'SPORTS': 'Sports',
-        'toys': 'Toys', 'TOYS': 'Toys',
-        'books': 'Books', 'BOOKS': 'Books',
-        'home & garden': 'Home & Garden', 'HOME & GARDEN': 'Home & Garden'
-    }
+    with profiler.stage('3. Standardize category and product_category', lambda: cleaned_df):
+        print("\n3. Standardizing category and product_category...")
+        category_mapping = {
+            'clothing': 'Clothing', 'CLOTHING': 'Clothing',
+            'electronics': 'Electronics', 'ELECTRONICS': 'Electronics',
+            'sports': 'Sports', 'SPORTS': 'Sports',
+            'toys': 'Toys', 'TOYS': 'Toys',
+            'books': 'Books', 'BOOKS': 'Books',
+            'home & garden': 'Home & Garden', 'HOME & GARDEN': 'Home & Garden'
+        }
 
-    def standardize_category(val):
-        val = str(val).strip().lower() if isinstance(val, str) else val
-        return category_mapping.get(val, str(val).title() if isinstance(val, str) else val)
+        def standardize_category(val):
+            val = str(val).strip().lower() if isinstance(val, str) else val
+            return category_mapping.get(val, str(val).title() if isinstance(val, str) else val)
 
-    cleaned_df['category'] = cleaned_df['category'].apply(standardize_category)
-    cleaned_df['product_category'] = cleaned_df['product_category'].apply(standardize_category)
+        cleaned_df['category'] = cleaned_df['category'].apply(standardize_category)
+        cleaned_df['product_category'] = cleaned_df['product_category'].apply(standardize_category)
 
-    # 🔧 New: Resolve into single unified category
-    cleaned_df['final_category'] = cleaned_df.apply(
-        lambda row: row['category'] if pd.notna(row['category']) else row['product_category'],
-        axis=1
-    )
+        # 🔧 New: Resolve into single unified category
+        cleaned_df['final_category'] = cleaned_df.apply(
+            lambda row: row['category'] if pd.notna(row['category']) else row['product_category'],
+            axis=1
+        )
 
     # 4. Standardize brand and manufacturer names
-    print("\n4. Standardizing brand and manufacturer names...")
-    def standardize_brand_name(name):
-        if pd.isna(name) or name == '':
-            return np.nan
-        name = re.sub(r'[_-]', ' ', str(name).strip())
-        return ' '.join(word.capitalize() for word in name.split())
+    with profiler.stage('4. Standardize brand and manufacturer names', lambda: cleaned_df):
+        print("\n4. Standardizing brand and manufacturer names...")
+        def standardize_brand_name(name):
+            if pd.isna(name) or name == '':
+                return np.nan
+            name = re.sub(r'[_-]', ' ', str(name).strip())
+            return ' '.join(word.capitalize() for word in name.split())
 
-    cleaned_df['brand'] = cleaned_df['brand'].apply(standardize_brand_name)
-    cleaned_df['manufacturer'] = cleaned_df['manufacturer'].apply(standardize_brand_name)
+        cleaned_df['brand'] = cleaned_df['brand'].apply(standardize_brand_name)
+        cleaned_df['manufacturer'] = cleaned_df['manufacturer'].apply(standardize_brand_name)
 
     # 5. Standardize is_active to boolean
-    print("\n5. Standardizing is_active column...")
-    def standardize_boolean(value):
-        if pd.isna(value): return np.nan
-        value_str = str(value).lower().strip()
-        if value_str in ['true', 'yes', '1', 'active']: return True
-        elif value_str in ['false', 'no', '0', 'inactive']: return False
-        return np.nan
-
-    cleaned_df['is_active'] = cleaned_df['is_active'].apply(standardize_boolean)
-
-    # 🔧 New: Flag rows where is_active is True but price or stock missing
-    cleaned_df['is_active_flag_issue'] = cleaned_df.apply(
-        lambda row: True if row['is_active'] is True and (pd.isna(row['price']) or pd.isna(row['stock_quantity']))
-        else False, axis=1
-    )
+    with profiler.stage('5. Standardize is_active to boolean', lambda: cleaned_df):
+        print("\n5. Standardizing is_active column...")
+        def standardize_boolean(value):
+            if pd.isna(value): return np.nan
+            value_str = str(value).lower().strip()
+            if value_str in ['true', 'yes', '1', 'active']: return True
+            elif value_str in ['false', 'no', '0', 'inactive']: return False
+            return np.nan
+
+        cleaned_df['is_active'] = cleaned_df['is_active'].apply(standardize_boolean)
+
+        # 🔧 New: Flag rows where is_active is True but price or stock missing
+        cleaned_df['is_active_flag_issue'] = cleaned_df.apply(
+            lambda row: True if row['is_active'] is True and (pd.isna(row['price']) or pd.isna(row['stock_quantity']))
+            else False, axis=1
+        )
 
     # 6. Standardize color
-    print("\n6. Standardizing color names...")
-    color_mapping = {
-        'black': 'Black', 'white': 'White', 'red': 'Red',
-        'blue': 'Blue', 'green': 'Green', 'yellow': 'Yellow',
-        'purple': 'Purple', 'orange': 'Orange', 'pink': 'Pink',
-        'brown': 'Brown', 'gray': 'Gray', 'grey': 'Gray'
-    }
-    cleaned_df['color'] = cleaned_df['color'].str.strip().str.lower().map(
-        lambda x: color_mapping.get(x, x.title() if isinstance(x, str) else x)
-    )
+    with profiler.stage('6. Standardize color', lambda: cleaned_df):
+        print("\n6. Standardizing color names...")
+        color_mapping = {
+            'black': 'Black', 'white': 'White', 'red': 'Red',
+            'blue': 'Blue', 'green': 'Green', 'yellow': 'Yellow',
+            'purple': 'Purple', 'orange': 'Orange', 'pink': 'Pink',
+            'brown': 'Brown', 'gray': 'Gray', 'grey': 'Gray'
+        }
+        cleaned_df['color'] = cleaned_df['color'].str.strip().str.lower().map(
+            lambda x: color_mapping.get(x, x.title() if isinstance(x, str) else x)
+        )
 
     # 7. Standardize sizes
-    print("\n7. Standardizing size values...")
-    size_mapping = {
-        'xs': 'XS', 's': 'S', 'm': 'M', 'l': 'L', 'xl': 'XL', 'xxl': 'XXL',
-        'one size': 'One Size', 'onesize': 'One Size'
-    }
-    cleaned_df['size'] = cleaned_df['size'].str.strip().str.lower().map(
-        lambda x: size_mapping.get(x, x.upper() if isinstance(x, str) else x)
-    )
+    with profiler.stage('7. Standardize sizes', lambda: cleaned_df):
+        print("\n7. Standardizing size values...")
+        size_mapping = {
+            'xs': 'XS', 's': 'S', 'm': 'M', 'l': 'L', 'xl': 'XL', 'xxl': 'XXL',
+            'one size': 'One Size', 'onesize': 'One Size'
+        }
+        cleaned_df['size'] = cleaned_df['size'].str.strip().str.lower().map(
+            lambda x: size_mapping.get(x, x.upper() if isinstance(x, str) else x)
+        )
 
     # 8. Parse date columns
-    print("\n8. Cleaning date columns...")
-    def parse_date(val):
-        if pd.isna(val) or val == '':
-            return np.nan
-        try:
-            if 'T' in str(val):
-                return pd.to_datetime(val, format='%Y-%m-%dT%H:%M:%S.%fZ')
-            return pd.to_datetime(val, format='%Y-%m-%d')
-        except:
-            return np.nan
-
-    cleaned_df['created_date'] = cleaned_df['created_date'].apply(parse_date)
-    cleaned_df['last_updated'] = cleaned_df['last_updated'].apply(parse_date)
+    with profiler.stage('8. Parse date columns', lambda: cleaned_df):
+        print("\n8. Cleaning date columns...")
+        for col in ['created_date', 'last_updated']:
+            cleaned_df[col], hits = parse_dates(cleaned_df[col], PRODUCT_DATE_FORMATS, strip_blank=False)
+            print(f"  - Parsed '{col}': {hits}")
 
     # 9. Validate dimensions
-    print("\n9. Validating dimensions format...")
-    def validate_dimensions(dim_str):
-        if pd.isna(dim_str) or dim_str == '':
+    with profiler.stage('9. Validate dimensions', lambda: cleaned_df):
+        print("\n9. Validating dimensions format...")
+        def validate_dimensions(dim_str):
+            if pd.isna(dim_str) or dim_str == '':
+                return np.nan
+            if re.match(r'^\d+x\d+x\d+$', str(dim_str)):
+                return dim_str
             return np.nan
-        if re.match(r'^\d+x\d+x\d+$', str(dim_str)):
-            return dim_str
-        return np.nan
-    cleaned_df['dimensions'] = cleaned_df['dimensions'].apply(validate_dimensions)
+        cleaned_df['dimensions'] = cleaned_df['dimensions'].apply(validate_dimensions)
 
     # 10. Compare category vs product_category
-    print("\n10. Checking category consistency...")
-    cleaned_df['category_mismatch'] = (
-        cleaned_df['category'] != cleaned_df['product_category']
-    ) & cleaned_df['category'].notna() & cleaned_df['product_category'].notna()
+    with profiler.stage('10. Compare category vs product_category', lambda: cleaned_df):
+        print("\n10. Checking category consistency...")
+        cleaned_df['category_mismatch'] = (
+            cleaned_df['category'] != cleaned_df['product_category']
+        ) & cleaned_df['category'].notna() & cleaned_df['product_category'].notna()
 
     # 11. Validate numeric ranges
-    print("\n11. Validating numeric ranges...")
-    for col in ['price', 'list_price', 'cost']:
-        cleaned_df.loc[cleaned_df[col] < 0, col] = np.nan
+    with profiler.stage('11. Validate numeric ranges', lambda: cleaned_df):
+        print("\n11. Validating numeric ranges...")
+        for col in ['price', 'list_price', 'cost']:
+            cleaned_df.loc[cleaned_df[col] < 0, col] = np.nan
 
-    for col in ['stock_quantity', 'stock_level', 'reorder_level']:
-        cleaned_df.loc[cleaned_df[col] < 0, col] = 0
+        for col in ['stock_quantity', 'stock_level', 'reorder_level']:
+            cleaned_df.loc[cleaned_df[col] < 0, col] = 0
 
-    if 'rating' in cleaned_df.columns:
-        cleaned_df['rating'] = pd.to_numeric(cleaned_df['rating'], errors='coerce')
-        cleaned_df.loc[(cleaned_df['rating'] < 0) | (cleaned_df['rating'] > 5), 'rating'] = np.nan
+        if 'rating' in cleaned_df.columns:
+            cleaned_df['rating'] = pd.to_numeric(cleaned_df['rating'], errors='coerce')
+            cleaned_df.loc[(cleaned_df['rating'] < 0) | (cleaned_df['rating'] > 5), 'rating'] = np.nan
 
     # 12. Handle item_id vs product_id (keep both for now)
-    print("\n12. Checking item_id vs product_id mapping...")
+    with profiler.stage('12. Handle item_id vs product_id (keep both for now)', lambda: cleaned_df):
+        print("\n12. Checking item_id vs product_id mapping...")
+
+        # 🔧 Future: validate if item_id is always consistent with product_id via cross-dataset
+
+    # 13. Shrink dtypes (categories, downcast numerics)
+    if optimize:
+        print("\n13. Optimizing memory...")
+        with profiler.stage('13. Shrink dtypes (categories, downcast numerics)', lambda: cleaned_df):
+            cleaned_df = optimize_memory(cleaned_df)
+
+    # 14. Cleaning Summary
+    with profiler.stage('14. Cleaning Summary', lambda: cleaned_df):
+        print("\n14. Creating data quality summary...")
+        _print_cleaning_summary(cleaned_df)
 
-    # 🔧 Future: validate if item_id is always consistent with product_id via cross-dataset
+    if own_profiler:
+        profiler.report()
 
-    # 13. Cleaning Summary
-    print("\n13. Creating data quality summary...")
+    return cleaned_df
+
+def _print_cleaning_summary(cleaned_df):
     missing_summary = (cleaned_df.isnull().sum() / len(cleaned_df) * 100).round(2)
     missing_summary = missing_summary[missing_summary > 0].sort_values(ascending=False)
 
@@ -162,6 +199,43 @@ def clean_product_dataset(df):
     for col, pct in missing_summary.items():
         print(f"  {col}: {pct}%")
 
+def _clean_product_shard(shard):
+    # Every shard would repeat the same step messages; the caller prints one summary
+    # and reports the stage records of all shards as one profile
+    profiler = StageProfiler('clean_product_dataset')
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return clean_product_dataset(shard, optimize=False, profiler=profiler), profiler.records
+
+def clean_product_dataset_parallel(df, workers=None, shards=None, optimize=True):
+    """
+    clean_product_dataset over `shards` row partitions in a pool of `workers`
+    processes (default: one per CPU, four shards per worker). Every cleaning
+    step is row-local, so the shards are cleaned independently and
+    concatenated in their original order, giving the same frame as a serial
+    run. Memory optimization runs once on the concatenated frame.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4
+    if workers <= 1 or shards <= 1 or len(df) < 2:
+        return clean_product_dataset(df, optimize=optimize)
+
+    bounds = np.linspace(0, len(df), min(shards, len(df)) + 1).astype(int)
+    parts = [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    print(f"Cleaning {len(df)} products in {len(parts)} shards on {workers} workers...")
+    profiler = StageProfiler('clean_product_dataset')
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        cleaned_parts = []
+        for cleaned_part, records in pool.map(_clean_product_shard, parts):
+            cleaned_parts.append(cleaned_part)
+            profiler.merge(records)
+    with profiler.stage('Concatenate shards'):
+        cleaned_df = pd.concat(cleaned_parts)
+    if optimize:
+        with profiler.stage('13. Shrink dtypes (categories, downcast numerics)', lambda: cleaned_df):
+            cleaned_df = optimize_memory(cleaned_df)
+
+    _print_cleaning_summary(cleaned_df)
+    profiler.report()
     return cleaned_df
 
 def generate_cleaning_report(original_df, cleaned_df):
@@ -180,16 +254,31 @@ def generate_cleaning_report(original_df, cleaned_df):
         }
     }
 
-# Example usage:
-if __name__ == "__main__":
-    file_path = os.path.join(os.path.dirname(__file__), '..', 'Data', 'products_inconsistent_data.json')
-    df = pd.read_json(file_path)
-
-    cleaned_df = clean_product_dataset(df)
+def main():
+    parser = argparse.ArgumentParser(description="Clean the products dataset.")
+    parser.add_argument('--input', default=os.path.join(os.path.dirname(__file__), '..', 'Data', 'products_inconsistent_data.json'))
+    parser.add_argument('--output', default=None,
+                        help="Output file; its extension picks the format (default: cleaned/products_cleaned_data.<format>)")
+    parser.add_argument('--format', choices=list(STORAGE_FORMATS), default=DEFAULT_FORMAT)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Clean row shards in this many processes (0 = one per CPU)")
+    parser.add_argument('--shards', type=int, default=None, help="Row shards for --workers (default: 4 per worker)")
+    args = parser.parse_args()
+    output = args.output or cleaned_path(os.path.join(os.path.dirname(__file__), '..', 'cleaned'), 'products', args.format)
+
+    df = pd.read_json(args.input)
+
+    if args.workers == 1:
+        cleaned_df = clean_product_dataset(df)
+    else:
+        cleaned_df = clean_product_dataset_parallel(df, workers=args.workers or None, shards=args.shards)
 
     report = generate_cleaning_report(df, cleaned_df)
 
-    save_path = os.path.join(os.path.dirname(__file__), '..', 'cleaned', 'products_cleaned_data.json')
-    cleaned_df.to_json(save_path, orient='records', indent=2)
+    write_frame(cleaned_df, output)
 
     print("\n Cleaned product data saved.")
+    return cleaned_df
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.entity_resolution import MATCH_THRESHOLD, MAX_BLOCK_SIZE, resolve_entities
+from utils.profiling import StageProfiler
+from utils.storage import STORAGE_FORMATS, find_cleaned, read_frame, write_frame
+
+CLEANED_DIR = os.path.join(os.path.dirname(__file__), '..', 'cleaned')
+
+def resolve_customer_entities(df, threshold=MATCH_THRESHOLD, max_block_size=MAX_BLOCK_SIZE, links_path=None):
+    """
+    Adds `customer_master_id` to cleaned customer data: the smallest
+    customer_id of the records that describe the same person across the
+    source platforms (see utils/entity_resolution.py). Records without a
+    duplicate keep their own id. With `links_path`, the linked pairs and
+    their per-feature scores are written there.
+    """
+    profiler = StageProfiler('resolve_customer_entities')
+
+    print("Step 1: Resolving duplicate customers...")
+    with profiler.stage('1. Block, score and cluster', lambda: df):
+        master_ids, links, stats = resolve_entities(df, threshold=threshold, max_block_size=max_block_size)
+        for key in ('email', 'phone', 'zip_name'):
+            print(f"  - Blocking on {key}: {stats[key]['pairs']:,} pairs, "
+                  f"{stats[key]['oversized_blocks']:,} oversized blocks skipped")
+        print(f"  - {stats['candidate_pairs']:,} candidate pairs scored, {stats['linked_pairs']:,} linked")
+
+    df_resolved = df.assign(customer_master_id=master_ids)
+    duplicates = int((df_resolved['customer_master_id'] != df_resolved['customer_id']).sum())
+    print(f"  - {duplicates:,} customers linked to another customer_master_id "
+          f"({df_resolved['customer_master_id'].nunique():,} distinct customers)")
+
+    if links_path:
+        write_frame(links, links_path)
+        print(f"  - Linked pairs saved to '{os.path.basename(links_path)}'")
+
+    profiler.report()
+    return df_resolved
+
+def main():
+    parser = argparse.ArgumentParser(description="Link duplicate customers in the cleaned customers dataset.")
+    parser.add_argument('--input', default=None,
+                        help="Cleaned customers file (default: the one in cleaned/, in any format)")
+    parser.add_argument('--output', default=None, help="Output file (default: overwrite the input)")
+    parser.add_argument('--threshold', type=float, default=MATCH_THRESHOLD,
+                        help="Minimum pair score to link two customers")
+    parser.add_argument('--max-block-size', type=int, default=MAX_BLOCK_SIZE,
+                        help="Blocks with more records than this are skipped")
+    parser.add_argument('--links-format', choices=list(STORAGE_FORMATS), default=None,
+                        help="Also write the linked pairs to cleaned/ in this format")
+    args = parser.parse_args()
+    source = args.input or find_cleaned(CLEANED_DIR, 'customers')
+
+    df = read_frame(source)
+    links_path = None
+    if args.links_format:
+        links_path = os.path.join(CLEANED_DIR, 'customer_links' + STORAGE_FORMATS[args.links_format]['extension'])
+    df_resolved = resolve_customer_entities(df, args.threshold, args.max_block_size, links_path)
+    output = args.output or source
+    write_frame(df_resolved, output)
+
+    print(f"\n Resolved data saved to '{os.path.basename(output)}'")
+    return df_resolved
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,156 @@
 import sqlite3
 
-def reset_database():
-    with sqlite3.connect("ecommerce.db") as conn:
+DB_PATH = "ecommerce.db"
+
+# Primary key of every table, used by the incremental (upsert) loader
+TABLE_KEYS = {
+    'customers': ['customer_id'],
+    'suppliers': ['supplier_id'],
+    'products': ['product_id'],
+    'orders': ['order_id'],
+    'order_items': ['order_id', 'item_id'],
+}
+
+def reset_database(db_path=DB_PATH):
+    with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("DROP TABLE IF EXISTS order_items;")
         cursor.execute("DROP TABLE IF EXISTS orders;")
         cursor.execute("DROP TABLE IF EXISTS products;")
         cursor.execute("DROP TABLE IF EXISTS suppliers;")
         cursor.execute("DROP TABLE IF EXISTS customers;")
+        # Rollup tables (db/rollups.py) are rebuilt by the loader
+        rollups = cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'agg\\_%' ESCAPE '\\'").fetchall()
+        for (name,) in rollups:
+            cursor.execute(f"DROP TABLE IF EXISTS {name};")
         conn.commit()
-reset_database()
 
-conn = sqlite3.connect("ecommerce.db")
-cursor = conn.cursor()
+# Columns added after the first release: (table, column, type). Databases
+# created before them get the column through ALTER TABLE.
+ADDED_COLUMNS = [(table, 'row_hash', 'INTEGER') for table in TABLE_KEYS] + [
+    ('customers', 'customer_master_id', 'INTEGER'),
+]
+
+def _add_missing_columns(cursor, added_columns=ADDED_COLUMNS):
+    """Add the ADDED_COLUMNS to tables created before they existed."""
+    for table, column, column_type in added_columns:
+        columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table});")]
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type};")
+
+def create_tables(db_path=DB_PATH):
+    """
+    Create any missing tables. Every table carries a `row_hash` column with a
+    content hash of the row so incremental loads can skip unchanged rows.
+    `customers.customer_master_id` links duplicate customers
+    (cleaners/resolve_customers.py).
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
 
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS customers (
+        customer_id INTEGER PRIMARY KEY,
+        customer_name TEXT,
+        email TEXT,
+        phone TEXT,
+        address TEXT,
+        city TEXT,
+        state TEXT,
+        zip_code TEXT,
+        registration_date TEXT,
+        status TEXT,
+        total_orders INTEGER,
+        total_spent REAL,
+        loyalty_points INTEGER,
+        preferred_payment TEXT,
+        age REAL,
+        birth_date TEXT,
+        gender TEXT,
+        segment TEXT,
+        customer_master_id INTEGER,
+        row_hash INTEGER
+    );
+    """)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS customers (
-    customer_id INTEGER PRIMARY KEY,
-    customer_name TEXT,
-    email TEXT,
-    phone TEXT,
-    address TEXT,
-    city TEXT,
-    state TEXT,
-    zip_code TEXT,
-    registration_date INTEGER,
-    status TEXT,
-    total_orders INTEGER,
-    total_spent REAL,
-    loyalty_points INTEGER,
-    preferred_payment TEXT,
-    age REAL,
-    birth_date TEXT,
-    gender TEXT,
-    segment TEXT
-);
-""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS suppliers (
+        supplier_id TEXT PRIMARY KEY,
+        row_hash INTEGER
+    );
+    """)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS suppliers (
-    supplier_id TEXT PRIMARY KEY
-);
-""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        product_id TEXT PRIMARY KEY,
+        product_name TEXT,
+        item_name TEXT,
+        description TEXT,
+        category TEXT,
+        product_category TEXT,
+        final_category TEXT,
+        brand TEXT,
+        manufacturer TEXT,
+        price REAL,
+        list_price REAL,
+        cost REAL,
+        weight REAL,
+        dimensions TEXT,
+        color TEXT,
+        size TEXT,
+        stock_quantity INTEGER,
+        stock_level INTEGER,
+        reorder_level INTEGER,
+        supplier_id TEXT,
+        created_date TEXT,
+        last_updated TEXT,
+        is_active BOOLEAN,
+        rating REAL,
+        is_active_flag_issue BOOLEAN,
+        category_mismatch BOOLEAN,
+        row_hash INTEGER,
+        FOREIGN KEY (supplier_id) REFERENCES suppliers(supplier_id)
+    );
+    """)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS products (
-    product_id TEXT PRIMARY KEY,
-    product_name TEXT,
-    item_name TEXT,
-    description TEXT,
-    category TEXT,
-    product_category TEXT,
-    final_category TEXT,
-    brand TEXT,
-    manufacturer TEXT,
-    price REAL,
-    list_price REAL,
-    cost REAL,
-    weight REAL,
-    dimensions TEXT,
-    color TEXT,
-    size TEXT,
-    stock_quantity INTEGER,
-    stock_level INTEGER,
-    reorder_level INTEGER,
-    supplier_id TEXT,
-    created_date INTEGER,
-    last_updated INTEGER,
-    is_active BOOLEAN,
-    rating REAL,
-    is_active_flag_issue BOOLEAN,
-    category_mismatch BOOLEAN,
-    FOREIGN KEY (supplier_id) REFERENCES suppliers(supplier_id)
-);
-""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS orders (
+        order_id TEXT PRIMARY KEY,
+        customer_id INTEGER,
+        order_date TEXT,
+        order_datetime TEXT,
+        status TEXT,
+        payment_method TEXT,
+        shipping_address TEXT,
+        tracking_number TEXT,
+        shipping_cost REAL,
+        tax REAL,
+        discount REAL,
+        order_total REAL,
+        row_hash INTEGER,
+        FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    );
+    """)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS orders (
-    order_id TEXT PRIMARY KEY,
-    customer_id INTEGER,
-    order_date TEXT,
-    order_datetime TEXT,
-    status TEXT,
-    payment_method TEXT,
-    shipping_address TEXT,
-    tracking_number TEXT,
-    shipping_cost REAL,
-    tax REAL,
-    discount REAL,
-    order_total REAL,
-    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-);
-""")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS order_items (
+        order_id TEXT,
+        item_id INTEGER,
+        product_id TEXT,
+        quantity INTEGER,
+        unit_price REAL,
+        total_amount REAL,
+        row_hash INTEGER,
+        PRIMARY KEY (order_id, item_id),
+        FOREIGN KEY (order_id) REFERENCES orders(order_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id)
+    );
+    """)
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS order_items (
-    order_id TEXT,
-    item_id INTEGER,
-    product_id TEXT,
-    quantity INTEGER,
-    unit_price REAL,
-    total_amount REAL,
-    PRIMARY KEY (order_id, item_id),
-    FOREIGN KEY (order_id) REFERENCES orders(order_id),
-    FOREIGN KEY (product_id) REFERENCES products(product_id)
-);
-""")
+    _add_missing_columns(cursor)
+    conn.commit()
+    conn.close()
 
-conn.commit()
-conn.close()
+if __name__ == "__main__":
+    reset_database()
+    create_tables()
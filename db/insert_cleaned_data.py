@@ -1,51 +1,263 @@
+import argparse
 import sqlite3
+import sys
+import time
 import pandas as pd
+import numpy as np
 import os
 
-def clear_all_tables():
-    with sqlite3.connect("ecommerce.db") as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM order_items;")
-        cursor.execute("DELETE FROM orders;")
-        cursor.execute("DELETE FROM products;")
-        cursor.execute("DELETE FROM suppliers;")
-        cursor.execute("DELETE FROM customers;")
-        conn.commit()
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from db.create_tables import TABLE_KEYS, create_tables
+from db.indexes import create_indexes
+from utils.storage import find_cleaned, read_frame
+from db.rollups import affected_groups, merge_groups, refresh_rollups, rollups_available, stage_changed_keys
 
-clear_all_tables()
+DB_PATH = "ecommerce.db"
+CLEANED_DIR = os.path.join(os.path.dirname(__file__), '..', 'cleaned')
 
-file_path = os.path.join(os.path.dirname(__file__), '..', 'cleaned', 'customers_cleaned_data.json')
-df_customers = pd.read_json(file_path)
+# Parents before children so foreign keys always point at loaded rows
+LOAD_ORDER = ['customers', 'suppliers', 'products', 'orders', 'order_items']
 
-with sqlite3.connect("ecommerce.db") as conn:
-    df_customers.to_sql("customers", conn, if_exists="append", index=False)
+# Settings applied to the loading connection only
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=OFF;",
+    "PRAGMA cache_size=-262144;",  # 256 MB page cache
+    "PRAGMA temp_store=MEMORY;",
+]
 
+# Rows converted to Python tuples at a time, bounding the loader's extra memory
+BATCH_ROWS = 100_000
 
-file_path = os.path.join(os.path.dirname(__file__), '..', 'cleaned', 'products_cleaned_data.json')
-df_products = pd.read_json(file_path)  # or use your DataFrame
+# numpy scalars that can end up inside object columns
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.bool_, bool)
 
-df_suppliers = df_products[['supplier_id']].dropna().drop_duplicates()
+def clear_all_tables(conn):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM order_items;")
+    cursor.execute("DELETE FROM orders;")
+    cursor.execute("DELETE FROM products;")
+    cursor.execute("DELETE FROM suppliers;")
+    cursor.execute("DELETE FROM customers;")
 
-with sqlite3.connect("ecommerce.db") as conn:
-    df_suppliers.to_sql("suppliers", conn, if_exists="append", index=False)
+def read_cleaned_data(cleaned_dir=CLEANED_DIR):
+    """Read the latest cleaner outputs from `cleaned_dir`, whatever format they were written in."""
+    frames = []
+    for dataset in ['customers', 'products', 'orders']:
+        path = find_cleaned(cleaned_dir, dataset)
+        print(f"  - Reading {os.path.relpath(path, cleaned_dir)}")
+        frames.append(read_frame(path))
+    df_customers, df_products, df_orders_full = frames
+    return df_customers, df_products, df_orders_full
 
-df_products = df_products.drop(columns=['item_id'], errors='ignore')
+def prepare_tables(df_customers, df_products, df_orders_full):
+    """Split the cleaned datasets into one DataFrame per database table."""
+    df_suppliers = df_products[['supplier_id']].dropna().drop_duplicates()
+    df_products = df_products.drop(columns=['item_id'], errors='ignore')
 
-with sqlite3.connect("ecommerce.db") as conn:
-    df_products.to_sql("products", conn, if_exists="append", index=False)
+    df_order_items = df_orders_full[['order_id', 'item_id', 'product_id', 'quantity', 'unit_price', 'total_amount']].drop_duplicates(subset=['order_id', 'item_id'])
 
+    df_orders = df_orders_full[['order_id', 'customer_id', 'order_date', 'order_datetime',
+        'status', 'payment_method', 'shipping_address', 'tracking_number',
+        'shipping_cost', 'tax', 'discount', 'order_total']].drop_duplicates(subset=['order_id'])
 
+    return {
+        'customers': df_customers,
+        'suppliers': df_suppliers,
+        'products': df_products,
+        'orders': df_orders,
+        'order_items': df_order_items,
+    }
 
-file_path = os.path.join(os.path.dirname(__file__), '..', 'cleaned', 'orders_cleaned_data.csv')
-df_orders_full = pd.read_csv(file_path) 
+def _hash_dtypes(df):
+    """
+    `df` with categories as object and numbers widened to 64 bits, so row
+    hashes do not depend on utils.memory.optimize_memory or the storage format.
+    """
+    widened = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            widened[col] = df[col].astype(object)
+        elif pd.api.types.is_integer_dtype(dtype) and dtype != np.int64:
+            widened[col] = df[col].astype(np.int64)
+        elif pd.api.types.is_float_dtype(dtype) and dtype != np.float64:
+            widened[col] = df[col].astype(np.float64)
+    return df.assign(**widened) if widened else df
 
-df_order_items=df_orders_full[['order_id','item_id', 'product_id', 'quantity', 'unit_price', 'total_amount']].drop_duplicates(subset=['order_id', 'item_id'])
+def add_row_hashes(df):
+    """Return a copy of `df` with a `row_hash` content hash of every row."""
+    df = df.drop(columns=['row_hash'], errors='ignore')
+    hashes = pd.util.hash_pandas_object(_hash_dtypes(df), index=False).to_numpy()
+    # SQLite integers are signed 64-bit
+    return df.assign(row_hash=hashes.view(np.int64))
 
-df_orders=df_orders_full[['order_id', 'customer_id', 'order_date', 'order_datetime',
-    'status', 'payment_method', 'shipping_address', 'tracking_number',
-    'shipping_cost', 'tax', 'discount', 'order_total']].drop_duplicates(subset=['order_id'])
+def _column_values(s):
+    """Python values of a column as sqlite3 binds them: NaN/NaT -> None, datetimes -> text."""
+    missing = s.isna()
+    if pd.api.types.is_datetime64_any_dtype(s):
+        s = s.astype(str)
+    return s.astype(object).where(~missing, None).tolist()
 
+def to_rows(df):
+    """Column-typed row tuples for executemany, built column by column."""
+    return list(zip(*(_column_values(df[col]) for col in df.columns)))
 
-with sqlite3.connect("ecommerce.db") as conn:
-    df_orders.to_sql("orders", conn, if_exists="append", index=False)
-    df_order_items.to_sql("order_items", conn, if_exists="append", index=False)
\ No newline at end of file
+def bulk_insert(conn, table, df):
+    """Insert `df` into `table` with executemany over BATCH_ROWS batches; returns rows/sec."""
+    columns = ', '.join(f'"{col}"' for col in df.columns)
+    placeholders = ', '.join('?' for _ in df.columns)
+    sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+    start = time.perf_counter()
+    for offset in range(0, len(df), BATCH_ROWS):
+        conn.executemany(sql, to_rows(df.iloc[offset:offset + BATCH_ROWS]))
+    elapsed = time.perf_counter() - start
+    return len(df) / elapsed if elapsed > 0 else float('inf')
+
+def changed_rows(conn, table, df):
+    """
+    Rows of `df` (with row_hash) that are new or changed. The hash covers the
+    key columns too, so a row is unchanged exactly when its hash is already
+    stored and only the hash column has to be read back.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = lambda _, row: row[0]
+    stored = np.fromiter(cursor.execute(f"SELECT row_hash FROM {table} WHERE row_hash IS NOT NULL"), dtype=np.int64)
+    return df[~df['row_hash'].isin(stored).to_numpy()]
+
+def upsert(conn, table, df):
+    """INSERT ... ON CONFLICT DO UPDATE `df` into `table`, keyed on TABLE_KEYS."""
+    keys = TABLE_KEYS[table]
+    columns = ', '.join(f'"{col}"' for col in df.columns)
+    placeholders = ', '.join('?' for _ in df.columns)
+    updates = ', '.join(f'"{col}" = excluded."{col}"' for col in df.columns if col not in keys)
+    sql = (f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+           f'ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates}')
+    for offset in range(0, len(df), BATCH_ROWS):
+        conn.executemany(sql, to_rows(df.iloc[offset:offset + BATCH_ROWS]))
+
+def _drop_secondary_indexes(conn, tables):
+    """Drop explicitly created indexes on `tables` and return their CREATE statements."""
+    placeholders = ', '.join('?' for _ in tables)
+    indexes = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+        list(tables),
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+def _in_load_order(tables):
+    return [t for t in LOAD_ORDER if t in tables] + [t for t in tables if t not in LOAD_ORDER]
+
+def load_tables(tables, db_path=DB_PATH, replace=True):
+    """
+    Load a {table: DataFrame} mapping in one transaction.
+
+    Secondary indexes are dropped before the inserts and rebuilt afterwards
+    (together with any missing dashboard index from db/indexes.py), the
+    rollup tables from db/rollups.py are rebuilt, and the connection runs
+    with BULK_LOAD_PRAGMAS. With `replace`, existing
+    rows are deleted first inside the same transaction, so a failed load
+    leaves the previous data in place.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        for pragma in BULK_LOAD_PRAGMAS:
+            conn.execute(pragma)
+
+        conn.execute("BEGIN")
+        if replace:
+            clear_all_tables(conn)
+        index_sql = _drop_secondary_indexes(conn, list(tables))
+
+        for table in _in_load_order(tables):
+            df = add_row_hashes(tables[table]) if table in TABLE_KEYS else tables[table]
+            rows_per_sec = bulk_insert(conn, table, df)
+            print(f"  - {table}: {len(df)} rows ({rows_per_sec:,.0f} rows/sec)")
+
+        start = time.perf_counter()
+        for sql in index_sql:
+            conn.execute(sql)
+        create_indexes(conn)
+        print(f"  - Built indexes in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        refresh_rollups(conn)
+        print(f"  - Built rollups in {time.perf_counter() - start:.2f}s")
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def load_tables_incremental(tables, db_path=DB_PATH):
+    """
+    Upsert a {table: DataFrame} mapping in one transaction, writing only rows
+    that are new or changed according to their content hash. Rows missing
+    from the input are kept. Rollup groups touched by the written rows (in
+    their old or new version) are recomputed. Returns {table: DataFrame of
+    written rows}.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    written = {}
+    groups = {}
+    try:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("BEGIN")
+        # Databases loaded before the rollups existed get them built in full
+        rollups_ready = rollups_available(conn)
+        for table in _in_load_order(tables):
+            df = add_row_hashes(tables[table])
+            start = time.perf_counter()
+            changed = changed_rows(conn, table, df)
+            if len(changed):
+                keys = TABLE_KEYS[table]
+                stage_changed_keys(conn, table, keys, changed)
+                merge_groups(groups, affected_groups(conn, table, keys))
+                upsert(conn, table, changed)
+                merge_groups(groups, affected_groups(conn, table, keys))
+            written[table] = changed
+            print(f"  - {table}: {len(changed)} of {len(df)} rows upserted, "
+                  f"{len(df) - len(changed)} unchanged ({time.perf_counter() - start:.2f}s)")
+        create_indexes(conn)
+
+        start = time.perf_counter()
+        if rollups_ready:
+            refresh_rollups(conn, groups)
+            print(f"  - Refreshed {len(groups)} rollups in {time.perf_counter() - start:.2f}s")
+        else:
+            refresh_rollups(conn)
+            print(f"  - Built rollups in {time.perf_counter() - start:.2f}s")
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the cleaned datasets into the database.")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--incremental', action='store_true',
+                        help="Upsert new/changed rows only instead of replacing every table")
+    args = parser.parse_args()
+
+    create_tables(args.db)
+    tables = prepare_tables(*read_cleaned_data())
+    if args.incremental:
+        print("Incrementally loading cleaned data into the database...")
+        load_tables_incremental(tables, db_path=args.db)
+    else:
+        print("Loading cleaned data into the database...")
+        load_tables(tables, db_path=args.db)
+    print("Data loaded successfully!")
+
+if __name__ == "__main__":
+    main()
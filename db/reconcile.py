@@ -0,0 +1,385 @@
+"""
+Reconcile a transactions feed (Data/reconciliation_challenge_data.csv)
+against the orders and order_items tables.
+
+Usage:
+    python db/reconcile.py [--input Data/reconciliation_challenge_data.csv] [--db ecommerce.db]
+                           [--out-dir reports/reconciliation] [--chunk-rows 100000] [--in-memory]
+                           [--amount-tolerance 0.01] [--amount-tolerance-pct 0] [--date-tolerance-days 3]
+
+Feed references are mapped to table keys (CLI_0186 -> customer 186,
+TXN_00371 -> order ORD_00371, ITM_055 -> product PROD_055) and each record
+is looked up by order key (a hash join). Records whose order key is
+missing or unknown, or whose key order disagrees with them on customer,
+date or amount (a wrong reference), fall back to a band join: an order of
+the same customer whose total is within the amount tolerance of amount_paid
+and whose date is within the date tolerance. A band order replaces a
+disagreeing key order; without one the key order is kept. `match` says
+which join found the order ('key' or 'band') and `ref_order_id` is the
+order the reference named. Found records are then checked field by field
+(CHECKS). Every record ends up in exactly one output:
+
+- matched: an order was found and every check passed
+- conflicting: an order was found but some checks failed (listed in `conflicts`)
+- unmatched: no order was found (`reason`)
+
+plus the orders in the feed's date range that no record points at
+(orders_without_record) and counts/amounts per month and outcome (summary).
+Every output file is written, with only a header when it has no rows.
+
+The feed is read `--chunk-rows` at a time and only the orders a chunk
+refers to are fetched (through a temp table joined on the primary key and
+on idx_orders_customer_total), so neither side has to fit in memory. The
+ids of the orders some record points at are kept in a temp table, which
+SQLite spills to disk, and orders_without_record is an anti-join against it.
+`--in-memory` loads both tables into pandas instead, for small databases.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from db.indexes import create_indexes
+from utils.dates import parse_dates
+from utils.normalize import TEXT_DTYPE
+from utils.storage import STORAGE_FORMATS, FrameWriter
+
+DB_PATH = "ecommerce.db"
+INPUT_PATH = os.path.join(os.path.dirname(__file__), '..', 'Data', 'reconciliation_challenge_data.csv')
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'reports', 'reconciliation')
+CHUNK_ROWS = 100_000
+RECORD_DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S.%fZ']
+
+# Feed reference columns and the table keys they stand for. The number after
+# the prefix is the entity number; `format` writes it out as the table's key
+# (prefix and zero padding), or None for integer keys.
+REFERENCES = {
+    'client_reference': {'prefix': 'CLI', 'key': 'customer_id', 'format': None},
+    'transaction_ref': {'prefix': 'TXN', 'key': 'order_id', 'format': ('ORD_', 5)},
+    'item_reference': {'prefix': 'ITM', 'key': 'product_id', 'format': ('PROD_', 3)},
+}
+
+# Checks on a record whose order was found. `kind` is 'exact', 'amount'
+# (within the amount tolerance) or 'date' (within the date tolerance); a
+# check fails when the record has a value and the table's is missing or
+# different. Checks with `requires` are skipped when that check failed.
+CHECKS = [
+    {'name': 'customer', 'record': 'customer_id', 'table': 'db_customer_id', 'kind': 'exact'},
+    {'name': 'date', 'record': 'record_date', 'table': 'db_order_date', 'kind': 'date'},
+    {'name': 'amount_paid', 'record': 'amount_paid', 'table': 'db_order_total', 'kind': 'amount'},
+    {'name': 'item', 'record': 'product_id', 'table': 'db_product_id', 'kind': 'exact'},
+    {'name': 'quantity', 'record': 'quantity_ordered', 'table': 'db_quantity', 'kind': 'exact', 'requires': 'item'},
+    {'name': 'total_value', 'record': 'total_value', 'table': 'db_item_total', 'kind': 'amount', 'requires': 'item'},
+]
+
+OUTCOMES = ['matched', 'conflicting', 'unmatched']
+ORDER_COLUMNS = ['order_id', 'db_customer_id', 'db_order_date', 'db_order_total']
+# Checks on the order itself: a key order failing any of them is retried by the band join
+ORDER_CHECKS = [check for check in CHECKS if check['table'] in ORDER_COLUMNS]
+ITEM_COLUMNS = ['order_id', 'db_product_id', 'db_quantity', 'db_item_total']
+
+def normalize_references(records):
+    """Add the customer_id, order_id and product_id the feed's references stand for."""
+    for column, spec in REFERENCES.items():
+        # Arrow string kernels: one compiled pass per step instead of a regex call per value
+        text = records[column].astype(TEXT_DTYPE).str.strip()
+        valid = text.str.upper().str.fullmatch(spec['prefix'] + r'[_-]?\d+').fillna(False).astype(bool)
+        digits = text.str.replace(r'^[A-Za-z]+[_-]?', '', regex=True)
+        numbers = pd.to_numeric(digits.where(valid), errors='coerce').astype('Int64')
+        if spec['format'] is None:
+            records[spec['key']] = numbers
+        else:
+            prefix, width = spec['format']
+            keys = prefix + numbers.astype(TEXT_DTYPE).str.pad(width, fillchar='0')
+            records[spec['key']] = keys.astype(object).where(numbers.notna().to_numpy(), None)
+    return records
+
+class SqliteSource:
+    """Order lookups in the database for one chunk of keys at a time, through temp tables."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        # Orders some record points at, kept in SQLite (spilled to disk) rather than in Python
+        self._stage('recon_seen', 'order_id TEXT PRIMARY KEY', [])
+
+    def mark_seen(self, order_ids):
+        self.conn.executemany("INSERT OR IGNORE INTO temp.recon_seen VALUES (?);", ((key,) for key in order_ids))
+
+    def _stage(self, table, columns, rows):
+        self.conn.execute(f"DROP TABLE IF EXISTS temp.{table};")
+        self.conn.execute(f"CREATE TEMP TABLE {table} ({columns});")
+        placeholders = ', '.join('?' * len(columns.split(',')))
+        self.conn.executemany(f"INSERT INTO temp.{table} VALUES ({placeholders});", rows)
+
+    def orders(self, order_ids):
+        self._stage('recon_keys', 'order_id TEXT PRIMARY KEY', ((key,) for key in order_ids))
+        return pd.read_sql_query("""
+            SELECT o.order_id, o.customer_id AS db_customer_id, o.order_date AS db_order_date,
+                   o.order_total AS db_order_total
+            FROM temp.recon_keys k JOIN orders o ON o.order_id = k.order_id
+        """, self.conn)
+
+    def items(self, order_ids):
+        """Items per (order, product), summed when a product appears on several lines."""
+        self._stage('recon_keys', 'order_id TEXT PRIMARY KEY', ((key,) for key in order_ids))
+        return pd.read_sql_query("""
+            SELECT i.order_id, i.product_id AS db_product_id, SUM(i.quantity) AS db_quantity,
+                   SUM(i.total_amount) AS db_item_total
+            FROM temp.recon_keys k JOIN order_items i ON i.order_id = k.order_id
+            GROUP BY i.order_id, i.product_id
+        """, self.conn)
+
+    def band_candidates(self, bands):
+        """Orders of each band's customer with a total in [low, high] and a date in [first_day, last_day]."""
+        self._stage('recon_bands', 'row INTEGER, customer_id INTEGER, low REAL, high REAL, first_day TEXT, last_day TEXT',
+                    bands.itertuples(index=False, name=None))
+        return pd.read_sql_query("""
+            SELECT b.row, o.order_id, o.order_total, o.order_date
+            FROM temp.recon_bands b
+            JOIN orders o ON o.customer_id = b.customer_id
+                         AND o.order_total BETWEEN b.low AND b.high
+                         AND o.order_date BETWEEN b.first_day AND b.last_day
+        """, self.conn)
+
+    def orders_between(self, first_day, last_day, chunk_rows):
+        """Orders dated in [first_day, last_day] that no mark_seen() call named (an anti-join)."""
+        return pd.read_sql_query("""
+            SELECT order_id, customer_id, order_date, order_total FROM orders AS o
+            WHERE order_date BETWEEN ? AND ?
+              AND NOT EXISTS (SELECT 1 FROM temp.recon_seen AS s WHERE s.order_id = o.order_id)
+        """, self.conn, params=(first_day, last_day), chunksize=chunk_rows)
+
+class FrameSource:
+    """The same lookups as SqliteSource on in-memory orders/order_items frames (pandas hash joins)."""
+
+    def __init__(self, orders, order_items):
+        self.orders_df = orders[['order_id', 'customer_id', 'order_date', 'order_total']].copy()
+        self.orders_df['order_date'] = pd.to_datetime(self.orders_df['order_date'], errors='coerce',
+                                                      format='ISO8601').dt.strftime('%Y-%m-%d')
+        self.items_df = (order_items.groupby(['order_id', 'product_id'], as_index=False, observed=True)
+                         .agg(db_quantity=('quantity', 'sum'), db_item_total=('total_amount', 'sum'))
+                         .rename(columns={'product_id': 'db_product_id'}))
+        # One flag per order: bounded by the orders already held here, not by the feed
+        self.seen = np.zeros(len(self.orders_df), dtype=bool)
+
+    def orders(self, order_ids):
+        found = self.orders_df[self.orders_df['order_id'].isin(order_ids)]
+        return found.rename(columns={'customer_id': 'db_customer_id', 'order_date': 'db_order_date',
+                                     'order_total': 'db_order_total'})
+
+    def items(self, order_ids):
+        return self.items_df[self.items_df['order_id'].isin(order_ids)]
+
+    def band_candidates(self, bands):
+        candidates = bands.merge(self.orders_df, on='customer_id')
+        in_band = (candidates['order_total'].between(candidates['low'], candidates['high'])
+                   & (candidates['order_date'] >= candidates['first_day'])
+                   & (candidates['order_date'] <= candidates['last_day']))
+        return candidates.loc[in_band, ['row', 'order_id', 'order_total', 'order_date']]
+
+    def mark_seen(self, order_ids):
+        self.seen |= self.orders_df['order_id'].isin(order_ids).to_numpy()
+
+    def orders_between(self, first_day, last_day, chunk_rows):
+        dates = self.orders_df['order_date']
+        found = self.orders_df[(dates >= first_day) & (dates <= last_day) & ~self.seen]
+        for start in range(0, len(found), chunk_rows):
+            yield found.iloc[start:start + chunk_rows]
+
+def _amount_band(amounts, tolerance, tolerance_pct):
+    return np.maximum(tolerance, amounts.abs() * tolerance_pct / 100)
+
+def _band_join(df, source, tolerance, tolerance_pct, date_tolerance_days, retry):
+    """
+    Fill the order of records without one, and replace it for the `retry`
+    records, from the closest order in the customer's band.
+    """
+    pending = ((df['match'].isna() | retry) & df['customer_id'].notna() & df['amount_paid'].notna()
+               & df['record_date'].notna())
+    if not pending.any():
+        return df
+    rows = df[pending]
+    window = pd.Timedelta(days=date_tolerance_days)
+    band = _amount_band(rows['amount_paid'], tolerance, tolerance_pct)
+    bands = pd.DataFrame({
+        'row': rows.index.astype('int64'),
+        'customer_id': rows['customer_id'].astype('int64'),
+        'low': rows['amount_paid'] - band,
+        'high': rows['amount_paid'] + band,
+        'first_day': (rows['record_date'] - window).dt.strftime('%Y-%m-%d'),
+        'last_day': (rows['record_date'] + window).dt.strftime('%Y-%m-%d'),
+    })
+    candidates = source.band_candidates(bands)
+    if candidates.empty:
+        return df
+
+    # Closest amount first, then closest date
+    candidates['amount_gap'] = (candidates['order_total'] - df.loc[candidates['row'], 'amount_paid'].to_numpy()).abs()
+    candidates['date_gap'] = (pd.to_datetime(candidates['order_date'])
+                              - df.loc[candidates['row'], 'record_date'].to_numpy()).abs()
+    best = candidates.sort_values(['row', 'amount_gap', 'date_gap']).drop_duplicates('row').set_index('row')
+
+    df.loc[best.index, 'order_id'] = best['order_id']
+    df.loc[best.index, 'db_customer_id'] = df.loc[best.index, 'customer_id']
+    df.loc[best.index, 'db_order_total'] = best['order_total']
+    df.loc[best.index, 'db_order_date'] = best['order_date']
+    df.loc[best.index, 'match'] = 'band'
+    return df
+
+def _failed_checks(df, tolerance, tolerance_pct, date_tolerance_days, checks=CHECKS):
+    failed = {}
+    for check in checks:
+        record, table = df[check['record']], df[check['table']]
+        if check['kind'] == 'amount':
+            agree = (record - table).abs() <= _amount_band(record, tolerance, tolerance_pct) + 1e-9
+        elif check['kind'] == 'date':
+            agree = (record - table).abs() <= pd.Timedelta(days=date_tolerance_days)
+        else:
+            agree = record.astype(object).eq(table.astype(object))
+        fails = (record.notna() & ~agree.fillna(False).astype(bool)).to_numpy()
+        if 'requires' in check:
+            fails &= ~failed[check['requires']]
+        failed[check['name']] = fails
+    return failed
+
+def reconcile_records(records, source, amount_tolerance=0.01, amount_tolerance_pct=0.0, date_tolerance_days=3):
+    """
+    Reconcile one chunk of feed records against `source` (SqliteSource or
+    FrameSource). Returns {outcome: DataFrame} for OUTCOMES.
+    """
+    df = normalize_references(records.reset_index(drop=True))
+    df['record_date'], _ = parse_dates(df['transaction_date'], formats=RECORD_DATE_FORMATS)
+    df['ref_order_id'] = df['order_id']
+
+    # Hash join on the order key
+    orders = source.orders(df['order_id'].dropna().unique().tolist())
+    df = df.merge(orders[ORDER_COLUMNS], on='order_id', how='left')
+    df['match'] = np.where(df['db_order_total'].notna() | df['db_order_date'].notna(), 'key', None)
+    key_checks = df.assign(db_order_date=pd.to_datetime(df['db_order_date'], errors='coerce', format='ISO8601'))
+    failed = _failed_checks(key_checks, amount_tolerance, amount_tolerance_pct, date_tolerance_days, ORDER_CHECKS)
+    retry = (df['match'] == 'key').to_numpy() & np.logical_or.reduce(list(failed.values()))
+    df = _band_join(df, source, amount_tolerance, amount_tolerance_pct, date_tolerance_days, retry)
+
+    items = source.items(df['order_id'].dropna().unique().tolist())
+    df = df.merge(items[ITEM_COLUMNS], left_on=['order_id', 'product_id'], right_on=['order_id', 'db_product_id'],
+                  how='left')
+    df['db_order_date'] = pd.to_datetime(df['db_order_date'], errors='coerce', format='ISO8601')
+
+    failed = _failed_checks(df, amount_tolerance, amount_tolerance_pct, date_tolerance_days)
+    conflicts = pd.Series('', index=df.index, dtype=object)
+    for name, fails in failed.items():
+        conflicts = conflicts.where(~fails, conflicts + name + ';')
+    df['conflicts'] = conflicts.str.rstrip(';')
+    df['amount_paid_diff'] = (df['amount_paid'] - df['db_order_total']).round(2)
+    df['date_diff_days'] = (df['record_date'] - df['db_order_date']).dt.days.astype('Int64')
+
+    found = df['match'].notna()
+    df['reason'] = np.where(found, None, np.where(df['order_id'].isna() & records['transaction_ref'].notna().to_numpy(),
+                                                  'bad_reference', 'order_not_found'))
+    outcome = np.where(~found, 'unmatched', np.where(df['conflicts'] != '', 'conflicting', 'matched'))
+    return {name: df[outcome == name] for name in OUTCOMES}
+
+def _month_totals(df, date_column, amount_column, outcome):
+    months = df[date_column].dt.strftime('%Y-%m').fillna('unknown')
+    totals = df.groupby(months)[amount_column].agg(['count', 'sum'])
+    totals.index.name = 'month'
+    return totals.rename(columns={'count': 'records', 'sum': 'amount'}).assign(outcome=outcome).reset_index()
+
+def reconcile(chunks, source, out_dir=OUTPUT_DIR, fmt='csv', chunk_rows=CHUNK_ROWS, **tolerances):
+    """
+    Reconcile every chunk of feed records, streaming the outcomes and the
+    orders without a record to `out_dir`; returns the per-month summary.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    extension = STORAGE_FORMATS[fmt]['extension']
+    writers = {name: FrameWriter(os.path.join(out_dir, f"{name}{extension}"), fmt)
+               for name in OUTCOMES + ['orders_without_record']}
+    totals = []
+    empty = {'orders_without_record': pd.DataFrame(columns=['order_id', 'customer_id', 'order_date', 'order_total'])}
+    first_date = last_date = None
+    try:
+        for i, chunk in enumerate(chunks, start=1):
+            start = time.perf_counter()
+            results = reconcile_records(chunk, source, **tolerances)
+            for name, df in results.items():
+                empty.setdefault(name, df.drop(columns=['record_date']).iloc[:0])
+                if len(df):
+                    writers[name].write(df.drop(columns=['record_date']))
+                    totals.append(_month_totals(df, 'record_date', 'amount_paid', name))
+                if name != 'unmatched':
+                    source.mark_seen(df['order_id'].dropna().unique().tolist())
+            dates = pd.concat([df['record_date'] for df in results.values()]).dropna()
+            if len(dates):
+                first_date = min(first_date, dates.min()) if first_date is not None else dates.min()
+                last_date = max(last_date, dates.max()) if last_date is not None else dates.max()
+            print(f"  - Chunk {i}: " + ', '.join(f"{len(df):,} {name}" for name, df in results.items())
+                  + f" ({len(chunk) / (time.perf_counter() - start):,.0f} records/sec)")
+
+        if first_date is not None:
+            # Orders of the same period that no record points at
+            window = pd.Timedelta(days=tolerances.get('date_tolerance_days', 3))
+            for orders in source.orders_between((first_date - window).strftime('%Y-%m-%d'),
+                                                (last_date + window).strftime('%Y-%m-%d'), chunk_rows):
+                if len(orders):
+                    writers['orders_without_record'].write(orders)
+                    totals.append(_month_totals(orders.assign(order_date=pd.to_datetime(orders['order_date'])),
+                                                'order_date', 'order_total', 'orders_without_record'))
+    finally:
+        for name, writer in writers.items():
+            if not writer.chunks:
+                # An outcome with no rows still gets its file, header only
+                writer.write(empty.get(name, pd.DataFrame()))
+            writer.close()
+
+    if not totals:
+        return pd.DataFrame()
+    summary = (pd.concat(totals).groupby(['month', 'outcome'], as_index=False)[['records', 'amount']].sum()
+               .sort_values(['month', 'outcome']))
+    summary['amount'] = summary['amount'].round(2)
+    summary.to_csv(os.path.join(out_dir, 'summary.csv'), index=False)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=INPUT_PATH, help="Transactions feed (CSV)")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--out-dir', default=OUTPUT_DIR)
+    parser.add_argument('--format', choices=[f for f in STORAGE_FORMATS if f != 'json'], default='csv')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--in-memory', action='store_true', help="Load orders/order_items into pandas instead")
+    parser.add_argument('--amount-tolerance', type=float, default=0.01, help="Absolute amount tolerance")
+    parser.add_argument('--amount-tolerance-pct', type=float, default=0.0,
+                        help="Relative amount tolerance in percent (the larger of the two applies)")
+    parser.add_argument('--date-tolerance-days', type=int, default=3)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.in_memory:
+            source = FrameSource(pd.read_sql_query("SELECT * FROM orders", conn),
+                                 pd.read_sql_query("SELECT * FROM order_items", conn))
+        else:
+            create_indexes(conn)
+            source = SqliteSource(conn)
+        print(f"Reconciling {args.input} against {args.db}...")
+        summary = reconcile(pd.read_csv(args.input, chunksize=args.chunk_rows), source, args.out_dir, args.format,
+                            args.chunk_rows, amount_tolerance=args.amount_tolerance,
+                            amount_tolerance_pct=args.amount_tolerance_pct,
+                            date_tolerance_days=args.date_tolerance_days)
+    finally:
+        conn.close()
+
+    if summary.empty:
+        print("No records to reconcile.")
+        return
+    print("\nRecords and amounts per month:")
+    print(summary.pivot_table(index='month', columns='outcome', values=['records', 'amount'], fill_value=0).to_string())
+    print(f"\nOutputs written to {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
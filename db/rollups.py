@@ -0,0 +1,236 @@
+import sqlite3
+
+DB_PATH = "ecommerce.db"
+
+# Summary tables maintained by the loader so the dashboard reads O(groups) rows.
+#
+# `populate` rebuilds the rollup (all groups, or with `{filter}` filled in only
+# the groups listed in temp.rollup_keys). `sources` maps every base table the
+# rollup depends on to the SQL expression giving a row's group key in that
+# table; a None expression means any change to that table rebuilds the whole
+# rollup (used for the small single-table rollups).
+ROLLUPS = [
+    {
+        'table': 'agg_monthly_revenue',
+        'create': """
+            CREATE TABLE IF NOT EXISTS agg_monthly_revenue (
+                month TEXT PRIMARY KEY,
+                revenue REAL,
+                order_count INTEGER
+            );
+        """,
+        'key': 'month',
+        'populate': """
+            INSERT INTO agg_monthly_revenue (month, revenue, order_count)
+            SELECT substr(order_date, 1, 7), SUM(order_total), COUNT(*)
+            FROM orders
+            WHERE order_date IS NOT NULL {filter}
+            GROUP BY substr(order_date, 1, 7);
+        """,
+        'filter': "AND substr(order_date, 1, 7) IN (SELECT key FROM temp.rollup_keys)",
+        'sources': {'orders': "substr(order_date, 1, 7)"},
+    },
+    {
+        'table': 'agg_order_status',
+        'create': """
+            CREATE TABLE IF NOT EXISTS agg_order_status (
+                status TEXT PRIMARY KEY,
+                order_count INTEGER,
+                revenue REAL,
+                revenue_count INTEGER
+            );
+        """,
+        'key': 'status',
+        'populate': """
+            INSERT INTO agg_order_status (status, order_count, revenue, revenue_count)
+            SELECT COALESCE(status, ''), COUNT(*), SUM(order_total), COUNT(order_total)
+            FROM orders
+            WHERE 1 {filter}
+            GROUP BY COALESCE(status, '');
+        """,
+        'filter': "AND COALESCE(status, '') IN (SELECT key FROM temp.rollup_keys)",
+        'sources': {'orders': "COALESCE(status, '')"},
+    },
+    {
+        'table': 'agg_product_sales',
+        'create': """
+            CREATE TABLE IF NOT EXISTS agg_product_sales (
+                product_id TEXT PRIMARY KEY,
+                quantity INTEGER,
+                total_amount REAL
+            );
+        """,
+        'key': 'product_id',
+        'populate': """
+            INSERT INTO agg_product_sales (product_id, quantity, total_amount)
+            SELECT product_id, SUM(quantity), SUM(total_amount)
+            FROM order_items
+            WHERE product_id IS NOT NULL {filter}
+            GROUP BY product_id;
+        """,
+        'filter': "AND product_id IN (SELECT key FROM temp.rollup_keys)",
+        'sources': {'order_items': "product_id"},
+    },
+    {
+        'table': 'agg_category_sales',
+        'create': """
+            CREATE TABLE IF NOT EXISTS agg_category_sales (
+                final_category TEXT PRIMARY KEY,
+                quantity INTEGER,
+                total_amount REAL,
+                order_item_count INTEGER
+            );
+        """,
+        'key': 'final_category',
+        'populate': """
+            INSERT INTO agg_category_sales (final_category, quantity, total_amount, order_item_count)
+            SELECT p.final_category, SUM(oi.quantity), SUM(oi.total_amount), COUNT(*)
+            FROM order_items AS oi
+            JOIN products AS p ON p.product_id = oi.product_id
+            WHERE p.final_category IS NOT NULL {filter}
+            GROUP BY p.final_category;
+        """,
+        'filter': "AND p.final_category IN (SELECT key FROM temp.rollup_keys)",
+        'sources': {
+            'order_items': "(SELECT final_category FROM products WHERE products.product_id = order_items.product_id)",
+            'products': "final_category",
+        },
+    },
+    {
+        # One row per (dimension, value) plus an ('all', 'all') total row
+        'table': 'agg_customer_dims',
+        'create': """
+            CREATE TABLE IF NOT EXISTS agg_customer_dims (
+                dimension TEXT,
+                value TEXT,
+                customer_count INTEGER,
+                total_spent_sum REAL,
+                total_spent_count INTEGER,
+                total_orders_sum REAL,
+                total_orders_count INTEGER,
+                PRIMARY KEY (dimension, value)
+            );
+        """,
+        'key': None,
+        'populate': """
+            INSERT INTO agg_customer_dims
+            SELECT dimension, value, COUNT(*), SUM(total_spent), COUNT(total_spent),
+                   SUM(total_orders), COUNT(total_orders)
+            FROM (
+                SELECT 'all' AS dimension, 'all' AS value, total_spent, total_orders FROM customers
+                UNION ALL
+                SELECT 'segment', segment, total_spent, total_orders FROM customers WHERE segment IS NOT NULL
+                UNION ALL
+                SELECT 'status', status, total_spent, total_orders FROM customers WHERE status IS NOT NULL
+                UNION ALL
+                SELECT 'state', state, total_spent, total_orders FROM customers WHERE state IS NOT NULL
+            )
+            GROUP BY dimension, value;
+        """,
+        'sources': {'customers': None},
+    },
+    {
+        # Single row of product/inventory totals
+        'table': 'agg_product_stats',
+        'create': """
+            CREATE TABLE IF NOT EXISTS agg_product_stats (
+                total_products INTEGER,
+                active_products INTEGER,
+                inactive_products INTEGER,
+                low_stock_products INTEGER,
+                price_sum REAL,
+                price_count INTEGER
+            );
+        """,
+        'key': None,
+        'populate': """
+            INSERT INTO agg_product_stats
+            SELECT COUNT(*), COALESCE(SUM(is_active = 1), 0), COALESCE(SUM(is_active = 0), 0),
+                   (SELECT COUNT(*) FROM products WHERE stock_quantity < reorder_level),
+                   SUM(price), COUNT(price)
+            FROM products;
+        """,
+        'sources': {'products': None},
+    },
+]
+
+ROLLUP_TABLES = [rollup['table'] for rollup in ROLLUPS]
+
+def create_rollup_tables(conn):
+    for rollup in ROLLUPS:
+        conn.execute(rollup['create'])
+
+def rollups_available(conn):
+    """True when every rollup table exists."""
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return all(table in names for table in ROLLUP_TABLES)
+
+def stage_changed_keys(conn, table, keys, df):
+    """Store the primary keys of the changed rows of `table` in temp.changed_keys."""
+    conn.execute("DROP TABLE IF EXISTS temp.changed_keys")
+    conn.execute(f"CREATE TEMP TABLE changed_keys ({', '.join(keys)})")
+    rows = df[keys].astype(object).where(df[keys].notna(), None).itertuples(index=False, name=None)
+    conn.executemany(f"INSERT INTO temp.changed_keys VALUES ({', '.join('?' for _ in keys)})", rows)
+
+def affected_groups(conn, table, keys):
+    """
+    Rollup groups touched by the rows staged in temp.changed_keys, as
+    {rollup table: set of group keys, or None for a full rebuild}. Call it
+    before and after writing the rows so both the old and new groups count.
+    """
+    match = f"({', '.join(keys)}) IN (SELECT {', '.join(keys)} FROM temp.changed_keys)"
+    groups = {}
+    for rollup in ROLLUPS:
+        if table not in rollup['sources']:
+            continue
+        expr = rollup['sources'][table]
+        if expr is None:
+            groups[rollup['table']] = None
+            continue
+        rows = conn.execute(f"SELECT DISTINCT {expr} FROM {table} WHERE {match}").fetchall()
+        groups[rollup['table']] = {row[0] for row in rows if row[0] is not None}
+    return groups
+
+def merge_groups(target, groups):
+    """Accumulate affected_groups() results into `target` (None wins over key sets)."""
+    for name, keys in groups.items():
+        if name in target and target[name] is None:
+            continue
+        if keys is None:
+            target[name] = None
+        else:
+            target[name] = target.get(name, set()) | keys
+    return target
+
+def refresh_rollups(conn, groups=None):
+    """
+    Rebuild the rollups. With `groups` (see affected_groups) only the listed
+    rollups are refreshed and keyed rollups recompute just the listed groups;
+    without it every rollup is rebuilt from scratch.
+    """
+    create_rollup_tables(conn)
+    for rollup in ROLLUPS:
+        table = rollup['table']
+        if groups is not None and table not in groups:
+            continue
+        keys = None if groups is None else groups[table]
+        if keys is None or rollup['key'] is None:
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(rollup['populate'].format(filter=''))
+            continue
+        if not keys:
+            continue
+        conn.execute("DROP TABLE IF EXISTS temp.rollup_keys")
+        conn.execute("CREATE TEMP TABLE rollup_keys (key PRIMARY KEY)")
+        conn.executemany("INSERT INTO temp.rollup_keys VALUES (?)", [(key,) for key in keys])
+        conn.execute(f"DELETE FROM {table} WHERE {rollup['key']} IN (SELECT key FROM temp.rollup_keys)")
+        conn.execute(rollup['populate'].format(filter=rollup['filter']))
+    conn.execute("DROP TABLE IF EXISTS temp.rollup_keys")
+    conn.execute("DROP TABLE IF EXISTS temp.changed_keys")
+
+if __name__ == "__main__":
+    with sqlite3.connect(DB_PATH) as conn:
+        refresh_rollups(conn)
+        for table in ROLLUP_TABLES:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            print(f"{table}: {count} rows")
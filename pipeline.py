@@ -0,0 +1,243 @@
+"""
+Run the whole data pipeline in one process tree.
+
+Usage:
+    python pipeline.py [--workers 3] [--incremental] [--save-cleaned parquet] [--no-cache] [--verbose]
+
+The stages form a DAG (see STAGES): the three cleaners are independent and
+run concurrently in a process pool, create_tables runs in the main process
+meanwhile, duplicate customers are linked (resolve_customers) as soon as
+their cleaner is done, and the load stage receives the cleaned DataFrames
+in memory once all of them are done. Every stage reports its wall time,
+CPU time and the peak RSS of the process that ran it (a worker that ran
+more than one stage reports its peak over all of them).
+
+Cleaner outputs are cached in cleaned/.cache (utils/stage_cache.py), keyed on
+the raw input file, the cleaner's source files and the pandas version, so a
+cleaner whose inputs and code are unchanged is skipped.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))
+from cleaners.clean_customers import clean_customer_data
+from cleaners.clean_orders import CSV_DTYPES, clean_orders_dataset
+from cleaners.clean_products import clean_product_dataset
+from cleaners.resolve_customers import resolve_customer_entities
+from db.create_tables import DB_PATH, create_tables
+from db.insert_cleaned_data import load_tables, load_tables_incremental, prepare_tables
+from utils.resources import peak_rss_mb
+from utils.stage_cache import CACHE_DIR, DEFAULT_MAX_BYTES, StageCache
+from utils.storage import STORAGE_FORMATS, cleaned_path, write_frame
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ROOT, 'Data')
+CLEANED_DIR = os.path.join(ROOT, 'cleaned')
+
+
+def save_cleaned(df, dataset, options):
+    if options.get('save_cleaned'):
+        write_frame(df, cleaned_path(CLEANED_DIR, dataset, options['save_cleaned']))
+    return df
+
+
+def clean_customers_stage(inputs, options):
+    df = pd.read_json(os.path.join(options['data_dir'], 'customers_messy_data.json'))
+    return clean_customer_data(df)
+
+
+def resolve_customers_stage(inputs, options):
+    return save_cleaned(resolve_customer_entities(inputs['clean_customers']), 'customers', options)
+
+
+def clean_products_stage(inputs, options):
+    df = pd.read_json(os.path.join(options['data_dir'], 'products_inconsistent_data.json'))
+    return save_cleaned(clean_product_dataset(df), 'products', options)
+
+
+def clean_orders_stage(inputs, options):
+    df = pd.read_csv(os.path.join(options['data_dir'], 'orders_unstructured_data.csv'), dtype=CSV_DTYPES)
+    return save_cleaned(clean_orders_dataset(df), 'orders', options)
+
+
+def create_tables_stage(inputs, options):
+    create_tables(options['db_path'])
+
+
+def load_stage(inputs, options):
+    tables = prepare_tables(inputs['resolve_customers'], inputs['clean_products'], inputs['clean_orders'])
+    if options['incremental']:
+        load_tables_incremental(tables, db_path=options['db_path'])
+    else:
+        load_tables(tables, db_path=options['db_path'])
+
+
+def _sources(*paths):
+    return [os.path.join(ROOT, path) for path in paths]
+
+
+# `parallel` stages run in the process pool and return their result by
+# pickling; the others run in the main process. A stage starts as soon as
+# every stage in `deps` has finished and gets their results as `inputs`.
+# Stages with a `cache` spec are looked up in the StageCache first: `inputs`
+# are raw files in the data directory, `sources` the code they run (including
+# that of the stages they depend on) and `dataset`, if given, the cleaned/
+# output a cached result is saved as.
+STAGES = [
+    {'name': 'clean_customers', 'deps': [], 'run': clean_customers_stage, 'parallel': True,
+     'cache': {'inputs': ['customers_messy_data.json'],
+               'sources': _sources('cleaners/clean_customers.py', 'utils/column_merge.py', 'utils/dates.py',
+                                   'utils/memory.py', 'utils/normalize.py', 'utils/profiling.py', 'utils/resources.py',
+                                   'config/normalizers.json')}},
+    {'name': 'resolve_customers', 'deps': ['clean_customers'], 'run': resolve_customers_stage, 'parallel': True,
+     'cache': {'dataset': 'customers', 'inputs': ['customers_messy_data.json'],
+               'sources': _sources('cleaners/clean_customers.py', 'cleaners/resolve_customers.py',
+                                   'utils/entity_resolution.py', 'utils/column_merge.py', 'utils/dates.py',
+                                   'utils/memory.py', 'utils/normalize.py', 'utils/profiling.py', 'utils/resources.py',
+                                   'config/normalizers.json')}},
+    {'name': 'clean_products', 'deps': [], 'run': clean_products_stage, 'parallel': True,
+     'cache': {'dataset': 'products', 'inputs': ['products_inconsistent_data.json'],
+               'sources': _sources('cleaners/clean_products.py', 'utils/dates.py', 'utils/memory.py',
+                                   'utils/profiling.py', 'utils/resources.py')}},
+    {'name': 'clean_orders', 'deps': [], 'run': clean_orders_stage, 'parallel': True,
+     'cache': {'dataset': 'orders', 'inputs': ['orders_unstructured_data.csv'],
+               'sources': _sources('cleaners/clean_orders.py', 'utils/dates.py', 'utils/memory.py',
+                                   'utils/profiling.py', 'utils/resources.py')}},
+    {'name': 'create_tables', 'deps': [], 'run': create_tables_stage, 'parallel': False},
+    {'name': 'load', 'deps': ['resolve_customers', 'clean_products', 'clean_orders', 'create_tables'],
+     'run': load_stage, 'parallel': False},
+]
+
+
+def run_stage(run, inputs, options):
+    """Run one stage with its output captured; returns (result, metrics)."""
+    log = io.StringIO()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(log):
+        result = run(inputs, options)
+    metrics = {
+        'wall_s': time.perf_counter() - wall_start,
+        'cpu_s': time.process_time() - cpu_start,
+        'peak_rss_mb': peak_rss_mb(),
+        'pid': os.getpid(),
+        'log': log.getvalue(),
+    }
+    return result, metrics
+
+
+def stage_cache_key(cache, stage, options):
+    spec = stage['cache']
+    inputs = [os.path.join(options['data_dir'], name) for name in spec['inputs']]
+    return cache.key(inputs, spec['sources'], {'stage': stage['name'], 'pandas': pd.__version__})
+
+
+def read_cached_stage(cache, key, stage, options):
+    """run_stage() equivalent that reads the result from `cache`; None on a miss."""
+    result, metrics = run_stage(lambda inputs, options: cache.get(key), {}, options)
+    if result is None:
+        return None
+    metrics['cached'] = True
+    if 'dataset' in stage['cache']:
+        result = save_cleaned(result, stage['cache']['dataset'], options)
+    return result, metrics
+
+
+def run_pipeline(stages=STAGES, options=None, workers=3, cache=None):
+    """
+    Execute `stages` in dependency order. With `workers` == 0 every stage
+    runs serially in the main process. With a StageCache, cacheable stages
+    whose key is already stored are read from it instead of run, and fresh
+    results are stored. Returns ({stage: result}, {stage: metrics}).
+    """
+    options = options or {}
+    results, metrics = {}, {}
+    pending = {stage['name']: stage for stage in stages}
+    running = {}
+    cache_keys = {}
+
+    def finish(name, outcome):
+        results[name], metrics[name] = outcome
+        if name in cache_keys and not metrics[name].get('cached'):
+            cache.put(cache_keys[name], results[name], stage=name)
+        if options.get('verbose'):
+            print(metrics[name]['log'], end='')
+        status = ' (cached)' if metrics[name].get('cached') else ''
+        print(f"  - {name} finished in {metrics[name]['wall_s']:.2f}s{status}")
+
+    with contextlib.ExitStack() as stack:
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if workers else None
+        while pending or running:
+            ready = [stage for stage in pending.values() if all(dep in results for dep in stage['deps'])]
+            if not ready and not running:
+                raise ValueError(f"Stages with unmet or cyclic dependencies: {sorted(pending)}")
+            # Submit pool work first so it overlaps with the main-process stages
+            for stage in sorted(ready, key=lambda s: not (s['parallel'] and pool)):
+                del pending[stage['name']]
+                inputs = {dep: results[dep] for dep in stage['deps']}
+                if cache is not None and 'cache' in stage:
+                    key = cache_keys[stage['name']] = stage_cache_key(cache, stage, options)
+                    outcome = read_cached_stage(cache, key, stage, options)
+                    if outcome is not None:
+                        finish(stage['name'], outcome)
+                        continue
+                if stage['parallel'] and pool:
+                    running[pool.submit(run_stage, stage['run'], inputs, options)] = stage['name']
+                else:
+                    finish(stage['name'], run_stage(stage['run'], inputs, options))
+            if running and not any(all(dep in results for dep in s['deps']) for s in pending.values()):
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), future.result())
+    return results, metrics
+
+
+def print_stage_report(metrics, total_wall_s):
+    print(f"\n{'stage':<18} {'wall (s)':>9} {'cpu (s)':>8} {'peak RSS (MB)':>14} {'pid':>8} {'cached':>7}")
+    for name, m in metrics.items():
+        peak = f"{m['peak_rss_mb']:.1f}" if m['peak_rss_mb'] is not None else '-'
+        cached = 'yes' if m.get('cached') else ''
+        print(f"{name:<18} {m['wall_s']:>9.2f} {m['cpu_s']:>8.2f} {peak:>14} {m['pid']:>8} {cached:>7}")
+    serial_s = sum(m['wall_s'] for m in metrics.values())
+    print(f"\nEnd-to-end wall time: {total_wall_s:.2f}s (stages back to back: {serial_s:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Directory holding the three raw datasets")
+    parser.add_argument('--db', default=os.path.join(ROOT, DB_PATH))
+    parser.add_argument('--workers', type=int, default=3,
+                        help="Processes for the cleaner stages; 0 runs every stage serially in this process")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Upsert new/changed rows only instead of replacing every table")
+    parser.add_argument('--save-cleaned', choices=list(STORAGE_FORMATS), default=None,
+                        help="Also write the cleaned datasets to cleaned/ in this format")
+    parser.add_argument('--no-cache', action='store_true', help="Re-run every cleaner and leave the stage cache untouched")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help="Size bound of the stage cache; least recently used entries are evicted")
+    parser.add_argument('--verbose', action='store_true', help="Print every stage's own output")
+    args = parser.parse_args()
+
+    options = {
+        'data_dir': args.data_dir,
+        'db_path': args.db,
+        'incremental': args.incremental,
+        'save_cleaned': args.save_cleaned,
+        'verbose': args.verbose,
+    }
+    print(f"Running pipeline ({args.workers or 'no'} worker processes)...")
+    start = time.perf_counter()
+    cache = None if args.no_cache else StageCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    _, metrics = run_pipeline(STAGES, options, workers=args.workers, cache=cache)
+    print_stage_report(metrics, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
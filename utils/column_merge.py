@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+def is_blank(s: pd.Series) -> pd.Series:
+    """True where a value is missing or only whitespace once converted to text."""
+    return s.isna() | s.astype(str).str.strip().eq('')
+
+
+def contains(s: pd.Series, token: str) -> pd.Series:
+    """True where a non-missing value contains `token` once converted to text."""
+    return s.notna() & s.astype(str).str.contains(token, regex=False)
+
+
+def text_length(s: pd.Series) -> pd.Series:
+    """Length of every value once converted to text."""
+    return s.astype(str).str.len()
+
+
+def before_dash(s: pd.Series) -> pd.Series:
+    """Keep the part before the first '-' (e.g. ZIP+4 postal codes -> 5-digit ZIP)."""
+    return s.astype(str).str.split('-', n=1).str[0]
+
+
+# Each strategy receives the target column `a` and the source column `b` and
+# returns a boolean mask of the rows where the source value should win.
+PREFER_SOURCE = {
+    # Fill only when the target is missing
+    'when_missing': lambda a, b: a.isna(),
+    # Fill when the target is missing or an empty/whitespace string
+    'when_blank': lambda a, b: is_blank(a),
+    # Prefer the source when it looks like a full name and the target does not
+    'when_only_source_has_space': lambda a, b: a.isna() | (
+        b.notna() & contains(b, ' ') & ~contains(a, ' ')
+    ),
+    # Prefer the source when it looks like an email address and the target does not
+    'when_only_source_has_at': lambda a, b: a.isna() | (
+        b.notna() & ~contains(a, '@') & contains(b, '@')
+    ),
+    # Prefer the longer (likely more complete) non-blank value, ties keep the target
+    'when_longer': lambda a, b: is_blank(a) | (
+        ~is_blank(b) & (text_length(a) < text_length(b))
+    ),
+}
+
+
+def merge_column_pair(df, target, source, prefer_source, source_transform=None, as_str=False):
+    """
+    Coalesce `source` into `target` column-wise and return the merged Series.
+
+    `prefer_source` is a key of PREFER_SOURCE (or a callable with the same
+    signature). `source_transform` is applied to source values that win and
+    `as_str` converts kept target values to text. Rows where both inputs are
+    missing always come out as NaN.
+    """
+    a = df[target]
+    b = df[source]
+    rule = PREFER_SOURCE[prefer_source] if isinstance(prefer_source, str) else prefer_source
+    take_source = rule(a, b).to_numpy(dtype=bool)
+
+    picked_a = a.astype(str).where(a.notna(), np.nan) if as_str else a
+    picked_b = source_transform(b).where(b.notna(), np.nan) if source_transform else b
+
+    merged = pd.Series(
+        np.where(take_source, picked_b.astype(object), picked_a.astype(object)),
+        index=df.index,
+        name=target,
+    )
+    return merged.where(merged.notna(), np.nan)
+
+
+def merge_columns(df, rules, drop_sources=True):
+    """
+    Apply a list of declarative merge rules to `df` in place and return it.
+
+    Each rule is a dict with `target`, `source` and `prefer_source` keys plus the
+    optional `source_transform` and `as_str` keys of merge_column_pair.
+    """
+    for rule in rules:
+        df[rule['target']] = merge_column_pair(
+            df,
+            rule['target'],
+            rule['source'],
+            rule['prefer_source'],
+            source_transform=rule.get('source_transform'),
+            as_str=rule.get('as_str', False),
+        )
+        if drop_sources:
+            df.drop(rule['source'], axis=1, inplace=True)
+    return df
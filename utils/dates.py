@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# Candidate formats tried when a caller does not pin its own list, in priority order
+COMMON_DATE_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y/%m/%d',
+]
+
+
+def _distinct_values(series: pd.Series, strip_blank: bool):
+    """Factorize the non-blank values of `series` as text: returns (codes, uniques)."""
+    text = series.astype(str).where(series.notna(), None)
+    blank = text.isna() | (text.str.strip().eq('') if strip_blank else text.eq(''))
+    codes, uniques = pd.factorize(text.where(~blank, None))
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def _parse_passes(uniques: pd.Series, formats, fallback: bool):
+    """Parse distinct strings with one vectorized pass per format, in priority order."""
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    matched_by = pd.Series(None, index=uniques.index, dtype=object)
+
+    pending = uniques.index
+    for fmt in formats:
+        if len(pending) == 0:
+            break
+        attempt = pd.to_datetime(uniques.loc[pending], format=fmt, errors='coerce')
+        hit = attempt.notna()
+        parsed.loc[attempt.index[hit]] = attempt[hit].to_numpy()
+        matched_by.loc[attempt.index[hit]] = fmt
+        pending = pending[~hit.to_numpy()]
+
+    if fallback:
+        # Let pandas infer each remaining distinct value on its own
+        for idx in pending:
+            try:
+                value = pd.to_datetime(uniques.loc[idx])
+            except (ValueError, TypeError, OverflowError):
+                continue
+            if pd.isna(value):
+                continue
+            if value.tzinfo is not None:
+                value = value.tz_convert(None)
+            parsed.loc[idx] = value
+            matched_by.loc[idx] = 'inferred'
+
+    return parsed, matched_by
+
+
+def detect_date_formats(series: pd.Series, formats=None, sample_size=1000, random_state=0):
+    """
+    Return the share of a random sample of distinct values matched by each format.
+
+    Formats that match nothing in the sample are left out, so the result is the
+    column's detected format list (highest priority first).
+    """
+    formats = formats or COMMON_DATE_FORMATS
+    _, uniques = _distinct_values(series, strip_blank=True)
+    if len(uniques) == 0:
+        return {}
+    sample = uniques.sample(min(sample_size, len(uniques)), random_state=random_state)
+    sample = sample.reset_index(drop=True)
+    _, matched_by = _parse_passes(sample, formats, fallback=False)
+    shares = matched_by.value_counts(normalize=True)
+    return {fmt: float(shares[fmt]) for fmt in formats if fmt in shares.index}
+
+
+def parse_dates(series: pd.Series, formats=None, fallback=False, strip_blank=True, sample_size=1000):
+    """
+    Parse a column of mixed-format date strings.
+
+    Every distinct non-blank value is parsed once (repeated strings are memoized
+    through factorize) by trying `formats` in order, one vectorized
+    pd.to_datetime(format=...) pass per format over the values still unparsed.
+    With `fallback`, values no format matched are inferred individually.
+    When `formats` is None they are detected from a sample of the column.
+
+    Returns (parsed, hits): a datetime64 Series aligned with `series` and the
+    number of rows matched by each format plus 'inferred' and 'unparsed'.
+    """
+    if formats is None:
+        formats = list(detect_date_formats(series, sample_size=sample_size)) or COMMON_DATE_FORMATS
+
+    codes, uniques = _distinct_values(series, strip_blank)
+    parsed_uniques, matched_by = _parse_passes(uniques, formats, fallback)
+
+    valid = codes >= 0
+    values = np.full(len(series), np.datetime64('NaT'), dtype='datetime64[ns]')
+    values[valid] = parsed_uniques.to_numpy()[codes[valid]]
+    parsed = pd.Series(values, index=series.index, name=series.name)
+
+    row_formats = pd.Series(matched_by.to_numpy()[codes[valid]], dtype=object)
+    counts = row_formats.value_counts()
+    hits = {fmt: int(counts.get(fmt, 0)) for fmt in list(formats) + (['inferred'] if fallback else [])}
+    hits['unparsed'] = int(valid.sum() - counts.sum())
+    return parsed, hits
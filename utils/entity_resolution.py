@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+
+from utils.normalize import NON_DIGIT, TEXT_DTYPE
+
+# Records are only compared with records that share one of these keys, so the
+# work grows with the block sizes instead of n**2. Each key is built from the
+# normalized match features (see match_features); missing keys block nothing.
+BLOCKING_KEYS = [
+    {'name': 'email', 'key': lambda f: f['email']},
+    {'name': 'phone', 'key': lambda f: f['phone']},
+    # 'davis henry' -> 'dav hen': tolerates typos past the third letter
+    {'name': 'zip_name',
+     'key': lambda f: f['zip3'] + ':' + f['name'].str.replace(r'([a-z]{1,3})[a-z]*', r'\1', regex=True)},
+]
+
+# How a candidate pair is scored: 'equal' features add their weight when both
+# values are present and equal, 'similarity' features add weight * the
+# estimated trigram Jaccard similarity of the two values. Pairs scoring at
+# least MATCH_THRESHOLD are linked. A name alone (common names repeat) does
+# not link a pair.
+MATCH_FEATURES = [
+    {'name': 'email', 'kind': 'equal', 'weight': 3.0},
+    {'name': 'phone', 'kind': 'equal', 'weight': 2.5},
+    {'name': 'name', 'kind': 'similarity', 'weight': 1.5},
+    {'name': 'address', 'kind': 'similarity', 'weight': 1.5},
+    {'name': 'zip', 'kind': 'equal', 'weight': 0.5},
+]
+MATCH_THRESHOLD = 3.0
+
+# Identifiers are shared by households: an email or phone match (with or
+# without a zip) only links when the pair is also similar on one of the
+# CORROBORATING_FEATURES by at least MIN_CORROBORATION, and two present
+# VETO_FEATURES values less similar than that never link (a family sharing
+# an email, phone and address is several customers)
+CORROBORATING_FEATURES = ['name', 'address']
+VETO_FEATURES = ['name']
+MIN_CORROBORATION = 0.5
+
+# Blocks larger than this (e.g. a placeholder email shared by thousands of
+# rows) carry no identifying signal and are skipped
+MAX_BLOCK_SIZE = 1_000
+
+# Street types spelled out by some platforms and abbreviated by others
+ADDRESS_ABBREVIATIONS = {
+    r'\bstreet\b': 'st',
+    r'\bavenue\b': 'ave',
+    r'\broad\b': 'rd',
+    r'\bdrive\b': 'dr',
+    r'\blane\b': 'ln',
+    r'\bboulevard\b': 'blvd',
+    r'\bcourt\b': 'ct',
+    r'\bplace\b': 'pl',
+    r'\bapartment\b': 'apt',
+}
+
+NUM_HASHES = 32
+MAX_TEXT_LENGTH = 48
+
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.astype(object).where(s.notna(), None).astype(TEXT_DTYPE)
+
+
+def match_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalized comparison values of each customer: lower-case email without
+    a +tag, the last 10 phone digits, 5- and 3-digit zip, the name as sorted
+    letter-only tokens ('henry.davis123' -> 'davis henry') and the address
+    without punctuation and with abbreviated street types. Values that are
+    missing or too short are NA.
+    """
+    email = _text(df['email']).str.strip().str.lower().str.replace(r'\+[^@]*@', '@', regex=True)
+    digits = _text(df['phone']).str.replace(NON_DIGIT.pattern, '', regex=True).str.slice(-10)
+    zip_code = _text(df['zip_code']).str.extract(r'^\s*(\d{5})', expand=False).astype(TEXT_DTYPE)
+    # Names repeat a lot: sort the tokens of each distinct name once
+    codes, names = pd.factorize(df['customer_name'])
+    words = pd.Series(names, dtype=object).str.lower().str.replace(r'[^a-z]+', ' ', regex=True)
+    sorted_names = np.array([' '.join(sorted(w.split())) for w in words] + [''], dtype=object)
+    name = pd.Series(sorted_names[codes], index=df.index).astype(TEXT_DTYPE)
+    address = _text(df['address']).str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+    for pattern, abbreviation in ADDRESS_ABBREVIATIONS.items():
+        address = address.str.replace(pattern, abbreviation, regex=True)
+
+    features = pd.DataFrame({
+        'email': email.where(email.str.contains('@', regex=False)),
+        'phone': digits.where(digits.str.len() >= 7),
+        'zip': zip_code,
+        'zip3': zip_code.str.slice(0, 3),
+        'name': name.where(name.str.len() > 0),
+        'address': address.where(address.str.len() > 0),
+    }, index=df.index)
+    return features
+
+
+def candidate_pairs(features: pd.DataFrame, blocking_keys=BLOCKING_KEYS, max_block_size: int = MAX_BLOCK_SIZE):
+    """
+    Unique (a, b) row-position pairs, a < b, of records sharing at least one
+    blocking key. Returns (a, b, stats) where stats maps each key to its
+    pair count and the number of oversized blocks skipped.
+    """
+    n = len(features)
+    found, stats = [], {}
+    for spec in blocking_keys:
+        codes, _ = pd.factorize(spec['key'](features))
+        rows = np.flatnonzero(codes >= 0)
+        sizes = np.bincount(codes[rows]) if len(rows) else np.array([], dtype=np.int64)
+        oversized = sizes > max_block_size
+        rows = rows[(sizes[codes[rows]] > 1) & ~oversized[codes[rows]]]
+        # Self hash join on the block code
+        block = pd.DataFrame({'code': codes[rows], 'row': rows})
+        pairs = block.merge(block, on='code', suffixes=('_a', '_b'))
+        pairs = pairs[pairs['row_a'] < pairs['row_b']]
+        found.append(pairs['row_a'].to_numpy(np.int64) * n + pairs['row_b'].to_numpy(np.int64))
+        stats[spec['name']] = {'pairs': len(pairs), 'oversized_blocks': int(oversized.sum())}
+
+    encoded = np.unique(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+    return encoded // n, encoded % n, stats
+
+
+def minhash_signatures(text: pd.Series, num_hashes: int = NUM_HASHES, seed: int = 0,
+                       chunk_rows: int = 100_000) -> np.ndarray:
+    """
+    (len(text), num_hashes) MinHash signatures of the character trigrams of
+    each value (first MAX_TEXT_LENGTH characters, padded with a space on
+    each side). The share of equal positions in two signatures estimates the
+    Jaccard similarity of their trigram sets. Missing values get an all-zero
+    signature, which never equals a real one.
+    """
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: odd multipliers, products wrap around 2**64
+    multipliers = rng.integers(0, 1 << 63, num_hashes, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    offsets = rng.integers(0, 1 << 63, num_hashes, dtype=np.uint64)
+    signatures = np.zeros((len(text), num_hashes), dtype=np.uint32)
+
+    values = text.astype(object).where(text.notna(), '')
+    for start in range(0, len(values), chunk_rows):
+        chunk = values.iloc[start:start + chunk_rows]
+        padded = (' ' + chunk.str.slice(0, MAX_TEXT_LENGTH) + ' ').where(chunk != '', '')
+        lengths = padded.str.len().to_numpy()
+        # Fixed-width bytes, one row per value: trigram i is bytes i..i+2
+        raw = np.array(padded.str.encode('utf-8', errors='replace').tolist(), dtype=f'S{MAX_TEXT_LENGTH + 2}')
+        chars = raw.view(np.uint8).reshape(len(raw), -1).astype(np.uint64)
+        grams = (chars[:, :-2] << np.uint64(16)) | (chars[:, 1:-1] << np.uint64(8)) | chars[:, 2:]
+        valid = np.arange(grams.shape[1]) < (lengths - 2)[:, None]
+        has_grams = valid.any(axis=1)
+        for h in range(num_hashes):
+            with np.errstate(over='ignore'):
+                hashed = ((grams * multipliers[h] + offsets[h]) >> np.uint64(33)).astype(np.uint32) + np.uint32(1)
+            hashed[~valid] = np.iinfo(np.uint32).max
+            signatures[start:start + len(chunk), h] = np.where(has_grams, hashed.min(axis=1), 0)
+    return signatures
+
+
+def _similarities(values: pd.Series, a: np.ndarray, b: np.ndarray, chunk_pairs: int) -> np.ndarray:
+    """
+    Estimated trigram Jaccard similarity of values[a] and values[b] (0 where
+    either is missing). Signatures are computed once per distinct value that
+    occurs in a pair; equal values score 1 without comparing signatures.
+    """
+    codes, uniques = pd.factorize(values)
+    used = np.unique(np.concatenate([codes[a], codes[b]]))
+    used = used[used >= 0]
+    similarity = np.zeros(len(a))
+    if not len(used):
+        return similarity
+    position = np.full(len(uniques) + 1, -1)
+    position[used] = np.arange(len(used))
+    signatures = minhash_signatures(pd.Series(uniques[used], dtype=object))
+
+    for start in range(0, len(a), chunk_pairs):
+        ca, cb = codes[a[start:start + chunk_pairs]], codes[b[start:start + chunk_pairs]]
+        part = (signatures[position[ca]] == signatures[position[cb]]).mean(axis=1)
+        part[ca == cb] = 1.0
+        part[(ca < 0) | (cb < 0)] = 0.0
+        similarity[start:start + len(ca)] = part
+    return similarity
+
+
+def score_pairs(features: pd.DataFrame, a: np.ndarray, b: np.ndarray, match_features=MATCH_FEATURES,
+                chunk_pairs: int = 1_000_000) -> pd.DataFrame:
+    """
+    Per-feature contributions and total `score` of every candidate pair,
+    plus whether it is `corroborated` and whether it is vetoed (`veto`)
+    under MIN_CORROBORATION.
+    """
+    scores = {}
+    corroborated = np.zeros(len(a), dtype=bool)
+    veto = np.zeros(len(a), dtype=bool)
+    for spec in match_features:
+        values = features[spec['name']]
+        codes, _ = pd.factorize(values)
+        if spec['kind'] == 'equal':
+            scores[spec['name']] = np.where((codes[a] >= 0) & (codes[a] == codes[b]), spec['weight'], 0.0)
+            continue
+        similarity = _similarities(values, a, b, chunk_pairs)
+        scores[spec['name']] = spec['weight'] * similarity
+        if spec['name'] in CORROBORATING_FEATURES:
+            corroborated |= similarity >= MIN_CORROBORATION
+        if spec['name'] in VETO_FEATURES:
+            veto |= (codes[a] >= 0) & (codes[b] >= 0) & (similarity < MIN_CORROBORATION)
+    scored = pd.DataFrame(scores)
+    scored.insert(0, 'a', a)
+    scored.insert(1, 'b', b)
+    scored['score'] = scored[[spec['name'] for spec in match_features]].sum(axis=1)
+    scored['corroborated'] = corroborated
+    scored['veto'] = veto
+    return scored
+
+
+def connected_components(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Component label (the smallest member position) of each of `n` nodes
+    linked by the edges (a, b): min-label hooking plus pointer jumping, a
+    handful of vectorized passes even for millions of edges.
+    """
+    labels = np.arange(n)
+    while len(a):
+        la, lb = labels[a], labels[b]
+        if np.array_equal(la, lb):
+            break
+        low = np.minimum(la, lb)
+        np.minimum.at(labels, la, low)
+        np.minimum.at(labels, lb, low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return labels
+
+
+def resolve_entities(df: pd.DataFrame, id_column: str = 'customer_id', threshold: float = MATCH_THRESHOLD,
+                     max_block_size: int = MAX_BLOCK_SIZE):
+    """
+    Link records of `df` that describe the same customer.
+
+    Returns (master_ids, links, stats): a Series aligned with `df` holding
+    the smallest `id_column` of each record's cluster, the scored pairs at
+    or above `threshold` that are corroborated and not vetoed (with both
+    ids), and the blocking statistics.
+    """
+    features = match_features(df)
+    a, b, stats = candidate_pairs(features, max_block_size=max_block_size)
+    scored = score_pairs(features, a, b)
+    linked = (scored['score'] >= threshold) & scored['corroborated'] & ~scored['veto']
+    links = scored[linked].drop(columns=['corroborated', 'veto']).reset_index(drop=True)
+
+    labels = connected_components(len(df), links['a'].to_numpy(), links['b'].to_numpy())
+    ids = df[id_column].to_numpy()
+    master_ids = pd.Series(ids, index=df.index).groupby(labels).transform('min')
+
+    links.insert(0, f'{id_column}_a', ids[links['a'].to_numpy()])
+    links.insert(1, f'{id_column}_b', ids[links['b'].to_numpy()])
+    stats['candidate_pairs'] = len(scored)
+    stats['linked_pairs'] = len(links)
+    return master_ids.rename(f'{id_column.rsplit("_id", 1)[0]}_master_id'), links.drop(columns=['a', 'b']), stats
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Object columns whose distinct non-null values are at most this share of
+# the rows become `category`
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Primary and foreign keys (customer_id, order_id, item_id, ...) keep their
+# dtype: they are offset, concatenated and joined on, which a narrow integer
+# or a category would break
+KEY_COLUMN_SUFFIX = '_id'
+
+
+def is_key_column(col) -> bool:
+    return isinstance(col, str) and col.endswith(KEY_COLUMN_SUFFIX)
+
+
+def _is_string_column(s: pd.Series) -> bool:
+    values = s.dropna()
+    return len(values) > 0 and values.map(type).eq(str).all()
+
+
+def _downcast_integer(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s, downcast='unsigned' if s.min() >= 0 else 'integer')
+
+
+def _downcast_float(s: pd.Series) -> pd.Series:
+    """float32 only when it represents every value exactly (money stays float64)."""
+    as_float32 = s.astype(np.float32)
+    if np.array_equal(as_float32.to_numpy(dtype=np.float64), s.to_numpy(), equal_nan=True):
+        return as_float32
+    return s
+
+
+def optimize_memory(df: pd.DataFrame, max_unique_ratio: float = CATEGORY_MAX_UNIQUE_RATIO,
+                    exclude=(), keep_keys: bool = True, verbose: bool = True) -> pd.DataFrame:
+    """
+    Shrink `df` without changing its values.
+
+    - low-cardinality string columns -> category
+    - integers -> the smallest (unsigned) integer type holding their range
+    - floats -> float32 when the conversion is exact
+
+    Columns in `exclude` are left alone, as are key columns (`*_id`) unless
+    `keep_keys` is False. With `verbose`, prints the deep memory usage
+    before and after.
+    """
+    before = df.memory_usage(deep=True).sum()
+    optimized = {}
+    for col in df.columns:
+        if col in exclude or (keep_keys and is_key_column(col)):
+            continue
+        s = df[col]
+        if s.dtype == object:
+            if len(s) and s.nunique(dropna=True) <= max_unique_ratio * len(s) and _is_string_column(s):
+                optimized[col] = s.astype('category')
+        elif pd.api.types.is_integer_dtype(s.dtype) and len(s):
+            optimized[col] = _downcast_integer(s)
+        elif pd.api.types.is_float_dtype(s.dtype) and s.dtype != np.float32 and len(s):
+            optimized[col] = _downcast_float(s)
+    if optimized:
+        df = df.assign(**optimized)
+
+    if verbose:
+        after = df.memory_usage(deep=True).sum()
+        print(f"  - Memory: {before / 1024 / 1024:.2f} MB -> {after / 1024 / 1024:.2f} MB "
+              f"({before / after if after else 1:.1f}x smaller)")
+    return df
+
+
+def memory_report(frames: dict) -> pd.DataFrame:
+    """Deep memory usage (MB) and row counts of named frames."""
+    return pd.DataFrame([
+        {'frame': name, 'rows': len(df), 'memory_mb': df.memory_usage(deep=True).sum() / 1024 / 1024}
+        for name, df in frames.items()
+    ])
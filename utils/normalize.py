@@ -0,0 +1,122 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    # .str methods on Arrow strings run as compiled kernels instead of per-value Python
+    TEXT_DTYPE = 'string[pyarrow]'
+except ImportError:
+    TEXT_DTYPE = 'string'
+
+NORMALIZERS_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'normalizers.json')
+
+NON_DIGIT = re.compile(r'\D')
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Output layouts of normalize_phones for a 10-digit national number
+PHONE_STYLES = {
+    'us': lambda n: '(' + n.str.slice(0, 3) + ') ' + n.str.slice(3, 6) + '-' + n.str.slice(6),
+    'e164': lambda n: '+1' + n,
+}
+
+# How a value without a mapping entry is written out (applied to str(value))
+FALLBACKS = {
+    'keep': lambda s: s,
+    'title': lambda s: s.str.title(),
+    'upper': lambda s: s.str.upper(),
+    'lower': lambda s: s.str.lower(),
+}
+
+
+class LookupNormalizer:
+    """
+    Maps the values of a column through a lookup table.
+
+    Keys match case- and whitespace-insensitively (str(value).strip().lower());
+    unmatched values go through the `fallback` in FALLBACKS and missing values
+    stay missing. The lookup runs once per distinct value, so the cost grows
+    with the column's cardinality rather than its length.
+    """
+
+    def __init__(self, mapping: dict, fallback: str = 'keep'):
+        if fallback not in FALLBACKS:
+            raise ValueError(f"Unknown fallback '{fallback}'; expected one of {sorted(FALLBACKS)}")
+        self.mapping = {str(key).strip().lower(): value for key, value in mapping.items()}
+        self.fallback = fallback
+
+    def normalize_values(self, values: pd.Series) -> pd.Series:
+        """Normalize non-missing values element-wise."""
+        text = values.astype(str)
+        mapped = text.str.strip().str.lower().map(self.mapping)
+        return mapped.where(mapped.notna(), FALLBACKS[self.fallback](text))
+
+    def __call__(self, s: pd.Series) -> pd.Series:
+        codes, uniques = pd.factorize(s)
+        normalized = self.normalize_values(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+        # Code -1 (missing) picks the trailing NaN
+        return pd.Series(np.append(normalized, np.nan)[codes], index=s.index, name=s.name)
+
+
+def load_normalizers(section: str, path: str = NORMALIZERS_PATH) -> dict:
+    """
+    {column: LookupNormalizer} for one section of the normalizers config, e.g.
+    {"customers": {"city": {"fallback": "title", "mapping": {"nyc": "New York"}}}}.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    return {
+        column: LookupNormalizer(spec.get('mapping', {}), spec.get('fallback', 'keep'))
+        for column, spec in config[section].items()
+    }
+
+
+def normalize_columns(df: pd.DataFrame, normalizers: dict) -> pd.DataFrame:
+    """Apply every normalizer to its column of `df`; absent columns are skipped."""
+    for column, normalizer in normalizers.items():
+        if column in df.columns:
+            df[column] = normalizer(df[column])
+            print(f"  - Normalized '{column}': {df[column].nunique()} distinct values")
+    return df
+
+
+def _present(text: pd.Series) -> pd.Series:
+    """True where a TEXT_DTYPE value is neither missing nor blank."""
+    return text.str.strip().ne('').fillna(False).astype(bool)
+
+
+def normalize_phones(s: pd.Series, style: str = 'us'):
+    """
+    Format North American phone numbers: 10 digits, or 11 starting with the
+    country code 1, once every non-digit is stripped. `style` picks the
+    layout in PHONE_STYLES ('us' -> (555) 123-4567, 'e164' -> +15551234567).
+    Other values are kept as they are.
+
+    Returns (normalized, failures): the column and the number of non-blank
+    values that could not be normalized.
+    """
+    text = s.astype(TEXT_DTYPE)
+    # Arrow kernels take the pattern text, not a compiled re.Pattern
+    digits = text.str.replace(NON_DIGIT.pattern, '', regex=True)
+    length = digits.str.len()
+    national = digits.where(length == 10, digits.str.slice(1).where((length == 11) & digits.str.startswith('1')))
+    valid = national.notna().to_numpy()
+    normalized = s.where(~valid, PHONE_STYLES[style](national).astype(object)).where(s.notna(), np.nan)
+    failures = int((_present(text) & ~valid).sum())
+    return normalized, failures
+
+
+def validate_emails(s: pd.Series):
+    """
+    Keep values that fully match EMAIL_PATTERN; everything else becomes NaN.
+
+    Returns (validated, failures): the column and the number of non-blank
+    values rejected.
+    """
+    text = s.astype(TEXT_DTYPE)
+    valid = text.str.fullmatch(EMAIL_PATTERN.pattern).fillna(False).astype(bool)
+    failures = int((_present(text) & ~valid).sum())
+    return s.where(valid, np.nan), failures
@@ -0,0 +1,192 @@
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+
+from utils.resources import current_rss_mb
+
+# CLEANER_PROFILE=1 turns stage timing on; a comma-separated list of
+# 'cprofile' and/or 'tracemalloc' adds those per stage. Unset, 0 or off
+# leaves every stage() a no-op.
+PROFILE_ENV = 'CLEANER_PROFILE'
+PROFILE_DIR_ENV = 'CLEANER_PROFILE_DIR'
+PROFILE_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', 'reports', 'profiles'))
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+TOP_FUNCTIONS = 10
+
+
+def profile_modes(value=None):
+    """Modes requested by `value` (default: $CLEANER_PROFILE) as a set, or None when off."""
+    value = os.environ.get(PROFILE_ENV, '') if value is None else value
+    if value.strip().lower() in ('', '0', 'false', 'off'):
+        return None
+    return {mode.strip().lower() for mode in value.split(',')} & set(PROFILE_MODES)
+
+
+def _rows(frame):
+    frame = frame() if callable(frame) else frame
+    return None if frame is None else len(frame)
+
+
+def _top_functions(profile, limit=TOP_FUNCTIONS):
+    stats = pstats.Stats(profile)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {'function': f"{os.path.basename(filename)}:{line}({name})", 'calls': calls, 'tottime_s': tottime, 'cumtime_s': cumtime}
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def _add(total, value):
+    return total if value is None else value if total is None else total + value
+
+
+def _merge_functions(*lists, limit=TOP_FUNCTIONS):
+    merged = {}
+    for functions in lists:
+        for row in functions:
+            total = merged.setdefault(row['function'], {'function': row['function'], 'calls': 0,
+                                                        'tottime_s': 0.0, 'cumtime_s': 0.0})
+            for key in ('calls', 'tottime_s', 'cumtime_s'):
+                total[key] += row[key]
+    return sorted(merged.values(), key=lambda row: row['cumtime_s'], reverse=True)[:limit]
+
+
+class StageProfiler:
+    """
+    Per-step cost of one cleaner run.
+
+    Wrap each step in `with profiler.stage(name, lambda: df):`. The callable
+    is read on entry and on exit, so it sees the frame the step produced.
+    Every stage records wall time, rows in/out and the change in resident
+    memory; with the 'tracemalloc' mode also the step's peak and net Python
+    allocations, and with 'cprofile' its most expensive functions.
+    report() prints the stages sorted by time and writes them as JSON.
+
+    A run that cleans in chunks or shards uses one profiler for all of
+    them: pass it to every chunk, or merge() the records each shard's own
+    profiler collected in a worker process, and report() once at the end.
+    Stages of the same name are then added up, with `runs` counting them.
+    """
+
+    def __init__(self, name, modes=None):
+        self.name = name
+        self.modes = profile_modes() if modes is None else modes
+        self.records = []
+
+    @property
+    def enabled(self):
+        return self.modes is not None
+
+    @contextlib.contextmanager
+    def stage(self, name, frame=None):
+        if not self.enabled:
+            yield
+            return
+
+        record = {'stage': name, 'rows_in': _rows(frame)}
+        traced = 'tracemalloc' in self.modes
+        started_tracing = traced and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if traced:
+            tracemalloc.reset_peak()
+            allocated_before = tracemalloc.get_traced_memory()[0]
+        profile = cProfile.Profile() if 'cprofile' in self.modes else None
+        rss_before = current_rss_mb()
+
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            record['wall_s'] = time.perf_counter() - start
+            record['rows_out'] = _rows(frame)
+            rss_after = current_rss_mb()
+            record['rss_delta_mb'] = None if rss_before is None or rss_after is None else rss_after - rss_before
+            if traced:
+                allocated, peak = tracemalloc.get_traced_memory()
+                record['alloc_peak_mb'] = (peak - allocated_before) / 1024 / 1024
+                record['alloc_delta_mb'] = (allocated - allocated_before) / 1024 / 1024
+                if started_tracing:
+                    tracemalloc.stop()
+            if profile:
+                record['top_functions'] = _top_functions(profile)
+            self.records.append(record)
+
+    def merge(self, records):
+        """Add stage records collected elsewhere (e.g. by a shard in another process)."""
+        self.records.extend(records)
+
+    def stages(self):
+        """One record per stage name, chunks and shards added up (allocation peaks take the largest)."""
+        merged = {}
+        for record in self.records:
+            total = merged.get(record['stage'])
+            if total is None:
+                merged[record['stage']] = dict(record, runs=1)
+                continue
+            total['runs'] += 1
+            for key in ('wall_s', 'rows_in', 'rows_out', 'rss_delta_mb', 'alloc_delta_mb'):
+                if key in record:
+                    total[key] = _add(total.get(key), record[key])
+            if 'alloc_peak_mb' in record:
+                total['alloc_peak_mb'] = max(total.get('alloc_peak_mb', 0), record['alloc_peak_mb'])
+            if 'top_functions' in record:
+                total['top_functions'] = _merge_functions(total.get('top_functions', []), record['top_functions'])
+        return list(merged.values())
+
+    def as_dict(self):
+        return {
+            'cleaner': self.name,
+            'modes': sorted(self.modes or []),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'total_s': sum(record['wall_s'] for record in self.records),
+            'stages': self.stages(),
+        }
+
+    def write_json(self, directory=None):
+        """Write the report to <directory>/<cleaner>.json (default: $CLEANER_PROFILE_DIR or reports/profiles)."""
+        directory = directory or os.environ.get(PROFILE_DIR_ENV) or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.name}.json")
+        # Written aside and renamed, so a reader never sees half a report
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    def print_table(self):
+        total = sum(record['wall_s'] for record in self.records) or 1
+        traced = 'tracemalloc' in self.modes
+        header = (f"{'stage':<40} {'runs':>5} {'wall (ms)':>10} {'share':>6} {'rows in':>10} {'rows out':>10} "
+                  f"{'RSS Δ (MB)':>11}")
+        print(f"\nStage profile: {self.name}")
+        print(header + (f" {'alloc peak (MB)':>16}" if traced else ''))
+        for record in sorted(self.stages(), key=lambda r: r['wall_s'], reverse=True):
+            rss = f"{record['rss_delta_mb']:+.1f}" if record['rss_delta_mb'] is not None else '-'
+            line = (f"{record['stage'][:40]:<40} {record['runs']:>5} {record['wall_s'] * 1000:>10.1f} {record['wall_s'] / total:>6.1%} "
+                    f"{record['rows_in'] if record['rows_in'] is not None else '-':>10} "
+                    f"{record['rows_out'] if record['rows_out'] is not None else '-':>10} {rss:>11}")
+            if traced:
+                line += f" {record['alloc_peak_mb']:>16.1f}"
+            print(line)
+        print(f"{'total':<40} {'':>5} {total * 1000:>10.1f}")
+
+    def report(self, directory=None):
+        """Print the sorted table and write the JSON report; returns its path (None when disabled)."""
+        if not self.enabled or not self.records:
+            return None
+        self.print_table()
+        path = self.write_json(directory)
+        print(f"  - Profile written to {path}")
+        return path
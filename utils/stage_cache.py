@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from utils.storage import read_frame, write_frame
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'cleaned', '.cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+MANIFEST = 'manifest.json'
+
+
+def _sha256_file(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed cache of stage outputs (one Parquet file per entry).
+
+    Entries are keyed on the hashes of a stage's input files, its source
+    files and its parameters (see key()). manifest.json records every entry's
+    size and last use; put() evicts least recently used entries until the
+    cache fits in `max_bytes`. File hashes are memoized by (size, mtime) so
+    unchanged inputs are not re-read. Only one process should write to a
+    cache at a time.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+        # The bound may have been lowered since the last run
+        if self.total_bytes() > max_bytes:
+            self.evict()
+            self._save_manifest()
+
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, MANIFEST)
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+        manifest.setdefault('entries', {})
+        manifest.setdefault('files', {})
+        return manifest
+
+    def _save_manifest(self):
+        tmp_path = self._manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    def file_hash(self, path: str) -> str:
+        """sha256 of a file, reused while its size and mtime are unchanged."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        known = self.manifest['files'].get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+        sha256 = _sha256_file(path)
+        self.manifest['files'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        return sha256
+
+    def key(self, inputs, sources, params=None) -> str:
+        """Cache key of a stage run: its input files, source files and parameters."""
+        digest = hashlib.sha256()
+        for path in list(inputs) + list(sources):
+            digest.update(self.file_hash(path).encode())
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """The cached DataFrame for `key`, or None on a miss."""
+        entry = self.manifest['entries'].get(key)
+        if entry is None:
+            return None
+        path = os.path.join(self.cache_dir, entry['file'])
+        if not os.path.exists(path):
+            del self.manifest['entries'][key]
+            self._save_manifest()
+            return None
+        df = read_frame(path)
+        entry['last_used'] = time.time()
+        self._save_manifest()
+        return df
+
+    def put(self, key: str, df: pd.DataFrame, stage: str = None):
+        """Store `df` under `key`, then evict LRU entries beyond max_bytes."""
+        file_name = f"{key}.parquet"
+        path = os.path.join(self.cache_dir, file_name)
+        write_frame(df, path)
+        now = time.time()
+        self.manifest['entries'][key] = {
+            'file': file_name,
+            'stage': stage,
+            'bytes': os.path.getsize(path),
+            'created': now,
+            'last_used': now,
+        }
+        self.evict()
+        self._save_manifest()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self.manifest['entries']
+        total = sum(entry['bytes'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]['bytes']
+            path = os.path.join(self.cache_dir, entries.pop(key)['file'])
+            if os.path.exists(path):
+                os.remove(path)
+
+    def total_bytes(self) -> int:
+        return sum(entry['bytes'] for entry in self.manifest['entries'].values())
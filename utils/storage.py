@@ -0,0 +1,139 @@
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only the text formats are available
+    pa = None
+
+# Intermediate formats for the cleaned/ stage. Parquet and Feather (Arrow IPC)
+# keep dtypes, so dates stay dates and nothing is re-parsed on load; JSON and
+# CSV are kept as export options.
+STORAGE_FORMATS = {
+    'parquet': {'extension': '.parquet', 'columnar': True},
+    'feather': {'extension': '.feather', 'columnar': True},
+    'json': {'extension': '.json', 'columnar': False},
+    'csv': {'extension': '.csv', 'columnar': False},
+}
+DEFAULT_FORMAT = 'parquet'
+
+
+def _require_pyarrow(fmt: str):
+    if pa is None:
+        raise ImportError(f"The '{fmt}' format needs pyarrow; install it or pick 'json'/'csv'")
+
+
+def format_from_path(path: str) -> str:
+    """Storage format implied by the file extension of `path`."""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, spec in STORAGE_FORMATS.items():
+        if spec['extension'] == extension:
+            return fmt
+    raise ValueError(f"Unknown storage format for '{path}'; expected one of {list(STORAGE_FORMATS)}")
+
+
+def cleaned_path(directory: str, dataset: str, fmt: str = DEFAULT_FORMAT) -> str:
+    """Path of a cleaner output, e.g. cleaned/customers_cleaned_data.parquet."""
+    return os.path.join(directory, f"{dataset}_cleaned_data{STORAGE_FORMATS[fmt]['extension']}")
+
+
+def find_cleaned(directory: str, dataset: str) -> str:
+    """
+    The most recently written output of `dataset` in `directory`, in any
+    format, so the loader picks up whatever the cleaner produced last.
+    """
+    candidates = [cleaned_path(directory, dataset, fmt) for fmt in STORAGE_FORMATS]
+    existing = [path for path in candidates if os.path.exists(path)]
+    if not existing:
+        raise FileNotFoundError(f"No cleaned output for '{dataset}' in {directory}")
+    return max(existing, key=os.path.getmtime)
+
+
+def write_frame(df: pd.DataFrame, path: str, fmt: str = None):
+    """Write `df` to `path` in `fmt` (default: implied by the extension)."""
+    fmt = fmt or format_from_path(path)
+    if fmt == 'parquet':
+        _require_pyarrow(fmt)
+        df.to_parquet(path, index=False)
+    elif fmt == 'feather':
+        _require_pyarrow(fmt)
+        df.reset_index(drop=True).to_feather(path)
+    elif fmt == 'json':
+        df.to_json(path, orient='records', indent=2)
+    elif fmt == 'csv':
+        df.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unknown storage format: {fmt}")
+
+
+def read_frame(path: str, fmt: str = None) -> pd.DataFrame:
+    """Read a frame written by write_frame."""
+    fmt = fmt or format_from_path(path)
+    if fmt == 'parquet':
+        _require_pyarrow(fmt)
+        return pd.read_parquet(path)
+    if fmt == 'feather':
+        _require_pyarrow(fmt)
+        return pd.read_feather(path)
+    if fmt == 'json':
+        return pd.read_json(path)
+    if fmt == 'csv':
+        return pd.read_csv(path)
+    raise ValueError(f"Unknown storage format: {fmt}")
+
+
+class FrameWriter:
+    """
+    Append DataFrame chunks to one file (used by the streaming cleaners).
+
+    Columnar formats are written as one row group / record batch per chunk
+    with the schema of the first chunk; columns that are entirely null in
+    that chunk are typed as strings so later chunks can fill them.
+    """
+
+    def __init__(self, path: str, fmt: str = None):
+        self.path = path
+        self.fmt = fmt or format_from_path(path)
+        if self.fmt == 'json':
+            raise ValueError("JSON records cannot be appended to; stream to csv, parquet or feather")
+        if STORAGE_FORMATS[self.fmt]['columnar']:
+            _require_pyarrow(self.fmt)
+        self.schema = None
+        self._writer = None
+        self._chunks = 0
+
+    def write(self, df: pd.DataFrame):
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='w' if self._chunks == 0 else 'a', header=self._chunks == 0, index=False)
+        else:
+            if self.schema is None:
+                schema = pa.Schema.from_pandas(df, preserve_index=False)
+                for i, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                self.schema = schema
+                if self.fmt == 'parquet':
+                    self._writer = pq.ParquetWriter(self.path, self.schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self.schema)
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            self._writer.write_table(table)
+        self._chunks += 1
+
+    @property
+    def chunks(self) -> int:
+        """Number of chunks written so far."""
+        return self._chunks
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,6 +1,41 @@
+"""
+Column-wise profile of a dataset: types, sample values, distinct count,
+null percentage and obvious issues per column.
+
+Usage:
+    python utils/summarise.py Data/customers_messy_data.json Data/orders_unstructured_data.csv
+    python utils/summarise.py --approx [--chunk-rows 100000] [--sample-size 1000] --output reports/profiling_summaries.csv big_feed.csv
+
+The exact mode loads each file whole. `--approx` streams CSV, JSON-array
+and JSON-lines files in chunks, so memory use does not grow with the file:
+distinct counts come from a HyperLogLog sketch (exact up to
+utils.sketches.EXACT_DISTINCT_LIMIT distinct values), types and the casing
+check from a uniform sample, and null percentages and sample values from
+exact streaming counters. Each approximate row carries its error bounds.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+
 import pandas as pd
 
-def summarize_dataframe(df: pd.DataFrame, dataset_name: str):
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.sketches import HyperLogLog, Reservoir, hash_values
+
+CHUNK_ROWS = 100_000
+SAMPLE_SIZE = 1_000
+SAMPLE_VALUES = 5
+TEXT_CHECK_VALUES = 50
+
+
+def summarize_dataframe(df: pd.DataFrame, dataset_name: str, approx: bool = False,
+                        chunk_rows: int = CHUNK_ROWS, **sketch_options):
+    if approx:
+        chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+        return summarize_chunks(chunks, dataset_name, **sketch_options)
+
     summaries = []
 
     for col in df.columns:
@@ -42,3 +77,190 @@ def summarize_dataframe(df: pd.DataFrame, dataset_name: str):
 
     return summaries
 
+
+class _ColumnSketch:
+    """Streaming state of one column for summarize_chunks."""
+
+    def __init__(self, rows_before: int, precision: int, sample_size: int, seed: int):
+        # Rows read before the column first appeared have no value for it
+        self.rows = rows_before
+        self.nulls = rows_before
+        self.distinct = HyperLogLog(precision)
+        self.sample = Reservoir(sample_size, seed)
+        self.samples = []
+        self.first_values = []
+        self.kinds = set()
+
+    def add(self, values: pd.Series):
+        self.rows += len(values)
+        present = values.dropna()
+        self.nulls += len(values) - len(present)
+        if not len(present):
+            return
+        self.kinds.add(present.dtype.kind)
+        self.distinct.add_hashes(hash_values(present))
+        self.sample.add(present.tolist())
+        if len(self.first_values) < TEXT_CHECK_VALUES:
+            self.first_values.extend(present.iloc[:TEXT_CHECK_VALUES - len(self.first_values)].tolist())
+        if len(self.samples) < SAMPLE_VALUES:
+            for value in present.unique().tolist():
+                if value not in self.samples:
+                    self.samples.append(value)
+                    if len(self.samples) == SAMPLE_VALUES:
+                        break
+
+    def add_missing(self, rows: int):
+        self.rows += rows
+        self.nulls += rows
+
+    def summary(self, dataset_name: str, column: str) -> dict:
+        sampled = pd.Series(self.sample.values, dtype=object)
+        type_names = sampled.map(lambda x: type(x).__name__)
+        if {'i', 'f'} <= self.kinds:
+            # Integer chunks of a column that has missing values elsewhere; read whole it would be float
+            type_names = type_names.replace('int', 'float')
+        types = type_names.value_counts().to_dict()
+
+        notes = ""
+        if self.first_values and all(isinstance(v, str) for v in self.first_values):
+            text = sampled[sampled.map(lambda v: isinstance(v, str))]
+            if text.str.lower().nunique() != text.str.upper().nunique():
+                notes += "Possible casing inconsistency. "
+        if len(types) > 1:
+            notes += f"Multiple types found: {list(types.keys())}. "
+
+        return {
+            "dataset": dataset_name,
+            "column": column,
+            "types": list(types.keys()),
+            "sample_values": self.samples,
+            "unique_count": self.distinct.estimate(),
+            "null_percentage": round(self.nulls / self.rows * 100, 2) if self.rows else 0.0,
+            "notes": notes.strip(),
+            "rows": self.rows,
+            # The distinct count is within +/- this many values (~99%), and a
+            # type (or casing variant) rarer than this share of values may be
+            # missing from the sample (~95%)
+            "unique_count_error": self.distinct.error_bound(),
+            "types_sample_size": len(self.sample.values),
+            "types_missed_below_pct": round(self.sample.missed_share() * 100, 2),
+        }
+
+
+def summarize_chunks(chunks, dataset_name: str, precision: int = 14,
+                     sample_size: int = SAMPLE_SIZE, seed: int = 0):
+    """
+    Approximate summarize_dataframe over an iterable of DataFrame chunks,
+    holding one chunk at a time. Columns may come and go between chunks
+    (e.g. JSON records with optional keys); absent values count as nulls.
+    """
+    sketches = {}
+    rows = 0
+    for chunk in chunks:
+        for col in chunk.columns:
+            if col not in sketches:
+                sketches[col] = _ColumnSketch(rows, precision, sample_size, seed)
+            sketches[col].add(chunk[col])
+        for col in sketches.keys() - set(chunk.columns):
+            sketches[col].add_missing(len(chunk))
+        rows += len(chunk)
+
+    return [sketch.summary(dataset_name, col) for col, sketch in sketches.items()]
+
+
+def _json_array_chunks(path: str, chunk_rows: int, block_size: int = 1 << 20):
+    """
+    Records of a JSON array file, `chunk_rows` at a time, read in blocks. Each
+    chunk's records go through pd.read_json, so values are typed as when the
+    whole file is read.
+    """
+    decoder = json.JSONDecoder()
+    with open(path) as f:
+        buffer, pos, eof = f.read(block_size), 0, False
+        records = []
+        started = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[':
+                started = started or buffer[pos] == '['
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise ValueError(f"{path}: JSON array is not closed")
+                block = f.read(block_size)
+                buffer, pos, eof = buffer[pos:] + block, 0, not block
+                continue
+            if buffer[pos] == ']':
+                break
+            if not started or buffer[pos] != '{':
+                raise ValueError(f"{path}: expected a JSON array of records")
+            try:
+                _, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # A record cut off at the end of the block
+                block = f.read(block_size)
+                if not block:
+                    raise
+                buffer, pos = buffer[pos:] + block, 0
+                continue
+            records.append(buffer[pos:end])
+            pos = end
+            if len(records) == chunk_rows:
+                yield pd.read_json(io.StringIO('[' + ','.join(records) + ']'))
+                records = []
+        if records:
+            yield pd.read_json(io.StringIO('[' + ','.join(records) + ']'))
+
+
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    """DataFrame chunks of a .csv, .json (array of records) or .jsonl/.ndjson file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(path, chunksize=chunk_rows)
+    if extension in ('.jsonl', '.ndjson'):
+        return pd.read_json(path, lines=True, chunksize=chunk_rows)
+    if extension == '.json':
+        return _json_array_chunks(path, chunk_rows)
+    raise ValueError(f"Cannot profile '{path}'; expected .csv, .json, .jsonl or .ndjson")
+
+
+def read_whole(path: str) -> pd.DataFrame:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(path)
+    if extension in ('.jsonl', '.ndjson'):
+        return pd.read_json(path, lines=True)
+    return pd.read_json(path)
+
+
+def dataset_name_from_path(path: str) -> str:
+    """'Data/customers_messy_data.json' -> 'customers'."""
+    return os.path.splitext(os.path.basename(path))[0].split('_')[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help="Raw .csv/.json/.jsonl files to profile")
+    parser.add_argument('--approx', action='store_true', help="Stream the files and estimate (for files too big to load)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE, help="Values sampled per column for --approx")
+    parser.add_argument('--precision', type=int, default=14, help="HyperLogLog precision (2**p registers) for --approx")
+    parser.add_argument('--output', default='profiling_summaries.csv')
+    args = parser.parse_args()
+
+    summaries = []
+    for path in args.paths:
+        name = dataset_name_from_path(path)
+        print(f"Profiling {path} as '{name}'{' (approximate)' if args.approx else ''}...")
+        if args.approx:
+            summaries += summarize_chunks(read_chunks(path, args.chunk_rows), name,
+                                          precision=args.precision, sample_size=args.sample_size)
+        else:
+            summaries += summarize_dataframe(read_whole(path), name)
+        print(f"  - {len(summaries)} columns profiled so far")
+
+    pd.DataFrame(summaries).to_csv(args.output, index=False)
+    print(f"Summaries written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Seeded synthetic versions of the three raw datasets, at any size.
+
+Usage:
+    python utils/synthetic.py --out-dir /tmp/synthetic --orders 10000000 [--customers N] [--products N] [--seed 0]
+
+Every synthetic row is a copy of a random row of the matching sample file
+in Data/, so the messiness comes along as it is: duplicate column pairs
+(cust_id/customer_id, qty/quantity, ord_id/order_id, ...), mixed date
+formats, casing noise, empty strings vs nulls, negative prices and totals
+that do not add up, at the sample's frequencies. Keys are then rewritten
+so they are unique (customer_id/cust_id, product_id/item_id,
+order_id/ord_id), values that embed the entity number (emails, product
+names) follow the new key, and orders reference generated customers and
+products.
+
+Rows are produced and written in chunks of `chunk_rows`, so memory use does
+not depend on the output size. The output is a function of the seed, the
+row counts and `chunk_rows`.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'Data')
+CHUNK_ROWS = 100_000
+
+# How each dataset is read from Data/, written back, and which columns carry
+# its identity. `ids` maps a column to the format of the row number written
+# into it; `numbered` columns have their first run of digits replaced by the
+# row number (e.g. customer17@example.com).
+DATASETS = {
+    'customers': {
+        'file': 'customers_messy_data.json',
+        'ids': {'customer_id': '{}', 'cust_id': 'CUST_{:04d}'},
+        'numbered': ['email', 'email_address'],
+    },
+    'products': {
+        'file': 'products_inconsistent_data.json',
+        'ids': {'product_id': 'PROD_{:03d}', 'item_id': None},
+        'numbered': ['product_name', 'item_name', 'description'],
+    },
+    'orders': {
+        'file': 'orders_unstructured_data.csv',
+        'ids': {'order_id': 'ORD_{:05d}', 'ord_id': '{}'},
+        'numbered': [],
+    },
+}
+DATASET_SEEDS = {name: i for i, name in enumerate(DATASETS)}
+
+
+def load_templates(dataset: str) -> pd.DataFrame:
+    """Sample rows exactly as stored: JSON nulls stay None, CSV cells stay text."""
+    path = os.path.join(DATA_DIR, DATASETS[dataset]['file'])
+    if path.endswith('.csv'):
+        return pd.read_csv(path, dtype=str, keep_default_na=False)
+    with open(path) as f:
+        return pd.DataFrame(json.load(f), dtype=object)
+
+
+def _format_ids(numbers: np.ndarray, fmt) -> np.ndarray:
+    if fmt is None:
+        return numbers.astype(object)
+    return np.array([fmt.format(n) for n in numbers.tolist()], dtype=object)
+
+
+class _Numbered:
+    """A template column split around its first run of digits."""
+
+    def __init__(self, values: pd.Series):
+        parts = values.astype(str).str.extract(r'^(\D*)\d+(.*)$', expand=True)
+        self.has_number = (values.notna() & parts[0].notna()).to_numpy()
+        self.prefix = parts[0].fillna('').to_numpy(dtype=object)
+        self.suffix = parts[1].fillna('').to_numpy(dtype=object)
+
+    def render(self, values: np.ndarray, rows: np.ndarray, numbers: np.ndarray) -> np.ndarray:
+        out = values.copy()
+        hit = self.has_number[rows]
+        out[hit] = self.prefix[rows[hit]] + numbers[hit].astype(str).astype(object) + self.suffix[rows[hit]]
+        return out
+
+
+def _keep_blank(template: np.ndarray, generated: np.ndarray) -> np.ndarray:
+    """Generated values, except where the template cell was missing or empty."""
+    blank = pd.isna(template) | (template == '')
+    return np.where(blank, template, generated)
+
+
+def generate_chunks(dataset: str, rows: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS,
+                    customers: int = None, products: int = None):
+    """
+    Yield DataFrames of synthetic `dataset` rows, `chunk_rows` at a time.
+    Orders draw their customer and product references from 1..`customers`
+    and 1..`products`.
+    """
+    spec = DATASETS[dataset]
+    templates = load_templates(dataset)
+    columns = {col: templates[col].to_numpy(dtype=object) for col in templates.columns}
+    numbered = {col: _Numbered(templates[col]) for col in spec['numbered']}
+
+    for chunk_no, start in enumerate(range(0, rows, chunk_rows)):
+        n = min(chunk_rows, rows - start)
+        rng = np.random.default_rng([seed, DATASET_SEEDS[dataset], chunk_no])
+        picks = rng.integers(0, len(templates), n)
+        numbers = np.arange(start + 1, start + n + 1)
+
+        chunk = {col: values[picks] for col, values in columns.items()}
+        for col, fmt in spec['ids'].items():
+            chunk[col] = _format_ids(numbers, fmt)
+        for col, parts in numbered.items():
+            chunk[col] = parts.render(chunk[col], picks, numbers)
+
+        if dataset == 'orders':
+            customer_ids = rng.integers(1, customers + 1, n)
+            product_ids = rng.integers(1, products + 1, n)
+            chunk['customer_id'] = _keep_blank(chunk['customer_id'], _format_ids(customer_ids, '{}'))
+            chunk['cust_id'] = _keep_blank(chunk['cust_id'], _format_ids(customer_ids, 'CUST_{:04d}'))
+            chunk['product_id'] = _keep_blank(chunk['product_id'], _format_ids(product_ids, 'PROD_{:03d}'))
+
+        yield pd.DataFrame(chunk, columns=templates.columns)
+
+
+def write_chunks(chunks, path: str) -> int:
+    """
+    Stream chunks to `path` in the sample file's format: a JSON array of
+    records or a CSV with one header. Returns the number of rows written.
+    """
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        if path.endswith('.csv'):
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=i == 0)
+                rows += len(chunk)
+            return rows
+
+        f.write('[')
+        for i, chunk in enumerate(chunks):
+            records = chunk.to_json(orient='records')
+            f.write(('' if i == 0 else ',') + records[1:-1])
+            rows += len(chunk)
+        f.write(']')
+    return rows
+
+
+def generate(out_dir: str, orders: int, customers: int = None, products: int = None,
+             seed: int = 0, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """
+    Write synthetic customers, products and orders files (named as in Data/)
+    to `out_dir`. Customer and product counts default to the sample's
+    proportions (1 customer per 2 orders, 1 product per 5). Returns the
+    written paths.
+    """
+    customers = customers or max(1, orders // 2)
+    products = products or max(1, orders // 5)
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths = {}
+    for dataset, rows in [('customers', customers), ('products', products), ('orders', orders)]:
+        path = os.path.join(out_dir, DATASETS[dataset]['file'])
+        start = time.perf_counter()
+        written = write_chunks(
+            generate_chunks(dataset, rows, seed, chunk_rows, customers=customers, products=products), path)
+        seconds = time.perf_counter() - start
+        print(f"  - {dataset}: {written:,} rows -> {path} "
+              f"({os.path.getsize(path) / 1024 / 1024:.1f} MB, {written / seconds:,.0f} rows/sec)")
+        paths[dataset] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out-dir', required=True, help="Directory for the three raw files (use as pipeline.py --data-dir)")
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, default=None, help="Default: orders / 2")
+    parser.add_argument('--products', type=int, default=None, help="Default: orders / 5")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    print(f"Generating synthetic data (seed {args.seed})...")
+    generate(args.out_dir, args.orders, args.customers, args.products, args.seed, args.chunk_rows)
+
+
+if __name__ == "__main__":
+    main()